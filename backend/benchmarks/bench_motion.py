@@ -0,0 +1,78 @@
+"""Ken Burns motion engines: ffmpeg zoompan vs. precomputed crop windows.
+
+Run from backend/:  python -m benchmarks.bench_motion [--seconds 5]
+Needs ffmpeg on PATH. Reports encode frames/second for each engine and the
+visual drift between them (mean absolute luma difference and PSNR, measured
+on downscaled frames).
+"""
+import argparse
+import asyncio
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from services.ffmpeg_runner import FFMPEG_BIN, run_ffmpeg
+from services.video_service import VideoService
+
+PROBE_SIZE = (270, 480)
+
+
+def test_card(path: str, size=(1080, 1920)):
+    """Grid + text so that any drift between engines is visible"""
+    img = Image.new("RGB", size, (30, 60, 120))
+    draw = ImageDraw.Draw(img)
+    for x in range(0, size[0], 60):
+        draw.line([(x, 0), (x, size[1])], fill=(240, 220, 40), width=3)
+    for y in range(0, size[1], 60):
+        draw.line([(0, y), (size[0], y)], fill=(230, 40, 200), width=3)
+    img.save(path)
+
+
+def decode_luma(video_path: str) -> np.ndarray:
+    width, height = PROBE_SIZE
+    raw = subprocess.run([
+        FFMPEG_BIN, "-v", "error", "-i", video_path,
+        "-vf", f"scale={width}:{height}", "-f", "rawvideo", "-pix_fmt", "gray", "-"
+    ], capture_output=True, check=True).stdout
+    return np.frombuffer(raw, np.uint8).reshape(-1, height, width).astype(np.float32)
+
+
+async def run(seconds: float):
+    workdir = tempfile.mkdtemp(prefix="bench_motion_")
+    try:
+        service = VideoService(temp_dir=workdir)
+        service.output_dir = workdir
+        image = os.path.join(workdir, "card.jpg")
+        audio = os.path.join(workdir, "audio.wav")
+        test_card(image)
+        await run_ffmpeg(["-y", "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo", "-t", str(seconds), audio])
+
+        outputs = {}
+        frames = int(seconds * 30)
+        for engine in ("zoompan", "crop"):
+            started = time.perf_counter()
+            outputs[engine] = await service.create_ken_burns_video(image, audio, f"kb_{engine}", motion=engine)
+            elapsed = time.perf_counter() - started
+            print(f"{engine:<8} {frames / elapsed:>8.1f} fps  ({elapsed:.2f}s for {frames} frames)")
+
+        a, b = decode_luma(outputs["zoompan"]), decode_luma(outputs["crop"])
+        count = min(len(a), len(b))
+        diff = np.abs(a[:count] - b[:count])
+        mse = float(((a[:count] - b[:count]) ** 2).mean())
+        psnr = 10 * math.log10(255 ** 2 / mse) if mse else float("inf")
+        per_frame = diff.mean(axis=(1, 2))
+        print(f"drift: mean |Δluma| {diff.mean():.2f}, worst frame {per_frame.max():.2f}, PSNR {psnr:.1f} dB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=5)
+    asyncio.run(run(parser.parse_args().seconds))
@@ -0,0 +1,91 @@
+"""Placeholder image throughput: per-row draw.line loop vs. cached NumPy gradient,
+and prefix-remeasuring caption wrap vs. the cached layout engine.
+
+Run from backend/:  python -m benchmarks.bench_placeholder [--iterations 20]
+"""
+import argparse
+import asyncio
+import shutil
+import tempfile
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from services.backgrounds import gradient_background
+from services.text_layout import CaptionLayout, caption_layout, get_font
+from services.video_service import VideoService
+
+PROMPT = "A quiet forest at dawn, mist rolling between the trees as the first birds wake up"
+
+
+def legacy_background(width: int, height: int) -> Image.Image:
+    """The original 1920-iteration draw.line gradient"""
+    img = Image.new('RGB', (width, height), color='black')
+    draw = ImageDraw.Draw(img)
+    for i in range(height):
+        r = int(20 + (i / height) * 50)
+        g = int(40 + (i / height) * 60)
+        b = int(100 + (i / height) * 100)
+        draw.line([(0, i), (width, i)], fill=(r, g, b))
+    return img
+
+
+def legacy_wrap(prompt: str, width: int):
+    """The original wrap: font reloaded, whole prefix re-measured per word"""
+    draw = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+    try:
+        font = ImageFont.truetype("arial.ttf", 60)
+    except OSError:
+        font = get_font(60)
+    lines = []
+    current_line = ""
+    for word in prompt.split():
+        test_line = f"{current_line} {word}".strip()
+        bbox = draw.textbbox((0, 0), test_line, font=font)
+        if bbox[2] < width - 100:
+            current_line = test_line
+        else:
+            lines.append(current_line)
+            current_line = word
+    if current_line:
+        lines.append(current_line)
+    widths = [draw.textbbox((0, 0), line, font=font)[2] for line in lines]
+    return lines, widths
+
+
+def rate(label: str, fn, iterations: int):
+    started = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {iterations / elapsed:>9.1f} img/s  {elapsed / iterations * 1000:>8.2f} ms/img")
+
+
+def main(iterations: int):
+    width, height = 1080, 1920
+    rate("background: draw.line loop", lambda i: legacy_background(width, height), iterations)
+    gradient_background.cache_clear()
+    rate("background: numpy (cold)", lambda i: (gradient_background.cache_clear(),
+                                               gradient_background("cinematic", width, height)), iterations)
+    rate("background: numpy (cached copy)", lambda i: gradient_background("cinematic", width, height).copy(),
+         iterations)
+
+    long_prompt = " ".join([PROMPT] * 12)
+    rate("wrap: legacy textbbox prefixes", lambda i: legacy_wrap(long_prompt, width), iterations)
+    rate("wrap: layout engine (new text)", lambda i: CaptionLayout(long_prompt).wrap(width - 100), iterations)
+    rate("wrap: cached layout, 3 sizes", lambda i: [caption_layout(long_prompt).wrap(w - 100, round(60 * w / 1080))
+                                                   for w in (1080, 1920, 720)], iterations)
+
+    workdir = tempfile.mkdtemp(prefix="bench_placeholder_")
+    try:
+        service = VideoService(temp_dir=workdir)
+        rate("full placeholder (text + jpeg)",
+             lambda i: asyncio.run(service.create_placeholder_image(PROMPT, f"img_{i}")), iterations)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20)
+    main(parser.parse_args().iterations)
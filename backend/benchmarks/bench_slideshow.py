@@ -0,0 +1,78 @@
+"""Single-pass filter graph and parallel clips vs. the old clip-per-image renderer.
+
+Run from backend/:  python -m benchmarks.bench_slideshow [--counts 1,5,10,25,50]
+Needs ffmpeg on PATH. Reports wall time and child CPU time per renderer.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+from PIL import Image
+
+from services.ffmpeg_runner import run_ffmpeg
+from services.video_service import VideoService
+
+
+def child_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def make_inputs(workdir: str, count: int, seconds: float):
+    images = []
+    for i in range(count):
+        path = os.path.join(workdir, f"img_{i}.jpg")
+        shade = 40 + (i * 37) % 180
+        Image.new("RGB", (1080, 1920), (shade, 60, 200 - shade // 2)).save(path)
+        images.append(path)
+    audio = os.path.join(workdir, "audio.wav")
+    await run_ffmpeg([
+        "-y", "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo",
+        "-t", str(seconds), audio
+    ])
+    return images, audio
+
+
+async def measure(label: str, render):
+    cpu_before = child_cpu_seconds()
+    started = time.perf_counter()
+    await render()
+    wall = time.perf_counter() - started
+    cpu = child_cpu_seconds() - cpu_before
+    return {"renderer": label, "wall_s": wall, "cpu_s": cpu}
+
+
+async def run(counts):
+    workdir = tempfile.mkdtemp(prefix="bench_slideshow_")
+    service = VideoService()
+    service.output_dir = workdir
+    service.temp_dir = workdir
+    print(f"{'images':>6}  {'renderer':<12} {'wall s':>8} {'cpu s':>8}")
+    try:
+        for count in counts:
+            images, audio = await make_inputs(workdir, count, count * 3)
+            results = [
+                await measure("multipass", lambda: service.create_animated_video_multipass(
+                    images, audio, f"multi_{count}")),
+                await measure("singlepass", lambda: service.create_animated_video_from_images(
+                    images, audio, f"single_{count}", transition="none")),
+                await measure("single+fade", lambda: service.create_animated_video_from_images(
+                    images, audio, f"fade_{count}")),
+                await measure("parallel", lambda: service.create_animated_video_parallel(
+                    images, audio, f"parallel_{count}")),
+            ]
+            for r in results:
+                print(f"{count:>6}  {r['renderer']:<12} {r['wall_s']:>8.2f} {r['cpu_s']:>8.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", default="1,5,10,25,50")
+    args = parser.parse_args()
+    asyncio.run(run([int(c) for c in args.counts.split(",")]))
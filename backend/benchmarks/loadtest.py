@@ -0,0 +1,339 @@
+"""Load test: how many concurrent users can one backend instance take?
+
+Drives POST /api/generate → GET /api/status/{id} (polling) → GET
+/api/videos/{id} with Poisson arrivals at a series of rates, and reports
+request p50/p99 latency, task completion time, event-loop lag and CPU use
+per rate, plus the knee where the instance stops keeping up.
+
+Run from backend/:
+    python -m benchmarks.loadtest --rates 1,2,4,8 --duration 20
+    python -m benchmarks.loadtest --port 8765 ...        # same, over real TCP
+    python -m benchmarks.loadtest --url http://host:8000 # an external server
+
+In-process and --port runs swap VideoService for StubVideoService, whose
+TTS / image / encode costs are set with --tts-ms, --image-ms, --encode-ms
+(awaited, like network or subprocess time) and --cpu-ms (burned on the
+event loop per scene, like synchronous Python work). Use --real to keep the
+real renderer. --url runs use whatever the server has.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+# Configure the app for offline use before it is imported
+os.environ.setdefault("TASK_STORE", "memory")
+os.environ.setdefault("TTS_BACKEND", "tone")
+
+from benchmarks.suite import percentile  # noqa: E402
+
+# Every scene carries the take id so neither the render nor the scene cache can hit
+SCRIPT = "Take {take}. The morning light spreads slowly over the quiet harbour. Take {take}: the boats head out."
+
+
+# ========== STUB BACKEND ==========
+@dataclass
+class StubCosts:
+    tts_ms: float = 200
+    image_ms: float = 20
+    encode_ms: float = 500
+    cpu_ms: float = 5
+    video_bytes: int = 256 * 1024
+
+
+def burn(ms: float):
+    """Busy-wait on the calling thread (holds the GIL, blocks the loop)"""
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+class StubVideoService:
+    """Stands in for VideoService with fixed, configurable stage costs"""
+
+    def __init__(self, temp_dir: str, costs: StubCosts):
+        self.temp_dir = temp_dir
+        self.output_dir = "output"
+        self.costs = costs
+
+    def _touch(self, path: str, size: int = 1024) -> str:
+        with open(path, "wb") as f:
+            f.write(b"\0" * size)
+        return path
+
+    async def generate_simple_voice(self, text: str, voice_type: str = "male") -> str:
+        await asyncio.sleep(self.costs.tts_ms / 1000)
+        return self._touch(f"{self.temp_dir}/voice_{uuid.uuid4().hex[:8]}.wav")
+
+    async def create_placeholder_image(self, prompt: str, filename: str, style: str = "cinematic",
+                                       size=(1080, 1920)) -> str:
+        await asyncio.to_thread(burn, self.costs.image_ms)
+        return self._touch(f"{self.temp_dir}/{filename}.jpg")
+
+    async def create_ken_burns_video(self, image_path: str, audio_path: str, output_id: str,
+                                     on_progress=None, output_path: Optional[str] = None, **kwargs) -> str:
+        burn(self.costs.cpu_ms)
+        steps = 4
+        for step in range(steps):
+            await asyncio.sleep(self.costs.encode_ms / 1000 / steps)
+            if on_progress:
+                on_progress((step + 1) / steps)
+        return self._touch(output_path or f"{self.output_dir}/{output_id}.mp4")
+
+    async def concat_segments(self, segments: list, output_id: str) -> str:
+        return self._touch(f"{self.output_dir}/{output_id}.mp4", self.costs.video_bytes)
+
+
+# ========== LOAD GENERATOR ==========
+@dataclass
+class StepStats:
+    rate: float
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: {"generate": [], "status": [], "video": []})
+    completion: List[float] = field(default_factory=list)
+    submitted: int = 0
+    completed: int = 0
+    rejected: int = 0
+    failed: int = 0
+    errors: int = 0
+    loop_lag: List[float] = field(default_factory=list)
+    cpu_percent: float = 0
+    wall: float = 0
+
+    def summary(self) -> dict:
+        def ms(samples: List[float], pct: float) -> Optional[float]:
+            return round(percentile(samples, pct) * 1000, 1) if samples else None
+
+        return {
+            "rate": self.rate,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "errors": self.errors,
+            "throughput": round(self.completed / self.wall, 2) if self.wall else 0,
+            "requests": {
+                name: {"count": len(samples), "p50_ms": ms(samples, 50), "p99_ms": ms(samples, 99)}
+                for name, samples in self.latencies.items()
+            },
+            "completion_p50_s": round(percentile(self.completion, 50), 2) if self.completion else None,
+            "completion_p99_s": round(percentile(self.completion, 99), 2) if self.completion else None,
+            "loop_lag_p99_ms": ms(self.loop_lag, 99),
+            "cpu_percent": round(self.cpu_percent, 1),
+        }
+
+
+async def timed(stats: StepStats, name: str, request):
+    started = time.perf_counter()
+    response = await request
+    stats.latencies[name].append(time.perf_counter() - started)
+    return response
+
+
+async def user_session(client: httpx.AsyncClient, stats: StepStats, poll_interval: float, deadline: float):
+    """One render from submission to download"""
+    started = time.perf_counter()
+    try:
+        response = await timed(stats, "generate", client.post("/api/generate", json={
+            "script": SCRIPT.format(take=uuid.uuid4().hex[:8]),
+            "progressive": False,
+        }))
+        if response.status_code == 429:
+            stats.rejected += 1
+            return
+        response.raise_for_status()
+        task_id = response.json()["task_id"]
+        stats.submitted += 1
+
+        while time.perf_counter() < deadline:
+            status = (await timed(stats, "status", client.get(f"/api/status/{task_id}"))).json()
+            if status["status"] == "completed":
+                break
+            if status["status"] in ("failed", "cancelled"):
+                stats.failed += 1
+                return
+            await asyncio.sleep(poll_interval)
+        else:
+            return  # still running when the step ended
+
+        stats.completion.append(time.perf_counter() - started)
+        stats.completed += 1
+        video = await timed(stats, "video", client.get(f"/api/videos/{status['video_id']}"))
+        video.raise_for_status()
+    except (httpx.HTTPError, KeyError, ValueError):
+        stats.errors += 1
+
+
+async def measure_loop_lag(stats: StepStats, interval: float = 0.05):
+    """How late a sleep(interval) wakes up: the event loop's queueing delay"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        stats.loop_lag.append(max(0.0, time.perf_counter() - started - interval))
+
+
+async def run_step(client, rate: float, duration: float, poll_interval: float, drain: float) -> StepStats:
+    stats = StepStats(rate)
+    deadline = time.perf_counter() + duration + drain
+    lag_probe = asyncio.create_task(measure_loop_lag(stats))
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+
+    sessions = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        sessions.append(asyncio.create_task(user_session(client, stats, poll_interval, deadline)))
+        await asyncio.sleep(random.expovariate(rate))
+    await asyncio.gather(*sessions)
+
+    stats.wall = time.perf_counter() - wall_started
+    # Only meaningful when the server shares this process (in-process / --port)
+    stats.cpu_percent = (time.process_time() - cpu_started) / stats.wall * 100
+    lag_probe.cancel()
+    return stats
+
+
+def find_knee(steps: List[dict]) -> Optional[dict]:
+    """First rate where the instance stops keeping up.
+
+    Saturated means: under 90% of offered work completes, or requests get
+    rejected, or generate p99 exceeds 3x its value at the lowest rate.
+    """
+    if not steps:
+        return None
+    base_p99 = steps[0]["requests"]["generate"]["p99_ms"] or 0
+    for step in steps:
+        offered = step["submitted"] + step["rejected"]
+        reasons = []
+        if offered and step["completed"] < 0.9 * offered:
+            reasons.append(f"only {step['completed']}/{offered} renders completed")
+        if step["rejected"]:
+            reasons.append(f"{step['rejected']} rejected with 429")
+        p99 = step["requests"]["generate"]["p99_ms"] or 0
+        if base_p99 and p99 > 3 * base_p99 and p99 > 50:
+            reasons.append(f"generate p99 {p99} ms vs {base_p99} ms at the lowest rate")
+        if reasons:
+            return {"rate": step["rate"], "reasons": reasons}
+    return None
+
+
+def print_step(step: dict):
+    req = step["requests"]
+    print(
+        f"{step['rate']:>6.2f}/s  done {step['completed']:>4}/{step['submitted'] + step['rejected']:<4} "
+        f"429 {step['rejected']:>3}  "
+        f"gen p50/p99 {req['generate']['p50_ms']}/{req['generate']['p99_ms']} ms  "
+        f"status p99 {req['status']['p99_ms']} ms  "
+        f"task p50/p99 {step['completion_p50_s']}/{step['completion_p99_s']} s  "
+        f"lag p99 {step['loop_lag_p99_ms']} ms  cpu {step['cpu_percent']}%"
+    )
+
+
+# ========== TARGETS ==========
+def install_stub(costs: StubCosts):
+    import main
+    main.video_service_factory = lambda temp_dir: StubVideoService(temp_dir, costs)
+    return main
+
+
+async def run(args):
+    rates = [float(r) for r in args.rates.split(",")]
+    costs = StubCosts(args.tts_ms, args.image_ms, args.encode_ms, args.cpu_ms)
+    server = None
+    app_module = None
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        if args.workers:
+            os.environ["RENDER_WORKERS"] = str(args.workers)
+        app_module = install_stub(costs) if not args.real else __import__("main")
+        if args.port:
+            import uvicorn
+            config = uvicorn.Config(app_module.app, host="127.0.0.1", port=args.port, log_level="warning")
+            server = uvicorn.Server(config)
+            server_task = asyncio.create_task(server.serve())
+            while not server.started:
+                await asyncio.sleep(0.05)
+            client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=60)
+        else:
+            await app_module.app.router.startup()
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app_module.app), base_url="http://loadtest", timeout=60)
+
+    steps = []
+    try:
+        async with client:
+            for rate in rates:
+                stats = await run_step(client, rate, args.duration, args.poll_interval, args.drain)
+                step = stats.summary()
+                steps.append(step)
+                print_step(step)
+                if app_module:
+                    # Don't let one step's backlog leak into the next
+                    while app_module.scheduler.queue_depth or app_module.scheduler.active_count:
+                        await asyncio.sleep(0.1)
+    finally:
+        if server:
+            server.should_exit = True
+            await server_task
+        elif app_module:
+            await app_module.app.router.shutdown()
+
+    knee = find_knee(steps)
+    if knee:
+        print(f"\n📈 Saturation knee at {knee['rate']}/s: " + "; ".join(knee["reasons"]))
+    else:
+        print(f"\n📈 No saturation up to {rates[-1]}/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "target": args.url or (f"port {args.port}" if args.port else "in-process"),
+                "backend": "real" if args.real or args.url else {"stub": costs.__dict__},
+                "duration": args.duration,
+                "steps": steps,
+                "knee": knee,
+            }, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", default="0.5,1,2,4,8", help="comma-separated arrival rates (renders/s)")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of arrivals per rate")
+    parser.add_argument("--drain", type=float, default=30, help="extra seconds to let a step's renders finish")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--url", help="load an external server instead of the in-process app")
+    parser.add_argument("--port", type=int, help="serve the app with uvicorn on this port and load it over TCP")
+    parser.add_argument("--real", action="store_true", help="keep the real VideoService (needs ffmpeg)")
+    parser.add_argument("--workers", type=int, help="RENDER_WORKERS for the in-process app")
+    parser.add_argument("--tts-ms", type=float, default=200)
+    parser.add_argument("--image-ms", type=float, default=20)
+    parser.add_argument("--encode-ms", type=float, default=500)
+    parser.add_argument("--cpu-ms", type=float, default=5)
+    parser.add_argument("--output", help="write the per-rate results as JSON")
+    args = parser.parse_args()
+    if args.url and args.port:
+        sys.exit("--url and --port are mutually exclusive")
+    if args.output:
+        args.output = os.path.abspath(args.output)
+
+    # The app writes to relative output/ and temp/; keep those in scratch space
+    original_dir = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="render_loadtest_")
+    sys.path.insert(0, original_dir)
+    os.chdir(workdir)
+    try:
+        asyncio.run(run(args))
+    finally:
+        os.chdir(original_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,287 @@
+"""Offline benchmark suite for the render pipeline.
+
+Runs each stage over a matrix of script lengths, scene counts and output
+resolutions and reports throughput plus p50/p95 latency. Each run is saved
+as JSON so it can be compared with another commit's run.
+
+Run from backend/:
+    python -m benchmarks.suite [--quick] [--repeat 5] [--stages image,tts]
+    python -m benchmarks.suite --compare benchmarks/results/<old>.json
+
+Everything runs offline: TTS uses the local tone backend, the task store is
+in memory, and all files go to a scratch directory that is removed at the
+end. The kenburns, concat and pipeline stages need ffmpeg on PATH (or
+FFMPEG_BIN), and so do TTS cases whose script spans several chunks, since
+the chunks are stitched with ffmpeg; without it those are skipped.
+Results are written to benchmarks/results/ (git-ignored) unless --output
+says otherwise.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+# Configure the app for offline use before anything imports it
+os.environ.setdefault("TASK_STORE", "memory")
+os.environ.setdefault("TTS_BACKEND", "tone")
+
+SENTENCE = "The morning light spreads slowly over the quiet harbour as the boats head out."
+SCRIPT_LENGTHS = {"short": 1, "medium": 4, "long": 10}  # sentences (= scenes)
+RESOLUTIONS = {"draft-16x9": (768, 432), "720p-9x16": (720, 1280), "1080p-9x16": (1080, 1920)}
+QUICK_RESOLUTIONS = ("draft-16x9", "720p-9x16")
+QUICK_LENGTHS = ("short", "medium")
+STAGES = ("layout", "image", "tts", "kenburns", "concat", "pipeline")
+FFMPEG_STAGES = ("kenburns", "concat", "pipeline")
+
+
+def have_ffmpeg() -> bool:
+    from services.ffmpeg_runner import FFMPEG_BIN
+    return shutil.which(FFMPEG_BIN) is not None
+
+
+def script_of(sentences: int, salt: str = "") -> str:
+    """A script with the given sentence count; salt defeats the caches"""
+    return " ".join(f"{salt}{SENTENCE}" for _ in range(sentences))
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples: List[float], units: float) -> Dict[str, float]:
+    total = sum(samples)
+    return {
+        "runs": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        # units = work per run (scenes, frames, ...), so this is units/s
+        "throughput": round(units * len(samples) / total, 2) if total else None,
+    }
+
+
+class Suite:
+    def __init__(self, repeat: int, lengths, resolutions, stages):
+        self.repeat = repeat
+        self.lengths = lengths
+        self.resolutions = resolutions
+        self.stages = stages
+        self.results: List[dict] = []
+
+    async def measure(self, stage: str, case: Dict[str, object], unit: str, units: float,
+                      fn: Callable[[int], "asyncio.Future"], warmup: bool = True):
+        if warmup:
+            await fn(-1)
+        samples = []
+        for i in range(self.repeat):
+            started = time.perf_counter()
+            await fn(i)
+            samples.append(time.perf_counter() - started)
+        result = {"stage": stage, "case": case, "unit": unit, **summarize(samples, units)}
+        self.results.append(result)
+        label = " ".join(f"{k}={v}" for k, v in case.items())
+        print(f"{stage:<9} {label:<40} p50 {result['p50_ms']:>9.2f} ms  "
+              f"p95 {result['p95_ms']:>9.2f} ms  {result['throughput']:>8} {unit}/s")
+
+    # ----- stages -----
+    async def bench_layout(self):
+        from services.text_layout import CaptionLayout
+        for length in self.lengths:
+            text = script_of(SCRIPT_LENGTHS[length])
+
+            async def run(i, text=text):
+                CaptionLayout(text).wrap(980, 60)
+            await self.measure("layout", {"script": length}, "layouts", 1, run)
+
+    async def bench_image(self, service):
+        for name in self.resolutions:
+            size = RESOLUTIONS[name]
+
+            async def run(i, size=size):
+                await service.create_placeholder_image(SENTENCE, f"img_{uuid.uuid4().hex[:6]}", size=size)
+            await self.measure("image", {"resolution": name}, "images", 1, run)
+
+    async def bench_tts(self, service):
+        from services.tts import split_chunks
+        for length in self.lengths:
+            sentences = SCRIPT_LENGTHS[length]
+            if len(split_chunks(script_of(sentences))) > 1 and not have_ffmpeg():
+                print(f"{'tts':<9} script={length:<33} skipped: stitching chunks needs ffmpeg")
+                continue
+
+            async def run(i, sentences=sentences):
+                # Fresh text per run so we time synthesis, not the cache
+                await service.generate_simple_voice(script_of(sentences, f"{uuid.uuid4().hex[:6]} "))
+            await self.measure("tts", {"script": length}, "sentences", sentences, run)
+
+    async def bench_kenburns(self, service, image_dir: str):
+        from services.profiles import ENCODING_PROFILES
+        audio = await service.generate_simple_voice(SENTENCE)
+        seconds = len(SENTENCE) * 0.06  # length of the tone backend's narration
+        for name in self.resolutions:
+            size = RESOLUTIONS[name]
+            image = await service.create_placeholder_image(SENTENCE, f"kb_{name}", size=size)
+            profile = ENCODING_PROFILES["draft" if name.startswith("draft") else "final"]
+
+            async def run(i, size=size, image=image, profile=profile):
+                await service.create_ken_burns_video(
+                    image, audio, "kb", size=size, fps=profile.fps, profile=profile,
+                    output_path=os.path.join(image_dir, f"kb_{i}.mp4")
+                )
+            await self.measure("kenburns", {"resolution": name, "profile": profile.name},
+                               "frames", seconds * profile.fps, run, warmup=False)
+
+    async def bench_concat(self, service):
+        for length in self.lengths:
+            scenes = SCRIPT_LENGTHS[length]
+            images = [
+                await service.create_placeholder_image(f"Scene {n}", f"concat_{length}_{n}", size=(1280, 720))
+                for n in range(scenes)
+            ]
+            audio = await service.generate_simple_voice(script_of(scenes))
+
+            async def run(i, images=images, audio=audio):
+                await service.create_animated_video_from_images(images, audio, f"concat_{uuid.uuid4().hex[:6]}")
+            await self.measure("concat", {"scenes": scenes}, "scenes", scenes, run, warmup=False)
+
+    async def bench_pipeline(self):
+        import main
+        for length in self.lengths:
+            scenes = SCRIPT_LENGTHS[length]
+            for profile in ("draft", "final"):
+                if profile == "final" and length == "long" and "1080p-9x16" not in self.resolutions:
+                    continue  # too slow for a quick run
+
+                async def run(i, scenes=scenes, profile=profile):
+                    task_id = str(uuid.uuid4())
+                    request = main.VideoRequest(
+                        script=script_of(scenes, f"Take {task_id[:6]}. "),
+                        style=["reels"], profile=profile, progressive=False
+                    )
+                    main.tasks.create(task_id, {"status": "queued", "progress": 0, "message": "",
+                                                "request": dict(request)})
+                    await main.process_video_task(task_id, request)
+                    task = main.tasks.get(task_id)
+                    if task["status"] != "completed":
+                        raise RuntimeError(f"pipeline run failed: {task.get('message')}")
+                await self.measure("pipeline", {"scenes": scenes, "profile": profile},
+                                   "scenes", scenes, run, warmup=False)
+
+    async def run(self, workdir: str):
+        from services.video_service import VideoService
+        service = VideoService(temp_dir=os.path.join(workdir, "temp"))
+        runners = {
+            "layout": lambda: self.bench_layout(),
+            "image": lambda: self.bench_image(service),
+            "tts": lambda: self.bench_tts(service),
+            "kenburns": lambda: self.bench_kenburns(service, workdir),
+            "concat": lambda: self.bench_concat(service),
+            "pipeline": lambda: self.bench_pipeline(),
+        }
+        for stage in self.stages:
+            if stage in FFMPEG_STAGES and not have_ffmpeg():
+                print(f"{stage:<9} skipped: needs ffmpeg")
+                continue
+            await runners[stage]()
+
+
+def environment() -> dict:
+    def command_output(cmd: List[str]) -> Optional[str]:
+        try:
+            return subprocess.run(cmd, capture_output=True, text=True, timeout=10).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    from services.ffmpeg_runner import FFMPEG_BIN
+    ffmpeg = command_output([FFMPEG_BIN, "-version"])
+    return {
+        "commit": command_output(["git", "rev-parse", "--short", "HEAD"]),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "ffmpeg": ffmpeg.splitlines()[0] if ffmpeg else None,
+    }
+
+
+def compare(current: List[dict], baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {(r["stage"], json.dumps(r["case"], sort_keys=True)): r for r in baseline["results"]}
+    print(f"\nvs {baseline_path} ({baseline['environment'].get('commit')})")
+    for result in current:
+        old = before.get((result["stage"], json.dumps(result["case"], sort_keys=True)))
+        if not old:
+            continue
+        change = (result["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0
+        label = " ".join(f"{k}={v}" for k, v in result["case"].items())
+        print(f"{result['stage']:<9} {label:<40} p50 {old['p50_ms']:>9.2f} → {result['p50_ms']:>9.2f} ms "
+              f"({change:+.1f}%)")
+
+
+def main(args):
+    stages = args.stages.split(",") if args.stages else list(STAGES)
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        sys.exit(f"Unknown stages: {', '.join(sorted(unknown))}")
+    suite = Suite(
+        repeat=args.repeat,
+        lengths=QUICK_LENGTHS if args.quick else tuple(SCRIPT_LENGTHS),
+        resolutions=QUICK_RESOLUTIONS if args.quick else tuple(RESOLUTIONS),
+        stages=stages,
+    )
+    output_path = os.path.abspath(args.output or os.path.join(
+        "benchmarks", "results", time.strftime("%Y%m%d-%H%M%S") + ".json"))
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    env = environment()
+
+    # Relative output/ and temp/ paths used by the services land in scratch space
+    original_dir = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="render_bench_")
+    os.makedirs(os.path.join(workdir, "output"))
+    os.makedirs(os.path.join(workdir, "temp"))
+    sys.path.insert(0, original_dir)
+    os.chdir(workdir)
+    started = time.time()
+    try:
+        asyncio.run(suite.run(workdir))
+    finally:
+        os.chdir(original_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump({
+            "environment": env,
+            "started_at": started,
+            "duration_seconds": round(time.time() - started, 1),
+            "repeat": args.repeat,
+            "results": suite.results,
+        }, f, indent=2)
+    print(f"\n💾 Results saved to {output_path}")
+    if baseline_path:
+        compare(suite.results, baseline_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--quick", action="store_true", help="smaller matrix for a fast sanity check")
+    parser.add_argument("--stages", help=f"comma-separated subset of {','.join(STAGES)}")
+    parser.add_argument("--output", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier results JSON to diff p50s against")
+    main(parser.parse_args())
@@ -0,0 +1,148 @@
+"""Bulk renderer: render every VideoRequest in a JSONL file as one batch.
+
+Each line is a JSON object with VideoRequest fields (script, style, voice,
+profile, ...); other keys are ignored. The narration comes from `script`,
+or from `body` when a record has no `script`, so a work-order file such as
+requests.jsonl can be rendered as-is. `id` or `request_id` labels the
+result (default: `line-N`).
+
+Scripts longer than the API's 1000-character limit are skipped with a
+warning; pass --truncate to cut them at the last word that fits instead
+(each cut is reported on stderr). Records without any script are skipped.
+
+Run from backend/:
+    python bulk_render.py videos.jsonl                       # in this process
+    python bulk_render.py videos.jsonl --url http://host:8000
+    python bulk_render.py videos.jsonl --output results.jsonl --profile draft
+    python bulk_render.py requests.jsonl --truncate          # long bodies cut to fit
+
+Items go through POST /api/generate/batch, which shares narration and
+backgrounds between items and streams each result as it finishes; results
+are written as JSONL in finishing order, followed by aggregate throughput.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import List, Optional, Tuple
+
+MAX_SCRIPT_CHARS = 1000
+LABEL_FIELDS = ("id", "request_id")
+
+
+def load_records(path: str, profile: Optional[str], truncate: bool = False) -> Tuple[List[dict], List[str]]:
+    """VideoRequest bodies and their labels from a JSONL file.
+
+    Over-long scripts are skipped, or cut to MAX_SCRIPT_CHARS with truncate;
+    either way a warning names the record.
+    """
+    from main import VideoRequest
+    fields = set(VideoRequest.model_fields)
+    items, labels = [], []
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            item = {key: value for key, value in record.items() if key in fields}
+            label = next((str(record[k]) for k in LABEL_FIELDS if k in record), f"line-{line_no}")
+            source = "script" if item.get("script") else "body"
+            script = (item.get("script") or record.get("body") or "").strip()
+            if not script:
+                print(f"⚠️  Line {line_no} ({label}): no script or body, skipped", file=sys.stderr)
+                continue
+            if len(script) > MAX_SCRIPT_CHARS:
+                if not truncate:
+                    print(f"⚠️  Line {line_no} ({label}): {source} is {len(script)} chars "
+                          f"(max {MAX_SCRIPT_CHARS}), skipped; use --truncate to cut it", file=sys.stderr)
+                    continue
+                original = len(script)
+                script = script[:MAX_SCRIPT_CHARS].rsplit(" ", 1)[0]
+                print(f"✂️  Line {line_no} ({label}): {source} cut from {original} to "
+                      f"{len(script)} chars", file=sys.stderr)
+            item["script"] = script
+            if profile:
+                item["profile"] = profile
+            items.append(item)
+            labels.append(label)
+    return items, labels
+
+
+async def remote_batch(url: str, body: dict):
+    import httpx
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        async with client.stream("POST", "/api/generate/batch", json=body) as response:
+            if response.status_code != 200:
+                await response.aread()
+                sys.exit(f"❌ Batch rejected ({response.status_code}): {response.text}")
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+async def local_batch(body: dict):
+    """The same batch against this process's app (no server needed)"""
+    import main
+    from fastapi import HTTPException
+    await main.app.router.startup()
+    try:
+        try:
+            header, results = await main.start_batch(main.BatchRequest(**body))
+        except HTTPException as e:
+            sys.exit(f"❌ Batch rejected ({e.status_code}): {e.detail}")
+        yield header
+        async for record in results:
+            yield record
+    finally:
+        await main.app.router.shutdown()
+
+
+async def run(args):
+    items, labels = load_records(args.input, args.profile, args.truncate)
+    if not items:
+        sys.exit("Nothing to render")
+    body = {"items": items, "priority": args.priority}
+    stream = remote_batch(args.url, body) if args.url else local_batch(body)
+    out = open(args.output, "w") if args.output else sys.stdout
+    started = time.perf_counter()
+    summary = None
+    try:
+        async for record in stream:
+            if record["type"] == "batch":
+                print(f"📦 {record['count']} items, {record['renders']} to render "
+                      f"({record['unique_narration']}/{record['scenes']} unique narration scenes, "
+                      f"{record['unique_backgrounds']} backgrounds)", file=sys.stderr)
+            elif record["type"] == "result":
+                record["label"] = labels[record["index"]]
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                icon = "✅" if record["status"] == "completed" else "❌"
+                print(f"{icon} {record['label']}: {record['status']}", file=sys.stderr)
+            elif record["type"] == "summary":
+                summary = record
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    if summary:
+        print(f"\n📈 {summary['completed']}/{summary['count']} completed, {summary['failed']} failed, "
+              f"{summary['cancelled']} cancelled, {summary['rendered']} rendered, "
+              f"{summary['cached']} from cache in {elapsed:.1f}s "
+              f"({summary['count'] / elapsed:.2f} items/s, {summary['videos_per_minute']} videos/min)",
+              file=sys.stderr)
+        if summary["failed"] or summary["cancelled"]:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of VideoRequest records")
+    parser.add_argument("--url", help="render on this server instead of in-process")
+    parser.add_argument("--output", help="write per-item results here (default: stdout)")
+    parser.add_argument("--priority", default="low", help="priority for every item in the batch")
+    parser.add_argument("--profile", help="override every item's encoding profile (e.g. draft)")
+    parser.add_argument("--truncate", action="store_true",
+                        help=f"cut scripts over {MAX_SCRIPT_CHARS} chars instead of skipping them")
+    asyncio.run(run(parser.parse_args()))
@@ -1,14 +1,37 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 import uuid
 import os
-from datetime import datetime, timedelta
+import math
+from datetime import datetime
 import shutil
 import asyncio
+import json
+import time
+import itertools
+
+from services.render_queue import RenderScheduler, QueueFullError, PRIORITIES
+from services.job_queue import create_job_queue, QueueDispatcher
+from services.render_cache import RenderCache, request_key
+from services.workspace import TaskWorkspace
+from services.motion import MOTION_ENGINES
+from services.pipeline import ScenePipeline, PipelineSettings, split_scenes
+from services.backgrounds import gradient_background
+from services.scene_cache import get_scene_cache
+from services.render_cost import get_cost_model, RenderEstimate
+from services.cpu_budget import render_budget
+from services.profiles import ENCODING_PROFILES, STYLE_GEOMETRY, output_size, primary_style
+from services.ffmpeg_service import FFmpegService, RENDITION_LADDER, fit_ladder
+from services import metrics
+from services.metrics import StageTimer
+from services.task_store import create_task_store
+from services.progress_bus import ProgressBus, TERMINAL_STATUSES
+from services.janitor import StorageJanitor, StorageArea, artifact_key
+from services.delivery import MediaResponse, resolve_media_path
+from services import ffmpeg_runner
 
 app = FastAPI(title="AI Video Generator API", version="1.0.0")
 
@@ -24,7 +47,6 @@ app.add_middleware(
 # Create directories
 os.makedirs("output", exist_ok=True)
 os.makedirs("temp", exist_ok=True)
-app.mount("/output", StaticFiles(directory="output"), name="output")
 
 # ========== MODELS ==========
 class VideoRequest(BaseModel):
@@ -32,150 +54,709 @@ class VideoRequest(BaseModel):
     style: List[str] = ["cinematic"]
     avatar: str = "male"
     voice: str = "male"
+    priority: str = "normal"  # high / normal / low
+    motion: str = "crop"  # crop (fast, precomputed windows) / zoompan (ffmpeg filter)
+    progressive: bool = True  # publish an HLS playlist that grows as scenes finish
+    profile: str = "final"  # draft (fast low-res preview) / final
+    renditions: List[str] = []  # extra outputs from RENDITION_LADDER, e.g. ["720p", "mobile"]
+    target_size_mb: float = 10  # size budget for the "mobile" rendition
 
 class TaskResponse(BaseModel):
     task_id: str
     status: str
     message: str
+    estimated_seconds: Optional[float] = None  # predicted render time once started
+    eta_seconds: Optional[int] = None  # queue wait + render time
 
 # ========== GLOBAL VARIABLES ==========
-tasks = {}  # In-memory storage for tasks
+tasks = create_task_store()  # SQLite by default, TASK_STORE=memory for a plain dict
+progress_bus = ProgressBus()
+# host:pid:boot nonce. The nonce tells this process apart from a crashed
+# predecessor that had the same hostname and PID (containers restart as PID 1)
+WORKER_ID = f"{os.uname().nodename}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+render_cache = RenderCache("output")
+job_queue = create_job_queue()  # None: render inside this process
+# Tasks a standalone worker is giving back (shutdown, lost lease): cancelling
+# their render must not mark them cancelled, someone else will finish them
+handed_off = set()
 
 # ========== BACKGROUND TASK FUNCTION ==========
+def update_task(task_id: str, **fields):
+    """Apply a partial update to a task record, if it still exists"""
+    if tasks.update(task_id, **fields) and progress_bus.has_subscribers(task_id):
+        progress_bus.publish(task_id, status_payload(task_id, tasks.get(task_id)))
+
+def status_payload(task_id: str, task: dict) -> dict:
+    """Public view of a task, shared by polling and the event stream"""
+    response = {
+        "task_id": task_id,
+        "status": task["status"],
+        "progress": task["progress"],
+        "message": task["message"],
+        "video_id": task.get("video_id")
+    }
+    
+    position = queue_position(task_id)
+    if position is not None:
+        response["queue_position"] = position
+        response["estimated_wait_seconds"] = queue_wait(task_id)
+    eta = task_eta(task_id, task)
+    if eta is not None:
+        response["eta_seconds"] = eta
+    
+    if task.get("video_id"):
+        response["video_url"] = f"/output/{task['video_id']}.mp4"
+    if task.get("playlist_url"):
+        response["playlist_url"] = task["playlist_url"]
+    if task.get("renditions"):
+        response["renditions"] = task["renditions"]
+    if task.get("timings"):
+        response["timings"] = task["timings"]
+    if task.get("reused_scenes"):
+        response["reused_scenes"] = task["reused_scenes"]
+    
+    return response
+
+def queue_position(task_id: str) -> Optional[int]:
+    """1-based place in line, counting batch items not yet handed to the scheduler"""
+    position = scheduler.position(task_id)
+    if position is None and task_id in batch_waiting:
+        # Still with its batch feeder: behind everything already queued
+        position = scheduler.queue_depth + list(batch_waiting).index(task_id) + 1
+    return position
+
+def queue_wait(task_id: str) -> Optional[int]:
+    """Seconds until a queued task is expected to start"""
+    wait = scheduler.estimated_wait(task_id)
+    if wait is None and task_id in batch_waiting:
+        ahead = itertools.takewhile(lambda other: other != task_id, batch_waiting)
+        backlog = scheduler.backlog_seconds() + sum(batch_waiting[other] for other in ahead)
+        wait = math.ceil(backlog / scheduler.parallelism)
+    return wait
+
+def task_eta(task_id: str, task: dict) -> Optional[int]:
+    """Seconds until an unfinished task is expected to be done"""
+    estimate = task.get("estimate")
+    if task["status"] not in ("queued", "processing") or not estimate:
+        return None
+    if task["status"] == "queued":
+        wait = queue_wait(task_id) or 0
+        return wait + math.ceil(estimate["seconds"])
+    remaining = scheduler.remaining(task_id)
+    if remaining is None and task.get("started_at"):
+        # Rendering on another worker: go by the clock
+        remaining = max(0, math.ceil(estimate["seconds"] - (time.time() - task["started_at"])))
+    return remaining
+
+def pipeline_settings(request: VideoRequest) -> PipelineSettings:
+    style = primary_style(request.style)
+    profile = ENCODING_PROFILES[request.profile]
+    return PipelineSettings(
+        voice=request.voice,
+        style=style,
+        motion=request.motion,
+        size=output_size(style, profile),
+        fps=profile.fps,
+        profile=profile
+    )
+
+def estimate_render(request: VideoRequest, reused_scenes: Optional[int] = None) -> RenderEstimate:
+    """Predicted cost of a render: time, cores and memory (see services/render_cost.py)"""
+    settings = pipeline_settings(request)
+    scenes = split_scenes(request.script)
+    if reused_scenes is None:
+        scene_cache = get_scene_cache()
+        reused_scenes = sum(scene_cache.has(scene_cache.segment_key(text, settings)) for text in scenes)
+    ladder = fit_ladder([RENDITION_LADDER[name] for name in request.renditions], settings.size)
+    return get_cost_model().estimate(
+        scenes,
+        settings.size,
+        settings.profile,
+        rendition_sizes=[rung.frame_size(settings.size) for rung in ladder],
+        reused_scenes=reused_scenes,
+        budget_cores=render_budget.cores
+    )
+
+def stage_progress(task_id: str, start: int, end: int):
+    """Map a 0..1 stage fraction onto the task's overall progress range"""
+    last = None
+    def report(fraction: float, message: Optional[str] = None):
+        nonlocal last
+        progress = start + int((end - start) * fraction)
+        # Only write when what the user sees actually changes
+        if (progress, message) != last:
+            last = (progress, message)
+            fields = {"progress": progress}
+            if message:
+                fields["message"] = message
+            update_task(task_id, **fields)
+    return report
+
+async def run_pipeline(task_id: str, request: VideoRequest, video_service, timer: StageTimer):
+    """Script → sentence-level scenes → overlapping TTS / image / encode stages"""
+    update_task(task_id, status="processing", owner=WORKER_ID, progress=2, message="Processing prompt...",
+                started_at=time.time())
+    
+    settings = pipeline_settings(request)
+    video_id = f"video_{uuid.uuid4().hex[:8]}"
+    render_end = 90 if request.renditions else 99
+    pipeline = ScenePipeline(
+        video_service,
+        settings,
+        on_progress=stage_progress(task_id, 5, render_end),
+        playlist_dir=f"output/{video_id}" if request.progressive else None,
+        on_playlist=lambda path: update_task(task_id, playlist_url=f"/{path}"),
+        timer=timer,
+        scene_cache=get_scene_cache()
+    )
+    
+    final_path = await pipeline.run(request.script, video_id)
+    if pipeline.reused:
+        print(f"♻️  Reused {pipeline.reused} cached scene(s) for {video_id}")
+    
+    renditions = []
+    if request.renditions:
+        update_task(task_id, message="Encoding renditions...")
+        with timer.span("renditions"):
+            reports = await FFmpegService.create_renditions(
+                final_path,
+                f"output/{video_id}",
+                [RENDITION_LADDER[name] for name in request.renditions],
+                target_size_mb=request.target_size_mb,
+                on_progress=stage_progress(task_id, render_end, 99)
+            )
+        renditions = [dict(report, url=f"/{report.pop('path')}") for report in reports]
+        for report in renditions:
+            metrics.output_bytes.observe(report["size_bytes"], kind="rendition")
+    
+    metrics.output_bytes.observe(os.path.getsize(final_path), kind="video")
+    metrics.task_seconds.observe(timer.elapsed(), profile=request.profile)
+    # Calibrate the cost model with what this render actually took
+    get_cost_model().observe(estimate_render(request, reused_scenes=pipeline.reused),
+                             request.profile, timer.as_dict())
+    update_task(task_id, progress=100, status="completed", message="Video ready!",
+                video_id=video_id, renditions=renditions, timings=timer.as_dict(),
+                reused_scenes=pipeline.reused)
+    render_cache.store(request_key(request.dict()), video_id, renditions=renditions)
+    
+    print(f"✅ Video generated: {final_path}")
+
+def default_video_service(temp_dir: str):
+    # Imported here to avoid circular imports
+    from services.video_service import VideoService
+    return VideoService(temp_dir=temp_dir)
+
+# Swappable so load tests can plug in stub render backends
+video_service_factory = default_video_service
+
 async def process_video_task(task_id: str, request: VideoRequest):
-    """MVP: Simple pipeline - Prompt → Image → Voice → Video"""
+    """Scheduler entry point: runs the pipeline in a private workspace"""
+    task = tasks.get(task_id)
+    if task is None or task["status"] in TERMINAL_STATUSES:
+        # Cancelled through another API process while it sat in our queue
+        render_cache.finish(request_key(request.dict()), task_id)
+        return
+    timer = StageTimer()
     try:
-        # Try to import here to avoid circular imports
-        from services.video_service import VideoService
-        video_service = VideoService()
-        
-        tasks[task_id]["progress"] = 10
-        tasks[task_id]["status"] = "processing"
-        tasks[task_id]["message"] = "Processing prompt..."
-        
-        # MVP: Just use the whole prompt as one scene
-        scene = request.script
-        
-        tasks[task_id]["progress"] = 30
-        tasks[task_id]["message"] = "Creating image..."
-        
-        # Generate placeholder image
-        image_path = await video_service.create_placeholder_image(
-            prompt=scene,
-            filename=f"scene_{task_id}"
-        )
-        
-        tasks[task_id]["progress"] = 50
-        tasks[task_id]["message"] = "Generating voice..."
-        
-        # Generate voice (limit to 100 chars for speed)
-        text_for_voice = scene[:100] if len(scene) > 100 else scene
-        audio_path = await video_service.generate_simple_voice(
-            text=text_for_voice,
-            voice_type=request.voice
-        )
-        
-        tasks[task_id]["progress"] = 70
-        tasks[task_id]["message"] = "Creating video..."
-        
-        # Create Ken Burns video
-        video_id = f"video_{uuid.uuid4().hex[:8]}"
-        final_path = await video_service.create_ken_burns_video(
-            image_path=image_path,
-            audio_path=audio_path,
-            output_id=video_id
-        )
-        
-        tasks[task_id]["progress"] = 100
-        tasks[task_id]["status"] = "completed"
-        tasks[task_id]["message"] = "Video ready!"
-        tasks[task_id]["video_id"] = video_id
-        
-        print(f"✅ Video generated: {final_path}")
-        
+        with TaskWorkspace(task_id) as workspace:
+            await run_pipeline(task_id, request, video_service_factory(workspace.path), timer)
+        metrics.tasks_finished.inc(status="completed")
+    except asyncio.CancelledError:
+        if task_id in handed_off:
+            handed_off.discard(task_id)
+            print(f"↩️  Task handed back to the queue: {task_id}")
+            raise
+        update_task(task_id, status="cancelled", message="Cancelled", timings=timer.as_dict())
+        metrics.tasks_finished.inc(status="cancelled")
+        print(f"🛑 Task cancelled: {task_id}")
+        raise
     except Exception as e:
-        tasks[task_id]["status"] = "failed"
-        tasks[task_id]["message"] = f"Error: {str(e)}"
-        print(f"❌ Task failed: {e}")
+        stage = timer.failed_stage or "other"
+        update_task(task_id, status="failed", message=f"Error: {str(e)}", error=str(e),
+                    failed_stage=stage, timings=timer.as_dict())
+        metrics.tasks_finished.inc(status="failed")
+        metrics.stage_failures.inc(stage=stage)
+        print(f"❌ Task failed in {stage}: {e}")
+    finally:
+        render_cache.finish(request_key(request.dict()), task_id)
+
+SSE_RESYNC_SECONDS = float(os.getenv("SSE_RESYNC_SECONDS", "5"))
+
+# ========== SCHEDULER ==========
+# With JOB_QUEUE set, renders run on standalone workers (worker.py)
+scheduler = QueueDispatcher(job_queue) if job_queue else RenderScheduler(process_video_task, budget=render_budget)
+metrics.queue_depth.set_function(lambda: scheduler.queue_depth)
+metrics.active_tasks.set_function(lambda: scheduler.active_count)
+metrics.running_encoders.set_function(ffmpeg_runner.running_count)
+metrics.budget_cores.set_function(lambda: render_budget.cores_in_use)
+metrics.budget_memory.set_function(lambda: render_budget.memory_in_use)
+
+def owner_alive(owner: Optional[str]) -> bool:
+    """Is the process that owns a task still running on this host?"""
+    if not owner or ":" not in owner:
+        return False
+    if owner == WORKER_ID:
+        return True
+    host, pid = owner.split(":")[:2]
+    if host != os.uname().nodename:
+        return True  # Can't tell for other machines; leave their work alone
+    try:
+        if int(pid) == os.getpid():
+            return False  # An earlier process that had our PID
+        os.kill(int(pid), 0)
+        return True
+    except (ProcessLookupError, ValueError):
+        return False
+    except PermissionError:
+        return True
+
+def recover_orphaned_tasks():
+    """Re-queue work whose owning process died (e.g. after a restart)"""
+    for task in tasks.unfinished():
+        if owner_alive(task.get("owner")):
+            continue
+        task_id = task["task_id"]
+        # Several uvicorn workers starting together all see the dead owner;
+        # only the one whose claim lands re-queues the task
+        if not tasks.claim(task_id, task.get("owner"), owner=WORKER_ID):
+            continue
+        request = VideoRequest(**task["request"])
+        try:
+            scheduler.submit(task_id, request, priority=request.priority, cost=estimate_render(request))
+        except QueueFullError:
+            update_task(task_id, status="failed", message="Error: lost on restart, please retry")
+            continue
+        update_task(task_id, status="queued", progress=0, message="Re-queued after restart...")
+        render_cache.begin(task["cache_key"], task_id)
+        print(f"♻️  Recovered task {task_id}")
+
+def artifact_busy(area: str, key: str) -> bool:
+    """Workspaces of tasks that are still running must survive the janitor"""
+    if area == "temp" and key.startswith("task_"):
+        task = tasks.get(key[len("task_"):])
+        return bool(task) and task["status"] not in TERMINAL_STATUSES
+    return False
+
+def artifact_evicted(area: str, key: str):
+    if area == "output":
+        render_cache.forget_video(key)
+
+janitor = StorageJanitor(
+    [
+        StorageArea(
+            "output", "output",
+            ttl=float(os.getenv("OUTPUT_TTL_HOURS", "24")) * 3600,
+            max_bytes=int(os.getenv("OUTPUT_BUDGET_MB", "10240")) * 1024 * 1024,
+            keep=("render_cache",)
+        ),
+        StorageArea(
+            "temp", "temp",
+            ttl=float(os.getenv("TEMP_TTL_HOURS", "6")) * 3600,
+            max_bytes=int(os.getenv("TEMP_BUDGET_MB", "2048")) * 1024 * 1024,
+            # The TTS cache enforces its own budget
+            keep=("tts_cache", "scene_cache")
+        ),
+    ],
+    is_busy=artifact_busy,
+    on_evict=artifact_evicted
+)
+
+async def sweep_expired_tasks():
+    """Periodic TTL sweep so the task store does not grow without bound"""
+    while True:
+        await asyncio.sleep(60)
+        removed = tasks.sweep_expired()
+        if removed:
+            print(f"🧹 Swept {removed} expired task(s)")
+
+@app.on_event("startup")
+async def start_scheduler():
+    scheduler.start()
+    if job_queue is None:
+        # A shared job queue re-queues work of dead workers through leases
+        recover_orphaned_tasks()
+    app.state.task_sweeper = asyncio.create_task(sweep_expired_tasks())
+    app.state.janitor = asyncio.create_task(janitor.run())
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    app.state.task_sweeper.cancel()
+    app.state.janitor.cancel()
+    for feeder in list(batch_feeders):
+        feeder.cancel()
+    await scheduler.stop()
+    # Don't leave encoders running after the API goes away
+    await ffmpeg_runner.kill_all()
+    tasks.close()
+    if job_queue:
+        job_queue.close()
 
 # ========== ROUTES ==========
 @app.get("/")
 async def root():
     return {"message": "AI Video Generator API", "status": "running"}
 
-@app.post("/api/generate", response_model=TaskResponse)
-async def generate_video(request: VideoRequest, background_tasks: BackgroundTasks):
-    task_id = str(uuid.uuid4())
-    
-    # Validate input
+def validate_request(request: VideoRequest):
+    """Reject requests the pipeline cannot render (HTTP 400)"""
     if not request.script.strip():
         raise HTTPException(status_code=400, detail="Script cannot be empty")
     
     if len(request.script) > 1000:
         raise HTTPException(status_code=400, detail="Script too long (max 1000 chars)")
     
-    # Initialize task
-    tasks[task_id] = {
-        "status": "pending",
+    if request.priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority: {request.priority}")
+    
+    if request.motion not in MOTION_ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown motion engine: {request.motion}")
+    
+    if request.profile not in ENCODING_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown profile: {request.profile}")
+    
+    unknown_renditions = set(request.renditions) - set(RENDITION_LADDER)
+    if unknown_renditions:
+        raise HTTPException(status_code=400, detail=f"Unknown renditions: {sorted(unknown_renditions)}")
+    
+    if request.target_size_mb <= 0:
+        raise HTTPException(status_code=400, detail="target_size_mb must be positive")
+
+def reuse_render(request: VideoRequest, cache_key: str) -> Optional[TaskResponse]:
+    """Answer from a finished or in-flight identical render, if there is one"""
+    # Identical request already rendered: answer straight from the cache
+    cached = render_cache.lookup(cache_key)
+    metrics.cache_requests.inc(cache="render", result="hit" if cached else "miss")
+    if cached:
+        task_id = str(uuid.uuid4())
+        janitor.touch("output", cached["video_id"])
+        tasks.create(task_id, {
+            "status": "completed",
+            "progress": 100,
+            "message": "Video ready!",
+            "created_at": datetime.now().isoformat(),
+            "request": request.dict(),
+            "video_id": cached["video_id"],
+            "renditions": cached.get("renditions", []),
+            "cache_key": cache_key,
+            "cached": True,
+            "error": None
+        })
+        return TaskResponse(task_id=task_id, status="completed", message="Video served from cache")
+    
+    # Identical request still rendering: attach to it instead of rendering twice
+    inflight_task_id = render_cache.inflight(cache_key)
+    inflight_task = tasks.get(inflight_task_id) if inflight_task_id else None
+    if inflight_task and inflight_task["status"] in TERMINAL_STATUSES:
+        # Finished in another process, which cannot clear our in-flight entry
+        render_cache.finish(cache_key, inflight_task_id)
+        inflight_task = None
+    if inflight_task:
+        return TaskResponse(
+            task_id=inflight_task_id,
+            status=inflight_task["status"],
+            message="Attached to an identical render in progress"
+        )
+    return None
+
+def create_task_record(task_id: str, request: VideoRequest, cache_key: str, message: str,
+                       estimate: RenderEstimate):
+    tasks.create(task_id, {
+        "status": "queued",
         "progress": 0,
-        "message": "Starting video generation...",
+        "message": message,
         "created_at": datetime.now().isoformat(),
         "request": request.dict(),
         "video_id": None,
+        "cache_key": cache_key,
+        "owner": WORKER_ID,
+        "estimate": estimate.as_dict(),
         "error": None
-    }
+    })
+
+@app.post("/api/generate", response_model=TaskResponse)
+async def generate_video(request: VideoRequest):
+    validate_request(request)
     
-    # Start background task
-    background_tasks.add_task(process_video_task, task_id, request)
+    cache_key = request_key(request.dict())
+    reused = reuse_render(request, cache_key)
+    if reused:
+        return reused
+    
+    task_id = str(uuid.uuid4())
+    estimate = estimate_render(request)
+    create_task_record(task_id, request, cache_key, "Waiting for a render worker...", estimate)
+    
+    # Hand off to the render scheduler (429 when the queue is saturated)
+    try:
+        scheduler.submit(task_id, request, priority=request.priority, cost=estimate)
+    except QueueFullError as e:
+        tasks.delete(task_id)
+        raise HTTPException(
+            status_code=429,
+            detail="Render queue is full, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    render_cache.begin(cache_key, task_id)
     
     return TaskResponse(
         task_id=task_id,
-        status="started",
-        message="Video generation started"
+        status="queued",
+        message="Video generation queued",
+        estimated_seconds=round(estimate.seconds, 1),
+        eta_seconds=task_eta(task_id, tasks.get(task_id))
     )
 
-@app.get("/api/status/{task_id}")
-async def get_status(task_id: str):
-    if task_id not in tasks:
-        raise HTTPException(status_code=404, detail="Task not found")
+# ========== BATCHES ==========
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "500"))
+BATCH_POLL_SECONDS = float(os.getenv("BATCH_POLL_SECONDS", "0.5"))
+batch_feeders = set()  # keeps feeder tasks referenced until they finish
+# Batch items a feeder has not submitted yet, in submission order: task id -> estimated seconds
+batch_waiting: Dict[str, float] = {}
+
+class BatchRequest(BaseModel):
+    items: List[VideoRequest]
+    priority: Optional[str] = "low"  # overrides every item's priority; None keeps them
+
+def batch_plan(items: List[VideoRequest]) -> dict:
+    """How much narration / background work the batch shares"""
+    narration = [(scene, item.voice) for item in items for scene in split_scenes(item.script)]
+    backgrounds = [
+        (style, output_size(style, ENCODING_PROFILES[item.profile]))
+        for item in items
+        for style in [primary_style(item.style)]
+    ]
+    return {
+        "scenes": len(narration),
+        "unique_narration": len(set(narration)),
+        "unique_backgrounds": len(set(backgrounds)),
+        "backgrounds": sorted(set(backgrounds)),
+    }
+
+async def feed_batch(pending: list):
+    """Submit batch items as queue slots free up instead of failing with 429"""
+    try:
+        for task_id, request, estimate in pending:
+            while True:
+                task = tasks.get(task_id)
+                if task is None or task["status"] != "queued":
+                    break  # cancelled or expired while waiting
+                try:
+                    scheduler.submit(task_id, request, priority=request.priority, cost=estimate)
+                    break
+                except QueueFullError:
+                    await asyncio.sleep(BATCH_POLL_SECONDS)
+            batch_waiting.pop(task_id, None)
+    finally:
+        for task_id, _, _ in pending:
+            batch_waiting.pop(task_id, None)
+
+async def start_batch(batch: BatchRequest):
+    """Admit every item of a batch; returns the header record and a result stream"""
+    if not batch.items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(batch.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch too large (max {MAX_BATCH_ITEMS} items)")
+    if batch.priority is not None and batch.priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority: {batch.priority}")
+    for index, item in enumerate(batch.items):
+        if batch.priority is not None:
+            item.priority = batch.priority
+        try:
+            validate_request(item)
+        except HTTPException as e:
+            raise HTTPException(status_code=400, detail=f"Item {index}: {e.detail}")
     
-    task = tasks[task_id]
+    started = time.perf_counter()
+    plan = batch_plan(batch.items)
+    # Shared backgrounds are built once for the whole batch, off the event loop
+    await asyncio.to_thread(lambda: [gradient_background(style, *size) for style, size in plan.pop("backgrounds")])
     
-    # Auto-cleanup old tasks
-    created_at = datetime.fromisoformat(task["created_at"])
-    if datetime.now() - created_at > timedelta(hours=1):
-        del tasks[task_id]
-        raise HTTPException(status_code=404, detail="Task expired")
+    accepted, pending = [], []
+    for index, item in enumerate(batch.items):
+        cache_key = request_key(item.dict())
+        # Also catches duplicates within this batch: earlier items are in flight by now
+        reused = reuse_render(item, cache_key)
+        if reused:
+            accepted.append({"index": index, **reused.dict()})
+            continue
+        task_id = str(uuid.uuid4())
+        estimate = estimate_render(item)
+        create_task_record(task_id, item, cache_key, "Waiting in batch...", estimate)
+        render_cache.begin(cache_key, task_id)
+        pending.append((task_id, item, estimate))
+        batch_waiting[task_id] = estimate.seconds
+        accepted.append({"index": index, "task_id": task_id, "status": "queued", "message": "Video generation queued"})
     
-    response = {
-        "task_id": task_id,
-        "status": task["status"],
-        "progress": task["progress"],
-        "message": task["message"],
-        "video_id": task.get("video_id")
+    feeder = asyncio.create_task(feed_batch(pending))
+    batch_feeders.add(feeder)
+    feeder.add_done_callback(batch_feeders.discard)
+    
+    header = {
+        "type": "batch",
+        "batch_id": str(uuid.uuid4()),
+        "count": len(accepted),
+        "renders": len(pending),
+        # Render time of the whole batch on one worker, before overlap
+        "estimated_render_seconds": round(sum(estimate.seconds for _, _, estimate in pending), 1),
+        **plan,
+        "items": accepted
     }
+    return header, batch_results(accepted, started, {task_id for task_id, _, _ in pending})
+
+async def batch_results(accepted: list, started: float, own_renders: set):
+    """Yield each item's final status as it finishes, then a summary.
+
+    own_renders are the tasks this batch queued itself; items attached to
+    an identical render (in the batch or not) or served from the cache are
+    not renders and stay out of the throughput figure.
+    """
+    waiting = {item["index"]: item["task_id"] for item in accepted}
+    outcomes = {}
+    rendered = set()
+    while waiting:
+        for index, task_id in list(waiting.items()):
+            task = tasks.get(task_id)
+            if task is None:
+                result = {"task_id": task_id, "status": "expired"}
+            elif task["status"] in TERMINAL_STATUSES:
+                result = status_payload(task_id, task)
+            else:
+                continue
+            del waiting[index]
+            outcomes[index] = "cached" if task and task.get("cached") else result["status"]
+            if task_id in own_renders and result["status"] == "completed":
+                rendered.add(task_id)
+            yield {"type": "result", "index": index, **result}
+        if waiting:
+            await asyncio.sleep(BATCH_POLL_SECONDS)
     
-    if task.get("video_id"):
-        response["video_url"] = f"/output/{task['video_id']}.mp4"
+    elapsed = time.perf_counter() - started
+    statuses = list(outcomes.values())
+    yield {
+        "type": "summary",
+        "count": len(statuses),
+        "completed": statuses.count("completed") + statuses.count("cached"),
+        "cached": statuses.count("cached"),
+        "failed": statuses.count("failed"),
+        "cancelled": statuses.count("cancelled"),
+        "rendered": len(rendered),
+        "elapsed_seconds": round(elapsed, 2),
+        # Renders only: cache hits and attached duplicates would flatter the rate
+        "videos_per_minute": round(len(rendered) / elapsed * 60, 2) if elapsed else None
+    }
+
+@app.post("/api/generate/batch")
+async def generate_batch(batch: BatchRequest):
+    """Queue a batch and stream NDJSON: a header, one line per finished item, a summary"""
+    header, results = await start_batch(batch)
     
-    return response
+    async def lines():
+        yield json.dumps(header) + "\n"
+        async for record in results:
+            yield json.dumps(record) + "\n"
+    
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-@app.get("/api/videos/{video_id}")
-async def get_video(video_id: str):
-    video_path = f"output/{video_id}.mp4"
+@app.get("/api/status/{task_id}")
+async def get_status(task_id: str):
+    # Expired tasks are swept in the background and never returned
+    task = tasks.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
     
-    if not os.path.exists(video_path):
-        raise HTTPException(status_code=404, detail="Video not found")
+    return status_payload(task_id, task)
+
+@app.get("/api/status/{task_id}/events")
+async def stream_status(task_id: str):
+    """Server-sent events: one `status` event per change until the task ends"""
+    task = tasks.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
     
-    # Clean up old videos
-    cleanup_old_videos()
+    async def events():
+        queue = progress_bus.subscribe(task_id)
+        last = None
+        try:
+            snapshot = status_payload(task_id, task)
+            while True:
+                if snapshot != last:
+                    yield f"event: status\ndata: {json.dumps(snapshot)}\n\n"
+                    last = snapshot
+                if snapshot["status"] in TERMINAL_STATUSES:
+                    return
+                try:
+                    snapshot = await asyncio.wait_for(queue.get(), timeout=SSE_RESYNC_SECONDS)
+                except asyncio.TimeoutError:
+                    # Re-read the store: covers renders owned by another worker
+                    # process, and doubles as a keepalive for proxies
+                    current = tasks.get(task_id)
+                    if current is None:
+                        yield "event: expired\ndata: {}\n\n"
+                        return
+                    snapshot = status_payload(task_id, current)
+                    if snapshot == last:
+                        yield ": keepalive\n\n"
+        finally:
+            progress_bus.unsubscribe(task_id, queue)
     
-    return FileResponse(
-        video_path,
-        media_type="video/mp4",
-        filename=f"ai-video-{video_id}.mp4"
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
+@app.delete("/api/tasks/{task_id}")
+async def cancel_task(task_id: str):
+    """Cancel a queued or running render.
+
+    With several uvicorn workers and JOB_QUEUE=local, each task sits in the
+    scheduler of the process that accepted it. Any process can cancel a
+    queued task (the owner skips it when its turn comes), but only the
+    owner can stop one that is already rendering; elsewhere that is a 409.
+    Queue positions are likewise only reported by the owning process.
+    JOB_QUEUE=sqlite has neither limit: the queue is shared.
+    """
+    task = tasks.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    # Batch items still waiting for their feeder are queued but not in the scheduler yet;
+    # marking them cancelled is enough, the feeder skips them
+    if not scheduler.cancel(task_id) and task["status"] != "queued":
+        raise HTTPException(status_code=409, detail=f"Task already {task['status']}")
+    batch_waiting.pop(task_id, None)
+    
+    update_task(task_id, status="cancelled", message="Cancelled")
+    render_cache.finish(task["cache_key"], task_id)
+    return {"task_id": task_id, "status": "cancelled"}
+
+async def media_response(relative_path: str, filename: Optional[str] = None) -> MediaResponse:
+    """Range/conditional-aware response for a file under output/"""
+    path = resolve_media_path("output", relative_path)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Not found")
+    
+    janitor.touch("output", artifact_key(relative_path.split("/", 1)[0]))
+    return MediaResponse(path, stat_result, filename=filename)
+
+@app.api_route("/output/{file_path:path}", methods=["GET", "HEAD"])
+async def serve_output(file_path: str):
+    return await media_response(file_path)
+
+@app.api_route("/api/videos/{video_id}", methods=["GET", "HEAD"])
+async def get_video(video_id: str):
+    try:
+        return await media_response(f"{video_id}.mp4", filename=f"ai-video-{video_id}.mp4")
+    except HTTPException:
+        raise HTTPException(status_code=404, detail="Video not found")
+
 @app.get("/api/download/{video_id}")
 async def download_video(video_id: str):
     video_path = f"output/{video_id}.mp4"
@@ -198,8 +779,18 @@ async def get_styles():
         {"id": "corporate", "name": "Corporate", "icon": "💼", "description": "Professional business style"},
         {"id": "animated", "name": "Animated", "icon": "✨", "description": "Animated graphics"}
     ]
+    for style in styles:
+        width, height = STYLE_GEOMETRY[style["id"]]
+        style["orientation"] = "vertical" if height > width else "landscape"
     return styles
 
+@app.get("/api/profiles")
+async def get_profiles():
+    return [
+        {"id": p.name, "description": p.description, "fps": p.fps, "scale": p.scale}
+        for p in ENCODING_PROFILES.values()
+    ]
+
 @app.get("/api/voices")
 async def get_voices():
     voices = [
@@ -219,27 +810,27 @@ async def get_avatars():
     ]
     return avatars
 
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
-
-# ========== UTILITY FUNCTIONS ==========
-def cleanup_old_videos():
-    """Clean up videos older than 24 hours"""
-    now = datetime.now()
-    for file in os.listdir("output"):
-        if file.endswith(('.mp4', '.webm', '.mov', '.wav', '.jpg', '.png')):
-            file_path = os.path.join("output", file)
-            file_time = datetime.fromtimestamp(os.path.getctime(file_path))
-            if now - file_time > timedelta(hours=24):
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-                    
-
-# Cleanup on startup
-cleanup_old_videos()
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "queue_depth": scheduler.queue_depth,
+        "active_renders": scheduler.active_count,
+        "running_encoders": ffmpeg_runner.running_count(),
+        "workers": scheduler.workers,
+        "budget": {
+            "cores": render_budget.cores,
+            "cores_in_use": render_budget.cores_in_use,
+            "memory_bytes": render_budget.memory_bytes,
+            "memory_in_use": render_budget.memory_in_use
+        },
+        "storage": janitor.stats()
+    }
 
 if __name__ == "__main__":
     import uvicorn
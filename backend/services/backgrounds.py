@@ -0,0 +1,38 @@
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+Color = Tuple[int, int, int]
+
+# (top, bottom) gradient colours per style
+STYLE_GRADIENTS = {
+    "cinematic":   ((20, 40, 100), (70, 100, 200)),
+    "reels":       ((90, 20, 110), (230, 80, 120)),
+    "dark":        ((5, 5, 12), (35, 30, 60)),
+    "documentary": ((30, 45, 35), (110, 120, 80)),
+    "corporate":   ((15, 35, 70), (60, 120, 170)),
+    "animated":    ((40, 10, 120), (20, 180, 200)),
+}
+
+
+def gradient_column(top: Color, bottom: Color, height: int) -> np.ndarray:
+    """One pixel wide vertical gradient as a (height, 1, 3) uint8 array"""
+    t = np.arange(height, dtype=np.float64)[:, None] / height
+    top_arr = np.asarray(top, dtype=np.float64)
+    rows = (top_arr + t * (np.asarray(bottom, dtype=np.float64) - top_arr)).astype(np.uint8)
+    return rows[:, None, :]
+
+
+@lru_cache(maxsize=32)
+def gradient_background(style: str, width: int, height: int) -> Image.Image:
+    """Cached background for a style and resolution.
+
+    Shared between requests: callers must `.copy()` before drawing on it.
+    """
+    top, bottom = STYLE_GRADIENTS.get(style, STYLE_GRADIENTS["cinematic"])
+    column = Image.fromarray(np.ascontiguousarray(gradient_column(top, bottom, height)), "RGB")
+    # Nearest-neighbour widening copies each row exactly; much cheaper than
+    # materialising the broadcast array in NumPy
+    return column.resize((width, height), Image.NEAREST)
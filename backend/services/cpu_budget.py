@@ -0,0 +1,100 @@
+import asyncio
+import contextlib
+import os
+
+
+class CPUBudget:
+    """Global count of CPU slots shared by every encoder this process starts"""
+
+    def __init__(self, slots: int):
+        self.slots = max(1, slots)
+        self._free = self.slots
+        self._cond = asyncio.Condition()
+
+    @contextlib.asynccontextmanager
+    async def reserve(self, slots: int = 1):
+        """Wait until `slots` CPUs are free and hold them for the block"""
+        slots = min(max(1, slots), self.slots)
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._free >= slots)
+            self._free -= slots
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._free += slots
+                self._cond.notify_all()
+
+    @property
+    def in_use(self) -> int:
+        return self.slots - self._free
+
+
+cpu_budget = CPUBudget(int(os.getenv("RENDER_CPU_BUDGET", "0") or 0) or (os.cpu_count() or 2))
+
+
+class ResourceBudget:
+    """CPU cores and memory shared by every render this process admits.
+
+    Waiters are served strictly in arrival order, so a large render is not
+    starved by a stream of small ones slipping past it. A request bigger
+    than the whole budget is clamped to it and simply runs alone.
+    """
+
+    def __init__(self, cores: int, memory_bytes: int):
+        self.cores = max(1, cores)
+        self.memory_bytes = memory_bytes
+        self._free_cores = self.cores
+        self._free_memory = memory_bytes
+        self._waiting = []
+        self._cond = asyncio.Condition()
+
+    @contextlib.asynccontextmanager
+    async def reserve(self, cores: int, memory_bytes: int):
+        cores = min(max(1, cores), self.cores)
+        memory_bytes = min(memory_bytes, self.memory_bytes)
+        ticket = object()
+        async with self._cond:
+            self._waiting.append(ticket)
+            try:
+                await self._cond.wait_for(lambda: self._waiting[0] is ticket
+                                          and self._free_cores >= cores
+                                          and self._free_memory >= memory_bytes)
+            finally:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+            self._free_cores -= cores
+            self._free_memory -= memory_bytes
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._free_cores += cores
+                self._free_memory += memory_bytes
+                self._cond.notify_all()
+
+    @property
+    def cores_in_use(self) -> int:
+        return self.cores - self._free_cores
+
+    @property
+    def memory_in_use(self) -> int:
+        return self.memory_bytes - self._free_memory
+
+
+def default_memory_budget() -> int:
+    """RENDER_MEMORY_BUDGET_MB, else 60% of physical memory (4 GiB if unknown)"""
+    configured = int(os.getenv("RENDER_MEMORY_BUDGET_MB", "0") or 0)
+    if configured > 0:
+        return configured * 1024 * 1024
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(int(line.split()[1]) * 1024 * 0.6)
+    except (OSError, ValueError, IndexError):
+        pass
+    return 4096 * 1024 * 1024
+
+
+render_budget = ResourceBudget(cpu_budget.slots, default_memory_budget())
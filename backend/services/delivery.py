@@ -0,0 +1,211 @@
+import asyncio
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+CHUNK_SIZE = 256 * 1024
+
+# Renders and HLS segments never change once written (ids are unique);
+# playlists grow while a render is running so they must be revalidated
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+MEDIA_TYPES = {
+    ".mp4": "video/mp4",
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+    ".m4s": "video/iso.segment",
+    ".wav": "audio/wav",
+    ".mp3": "audio/mpeg",
+    ".jpg": "image/jpeg",
+    ".png": "image/png",
+}
+
+
+def media_type_for(path: str) -> Optional[str]:
+    return MEDIA_TYPES.get(os.path.splitext(path)[1].lower())
+
+
+def cache_control_for(path: str) -> str:
+    return REVALIDATE if path.endswith(".m3u8") else IMMUTABLE
+
+
+def resolve_media_path(root: str, relative: str) -> Optional[str]:
+    """Path under root for a URL path, or None if it escapes root or is not media"""
+    path = os.path.normpath(os.path.join(root, relative))
+    if os.path.commonpath([os.path.abspath(path), os.path.abspath(root)]) != os.path.abspath(root):
+        return None
+    if media_type_for(path) is None:
+        return None
+    return path
+
+
+def strong_etag(stat_result: os.stat_result) -> str:
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def parse_range(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """Byte ranges (inclusive) from a Range header.
+
+    Returns None when the header should be ignored (malformed, not bytes),
+    and an empty list when no range is satisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+    ranges = []
+    for part in spec.split(","):
+        start, sep, end = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if start == "":
+                length = int(end)
+                if length <= 0:
+                    continue
+                ranges.append((max(0, size - length), size - 1))
+            else:
+                first = int(start)
+                last = int(end) if end else size - 1
+                if end and last < first:
+                    return None
+                if first < size:
+                    ranges.append((first, min(last, size - 1)))
+        except ValueError:
+            return None
+    return ranges
+
+
+class MediaResponse(Response):
+    """File response with Range, conditional GET and HEAD support.
+
+    Uses the ASGI zero-copy (`http.response.zerocopysend`) or pathsend
+    extensions when the server offers them, otherwise streams the file in
+    CHUNK_SIZE pread()s off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        stat_result: os.stat_result,
+        media_type: Optional[str] = None,
+        filename: Optional[str] = None,
+        cache_control: Optional[str] = None,
+    ):
+        self.path = path
+        self.stat_result = stat_result
+        self.media_type = media_type or media_type_for(path) or "application/octet-stream"
+        self.background = None
+        self.body = b""
+        self.status_code = 200
+        self.etag = strong_etag(stat_result)
+        self.last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": self.etag,
+            "last-modified": self.last_modified,
+            "cache-control": cache_control or cache_control_for(path),
+            "content-type": self.media_type,
+        }
+        if filename:
+            headers["content-disposition"] = f'inline; filename="{filename}"'
+        self._base_headers = headers
+        self.init_headers(headers)
+
+    # ----- validators -----
+    def _not_modified(self, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or self.etag in tags
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.stat_result.st_mtime) <= since
+        return False
+
+    def _range_applies(self, request_headers: Headers) -> bool:
+        """If-Range: only honour the Range header when the file is unchanged"""
+        if_range = request_headers.get("if-range")
+        if if_range is None:
+            return True
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            return if_range == self.etag
+        return if_range == self.last_modified
+
+    # ----- sending -----
+    async def _start(self, send, status: int, headers: dict):
+        self.status_code = status
+        self.init_headers(headers)
+        await send({"type": "http.response.start", "status": status, "headers": self.raw_headers})
+
+    async def _send_file(self, scope, send, offset: int, count: int):
+        extensions = scope.get("extensions") or {}
+        whole_file = offset == 0 and count == self.stat_result.st_size
+        if whole_file and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+            return
+
+        with await asyncio.to_thread(open, self.path, "rb") as file:
+            if "http.response.zerocopysend" in extensions:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": offset,
+                    "count": count,
+                    "more_body": False,
+                })
+                return
+
+            fd = file.fileno()
+            remaining = count
+            while remaining > 0:
+                chunk = await asyncio.to_thread(os.pread, fd, min(CHUNK_SIZE, remaining), offset)
+                if not chunk:
+                    break  # file shrank underneath us
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def __call__(self, scope, receive, send):
+        request_headers = Headers(scope=scope)
+        head_only = scope.get("method", "GET").upper() == "HEAD"
+        size = self.stat_result.st_size
+        headers = dict(self._base_headers)
+
+        if self._not_modified(request_headers):
+            await self._start(send, 304, headers)
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        offset, count, status = 0, size, 200
+        range_header = request_headers.get("range")
+        if range_header and self._range_applies(request_headers):
+            ranges = parse_range(range_header, size)
+            if ranges == []:
+                headers["content-range"] = f"bytes */{size}"
+                headers["content-length"] = "0"
+                await self._start(send, 416, headers)
+                await send({"type": "http.response.body", "body": b""})
+                return
+            # Players only ever ask for one range; for multi-range requests we
+            # send the whole file, which RFC 9110 allows
+            if ranges and len(ranges) == 1:
+                first, last = ranges[0]
+                offset, count, status = first, last - first + 1, 206
+                headers["content-range"] = f"bytes {first}-{last}/{size}"
+
+        headers["content-length"] = str(count)
+        await self._start(send, status, headers)
+        if head_only or count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await self._send_file(scope, send, offset, count)
@@ -0,0 +1,124 @@
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from services import metrics
+
+
+def link_or_copy(src: str, dst: str):
+    """Hard-link src to dst (cheap, and safe from LRU eviction); copy across filesystems"""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except FileNotFoundError:
+        raise  # src is gone; a copy would fail the same way
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class DiskLRUCache:
+    """Size-bounded directory of artifacts, evicted least-recently-used first.
+
+    Keys should already be content hashes; the file keeps the key as its name
+    plus the extension of the artifact that was stored. Work that produces an
+    entry writes into the cache's staging directory, so it does not depend on
+    any one task's workspace surviving until put().
+    """
+
+    # Staging files older than this were left by a crashed process
+    STALE_STAGING_SECONDS = 3600
+
+    def __init__(self, directory: str, max_bytes: int, name: str = "disk"):
+        self.name = name
+        self.directory = directory
+        self.staging_dir = os.path.join(directory, "staging")
+        self.max_bytes = max_bytes
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        """Rebuild the LRU order from access times left by a previous run"""
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            found.append((stat.st_atime, os.path.splitext(name)[0], path, stat.st_size))
+        for _, key, path, size in sorted(found):
+            self._entries[key] = (path, size)
+            self.total_bytes += size
+        # Other processes may be staging into the same directory right now
+        cutoff = time.time() - self.STALE_STAGING_SECONDS
+        for name in os.listdir(self.staging_dir):
+            path = os.path.join(self.staging_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def staging_path(self, extension: str) -> str:
+        """Fresh path for an artifact that is being produced for put()"""
+        return os.path.join(self.staging_dir, f"{uuid.uuid4().hex}.{extension}")
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None or not os.path.exists(entry[0]):
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            metrics.cache_requests.inc(cache=self.name, result="miss")
+            return None
+        self._entries.move_to_end(key)
+        os.utime(entry[0])
+        self.hits += 1
+        metrics.cache_requests.inc(cache=self.name, result="hit")
+        return entry[0]
+
+    def __contains__(self, key: str) -> bool:
+        """Presence check that, unlike get(), does not count as a use"""
+        return key in self._entries
+
+    def put(self, key: str, src_path: str) -> str:
+        """Move a finished artifact into the cache and return its new path"""
+        ext = os.path.splitext(src_path)[1]
+        path = os.path.join(self.directory, f"{key}{ext}")
+        tmp_path = f"{path}.tmp"
+        shutil.move(src_path, tmp_path)
+        os.replace(tmp_path, path)
+
+        if key in self._entries:
+            self.total_bytes -= self._entries[key][1]
+        size = os.path.getsize(path)
+        self._entries[key] = (path, size)
+        self._entries.move_to_end(key)
+        self.total_bytes += size
+        self._evict(keep=key)
+        return path
+
+    def _drop(self, key: str):
+        path, size = self._entries.pop(key)
+        self.total_bytes -= size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self, keep: str):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            self._drop(oldest)
+
+    def __len__(self) -> int:
+        return len(self._entries)
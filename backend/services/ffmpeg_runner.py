@@ -0,0 +1,213 @@
+import asyncio
+import os
+from collections import deque
+from typing import AsyncIterator, Callable, List, Optional, Set
+
+from services import metrics
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+FFPROBE_BIN = os.getenv("FFPROBE_BIN", "ffprobe")
+DEFAULT_TIMEOUT = float(os.getenv("FFMPEG_TIMEOUT", "600"))
+
+ProgressCallback = Callable[[float], None]
+
+# Every live encoder, so shutdown can reap them
+_running: Set[asyncio.subprocess.Process] = set()
+
+
+class FFmpegError(Exception):
+    """ffmpeg/ffprobe exited badly, timed out or could not be started"""
+
+    def __init__(self, message: str, returncode: Optional[int] = None, stderr: str = ""):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+async def _terminate(proc: asyncio.subprocess.Process, grace: float = 2.0):
+    """SIGTERM, then SIGKILL if ffmpeg does not exit in time"""
+    if proc.returncode is not None:
+        return
+    try:
+        proc.terminate()
+        await asyncio.wait_for(proc.wait(), timeout=grace)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+    except ProcessLookupError:
+        pass
+
+
+async def _drain_stderr(stream: asyncio.StreamReader, tail: deque):
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+        tail.append(line.decode(errors="replace").rstrip())
+
+
+async def _read_progress(
+    stream: asyncio.StreamReader,
+    duration: Optional[float],
+    on_progress: Optional[ProgressCallback],
+    on_block: Optional[Callable[[], None]] = None,
+):
+    """Parse `-progress pipe:1` key=value blocks into a 0..1 fraction"""
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+        key, _, value = line.decode(errors="replace").strip().partition("=")
+        if key == "progress" and on_block:
+            on_block()
+        if on_progress is None:
+            continue
+        if key == "out_time_us" and duration:
+            try:
+                seconds = int(value) / 1_000_000
+            except ValueError:
+                continue
+            on_progress(min(1.0, max(0.0, seconds / duration)))
+        elif key == "progress" and value == "end":
+            on_progress(1.0)
+
+
+async def _feed_stdin(proc: asyncio.subprocess.Process, chunks: AsyncIterator[bytes]):
+    """Stream raw input (e.g. rawvideo frames) into ffmpeg, with backpressure"""
+    try:
+        async for chunk in chunks:
+            proc.stdin.write(chunk)
+            await proc.stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        # ffmpeg exited early; its return code tells the real story
+        pass
+    finally:
+        try:
+            proc.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+async def _communicate(
+    proc: asyncio.subprocess.Process,
+    duration: Optional[float],
+    on_progress: Optional[ProgressCallback],
+    stderr_tail: deque,
+    stdin_chunks: Optional[AsyncIterator[bytes]] = None,
+):
+    # Sample peak RSS at every progress block (~2x/s) while ffmpeg is alive;
+    # once it exits /proc no longer has it
+    peak_rss = 0
+
+    def sample_rss():
+        nonlocal peak_rss
+        peak_rss = max(peak_rss, metrics.process_peak_rss(proc.pid) or 0)
+
+    readers = [
+        _read_progress(proc.stdout, duration, on_progress, sample_rss),
+        _drain_stderr(proc.stderr, stderr_tail),
+    ]
+    if stdin_chunks is not None:
+        readers.append(_feed_stdin(proc, stdin_chunks))
+    await asyncio.gather(*readers)
+    await proc.wait()
+    if peak_rss:
+        metrics.ffmpeg_peak_rss.observe(peak_rss)
+
+
+async def run_ffmpeg(
+    args: List[str],
+    duration: Optional[float] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    stdin_chunks: Optional[AsyncIterator[bytes]] = None,
+):
+    """Run ffmpeg without blocking the event loop.
+
+    `args` are everything after the binary name. When `duration` (seconds of
+    output) is given, `on_progress` receives the completed fraction as ffmpeg
+    reports it. `stdin_chunks` is streamed to ffmpeg's stdin (use `pipe:0`
+    as an input). Cancelling the awaiting task kills the encoder.
+    """
+    cmd = [FFMPEG_BIN, "-hide_banner", "-nostats", "-progress", "pipe:1", *args]
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE if stdin_chunks is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise FFmpegError(f"{FFMPEG_BIN} not found on PATH")
+
+    _running.add(proc)
+    stderr_tail = deque(maxlen=20)
+    try:
+        await asyncio.wait_for(
+            _communicate(proc, duration, on_progress, stderr_tail, stdin_chunks),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        await _terminate(proc)
+        metrics.ffmpeg_runs.inc(result="timeout")
+        raise FFmpegError(f"ffmpeg timed out after {timeout}s", stderr="\n".join(stderr_tail))
+    except asyncio.CancelledError:
+        await _terminate(proc)
+        raise
+    finally:
+        _running.discard(proc)
+
+    metrics.ffmpeg_runs.inc(result="ok" if proc.returncode == 0 else "error")
+    if proc.returncode != 0:
+        stderr = "\n".join(stderr_tail)
+        raise FFmpegError(
+            f"ffmpeg exited with code {proc.returncode}: {stderr_tail[-1] if stderr_tail else ''}",
+            returncode=proc.returncode,
+            stderr=stderr,
+        )
+
+
+async def run_ffprobe(args: List[str], timeout: Optional[float] = 30) -> str:
+    """Run ffprobe and return its stdout"""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            FFPROBE_BIN, *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise FFmpegError(f"{FFPROBE_BIN} not found on PATH")
+
+    _running.add(proc)
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        await _terminate(proc)
+        raise FFmpegError(f"ffprobe timed out after {timeout}s")
+    except asyncio.CancelledError:
+        await _terminate(proc)
+        raise
+    finally:
+        _running.discard(proc)
+
+    if proc.returncode != 0:
+        raise FFmpegError(
+            f"ffprobe exited with code {proc.returncode}",
+            returncode=proc.returncode,
+            stderr=stderr.decode(errors="replace"),
+        )
+    return stdout.decode(errors="replace")
+
+
+async def kill_all():
+    """Terminate every encoder still running (called on shutdown)"""
+    procs = list(_running)
+    if procs:
+        print(f"🛑 Killing {len(procs)} running ffmpeg process(es)")
+    await asyncio.gather(*(_terminate(p) for p in procs), return_exceptions=True)
+    _running.clear()
+
+
+def running_count() -> int:
+    return len(_running)
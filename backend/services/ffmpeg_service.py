@@ -1,67 +1,188 @@
-import subprocess
 import os
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple
+
+from services.ffmpeg_runner import run_ffmpeg, run_ffprobe, FFmpegError, ProgressCallback
+
+# Floor for size-targeted renditions; below this h264 falls apart
+MIN_VIDEO_KBPS = 150
+
+
+@dataclass(frozen=True)
+class Rendition:
+    """One rung of the output ladder, sized by its short side"""
+    name: str
+    short_side: int
+    crf: Optional[int] = 23  # quality-targeted unless size_targeted
+    audio_bitrate: str = "128k"
+    size_targeted: bool = False
+
+    def frame_size(self, source: Tuple[int, int]) -> Tuple[int, int]:
+        width, height = source
+        scale = self.short_side / min(width, height)
+        return int(width * scale) // 2 * 2, int(height * scale) // 2 * 2
+
+    def video_args(self, duration: float, target_size_mb: float) -> List[str]:
+        args = ['-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p']
+        if not self.size_targeted:
+            return args + ['-crf', str(self.crf)]
+        # Budget the whole file, minus audio, across the duration (single
+        # pass ABR with a capped VBV so the size lands close to the target)
+        total_kbps = target_size_mb * 8 * 1024 / duration
+        video_kbps = max(MIN_VIDEO_KBPS, int(total_kbps - int(self.audio_bitrate.rstrip("k"))))
+        return args + [
+            '-b:v', f'{video_kbps}k', '-maxrate', f'{video_kbps}k',
+            '-bufsize', f'{video_kbps * 2}k'
+        ]
+
+
+MOBILE_RENDITION = Rendition("mobile", 480, crf=None, audio_bitrate="64k", size_targeted=True)
+RENDITION_LADDER = {
+    "1080p": Rendition("1080p", 1080, crf=21),
+    "720p": Rendition("720p", 720, crf=23),
+    "480p": Rendition("480p", 480, crf=25, audio_bitrate="96k"),
+    "mobile": MOBILE_RENDITION,
+}
+
+
+def fit_ladder(renditions: List[Rendition], source_size: Tuple[int, int]) -> List[Rendition]:
+    """The rungs worth encoding for a source: never larger than the source.
+
+    Rungs bigger than the source are dropped; if none fit, the smallest
+    requested rung is kept but encoded at the source's own size.
+    """
+    short_side = min(source_size)
+    ladder = [r for r in renditions if r.short_side <= short_side]
+    if not ladder and renditions:
+        smallest = min(renditions, key=lambda r: r.short_side)
+        ladder = [replace(smallest, short_side=short_side)]
+    return ladder
 
 class FFmpegService:
     @staticmethod
-    def check_ffmpeg():
+    async def check_ffmpeg():
         """Check if FFmpeg is available"""
         try:
-            subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
+            await run_ffmpeg(['-version'], timeout=10)
             return True
-        except:
+        except FFmpegError:
             return False
-    
+
     @staticmethod
-    def get_video_duration(video_path: str) -> float:
+    async def get_video_duration(video_path: str) -> float:
         """Get video duration in seconds"""
         try:
-            result = subprocess.run([
-                'ffprobe', '-v', 'error', '-show_entries',
+            output = await run_ffprobe([
+                '-v', 'error', '-show_entries',
                 'format=duration', '-of',
                 'default=noprint_wrappers=1:nokey=1', video_path
-            ], capture_output=True, text=True, check=True)
-            
-            return float(result.stdout.strip())
-        except:
+            ])
+            return float(output.strip())
+        except (FFmpegError, ValueError):
             return 0
-    
+
+    @staticmethod
+    async def get_video_size(video_path: str) -> Optional[Tuple[int, int]]:
+        """(width, height) of the first video stream"""
+        try:
+            output = await run_ffprobe([
+                '-v', 'error', '-select_streams', 'v:0',
+                '-show_entries', 'stream=width,height',
+                '-of', 'csv=s=x:p=0', video_path
+            ])
+            width, height = output.strip().split('x')
+            return int(width), int(height)
+        except (FFmpegError, ValueError):
+            return None
+
     @staticmethod
+    async def create_renditions(
+        input_path: str,
+        output_dir: str,
+        renditions: List["Rendition"],
+        target_size_mb: float = 10,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> List[dict]:
+        """Encode a rendition ladder from one decode of input_path.
 
-    def animate_single_image(image_path: str, output_path: str):
-    subprocess.run([
-        "ffmpeg", "-y",
+        The source is decoded once and fanned out with a split filter, one
+        scaled branch and one output file per rendition. Rungs bigger than
+        the source are skipped (see fit_ladder). Returns one report per file
+        written.
+        """
+        duration = await FFmpegService.get_video_duration(input_path)
+        source_size = await FFmpegService.get_video_size(input_path)
+        if not duration or not source_size:
+            raise FFmpegError(f"Cannot probe {input_path}")
+
+        ladder = fit_ladder(renditions, source_size)
+        os.makedirs(output_dir, exist_ok=True)
+
+        branches = [f"v{i}" for i in range(len(ladder))]
+        graph = [f"[0:v]split={len(ladder)}" + "".join(f"[{b}]" for b in branches)]
+        cmd = ['-y', '-i', input_path]
+        outputs = []
+        for i, rendition in enumerate(ladder):
+            size = rendition.frame_size(source_size)
+            graph.append(f"[v{i}]scale={size[0]}:{size[1]},setsar=1[o{i}]")
+            path = os.path.join(output_dir, f"{rendition.name}.mp4")
+            cmd += [
+                '-map', f'[o{i}]', '-map', '0:a?',
+                *rendition.video_args(duration, target_size_mb),
+                '-c:a', 'aac', '-b:a', rendition.audio_bitrate,
+                '-movflags', '+faststart',
+                path
+            ]
+            outputs.append((rendition, size, path))
+        cmd[3:3] = ['-filter_complex', ";".join(graph)]
+
+        await run_ffmpeg(cmd, duration=duration, on_progress=on_progress)
+
+        reports = []
+        for rendition, (width, height), path in outputs:
+            size_bytes = os.path.getsize(path)
+            reports.append({
+                "name": rendition.name,
+                "path": path,
+                "width": width,
+                "height": height,
+                "size_bytes": size_bytes,
+                "bitrate_kbps": round(size_bytes * 8 / duration / 1000),
+            })
+        return reports
+
+    @staticmethod
+    async def compress_video(input_path: str, output_path: str, target_size_mb: int = 10):
+        """Compress video to target size"""
+        output_dir = os.path.dirname(output_path) or "."
+        try:
+            reports = await FFmpegService.create_renditions(
+                input_path, output_dir, [MOBILE_RENDITION], target_size_mb=target_size_mb
+            )
+        except FFmpegError:
+            return False
+        os.replace(reports[0]["path"], output_path)
+        return True
+
+async def animate_single_image(
+    image_path: str,
+    output_path: str,
+    duration: float = 3,
+    on_progress: Optional[ProgressCallback] = None,
+    threads: Optional[int] = None
+):
+    """Render one still image as a slow zoom clip"""
+    frames = int(duration * 30)
+    thread_args = ["-threads", str(threads)] if threads else []
+    await run_ffmpeg([
+        "-y",
         "-loop", "1",
         "-i", image_path,
-        "-t", "3",
+        "-t", str(duration),
         "-vf",
-        "scale=1280:720,zoompan=z='zoom+0.002':x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':d=90",
+        f"scale=1280:720,zoompan=z='zoom+0.002':x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':d={frames}",
         "-r", "30",
         "-pix_fmt", "yuv420p",
+        *thread_args,
         output_path
-    ], check=True)
-    
-    def compress_video(input_path: str, output_path: str, target_size_mb: int = 10):
-        """Compress video to target size"""
-        # Get current duration
-        duration = FFmpegService.get_video_duration(input_path)
-        
-        if duration == 0:
-            return False
-        
-        # Calculate target bitrate
-        target_bitrate = (target_size_mb * 8192) / duration
-        
-        cmd = [
-            'ffmpeg', '-i', input_path,
-            '-c:v', 'libx265',
-            '-crf', '28',
-            '-c:a', 'aac',
-            '-b:a', '128k',
-            '-y', output_path
-        ]
-        
-        try:
-            subprocess.run(cmd, check=True, capture_output=True)
-            return True
-        except:
-            return False
+    ], duration=duration, on_progress=on_progress)
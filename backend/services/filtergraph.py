@@ -0,0 +1,76 @@
+from typing import List, Tuple
+
+# Transitions understood by ffmpeg's xfade filter that we expose
+TRANSITIONS = {"none", "fade", "fadeblack", "slideleft", "slideright", "wipeleft", "circleopen"}
+
+
+def motion_filter(
+    input_label: str,
+    output_label: str,
+    seconds: float,
+    size: Tuple[int, int],
+    fps: int,
+    zoom_step: float = 0.002,
+) -> str:
+    """Slow centre zoom over one still, emitting `seconds * fps` frames"""
+    width, height = size
+    frames = max(1, round(seconds * fps))
+    return (
+        f"[{input_label}]scale={width}:{height},"
+        f"zoompan=z='min(zoom+{zoom_step},1.5)':d={frames}"
+        f":x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)'"
+        f":s={width}x{height}:fps={fps},"
+        f"setsar=1,format=yuv420p[{output_label}]"
+    )
+
+
+def slideshow_duration(count: int, seconds_per_image: float, transition: str, transition_seconds: float) -> float:
+    """Length of the stitched video; each xfade overlaps two neighbours"""
+    if transition == "none" or count < 2:
+        return count * seconds_per_image
+    transition_seconds = min(transition_seconds, seconds_per_image / 2)
+    return count * seconds_per_image - (count - 1) * transition_seconds
+
+
+def build_slideshow_graph(
+    count: int,
+    seconds_per_image: float = 3,
+    size: Tuple[int, int] = (1280, 720),
+    fps: int = 30,
+    transition: str = "fade",
+    transition_seconds: float = 0.5,
+) -> Tuple[str, str]:
+    """filter_complex for `count` still inputs (0..count-1) → one video stream.
+
+    Returns the graph and the label of its final video output.
+    """
+    if count < 1:
+        raise ValueError("Need at least one image")
+    if transition not in TRANSITIONS:
+        raise ValueError(f"Unknown transition: {transition}")
+    # A transition can't be longer than the clips it joins
+    transition_seconds = min(transition_seconds, seconds_per_image / 2)
+
+    parts: List[str] = [
+        motion_filter(f"{i}:v", f"m{i}", seconds_per_image, size, fps)
+        for i in range(count)
+    ]
+
+    if count == 1:
+        return ";".join(parts), "m0"
+
+    if transition == "none":
+        inputs = "".join(f"[m{i}]" for i in range(count))
+        parts.append(f"{inputs}concat=n={count}:v=1:a=0[vout]")
+        return ";".join(parts), "vout"
+
+    previous = "m0"
+    step = seconds_per_image - transition_seconds
+    for i in range(1, count):
+        label = "vout" if i == count - 1 else f"x{i}"
+        parts.append(
+            f"[{previous}][m{i}]xfade=transition={transition}"
+            f":duration={transition_seconds}:offset={i * step:.3f}[{label}]"
+        )
+        previous = label
+    return ";".join(parts), "vout"
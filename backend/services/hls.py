@@ -0,0 +1,79 @@
+import os
+from typing import List, Tuple
+
+SEGMENT_SECONDS = 2
+# Must not change while an EVENT playlist grows, so leave headroom for
+# segments that overrun a little at the keyframe
+TARGET_DURATION = SEGMENT_SECONDS + 1
+
+
+class ProgressivePlaylist:
+    """One HLS event playlist stitched from per-scene encoder playlists.
+
+    Every scene encoder tees its output into its own `scene_N.m3u8` +
+    `sN_XXX.ts` files as it runs. `refresh()` merges whatever has landed
+    into `index.m3u8`. Scene N is added only after scenes 0..N-1 are
+    complete, with a discontinuity tag because each scene's timestamps
+    restart at zero. Players can start as soon as the first segment exists.
+    """
+
+    def __init__(self, directory: str, scene_count: int):
+        self.directory = directory
+        self.scene_count = scene_count
+        self.index_path = os.path.join(directory, "index.m3u8")
+        self._finished = set()
+        os.makedirs(directory, exist_ok=True)
+
+    # ----- per-scene encoder outputs -----
+    def scene_playlist(self, index: int) -> str:
+        return os.path.join(self.directory, f"scene_{index}.m3u8")
+
+    def segment_pattern(self, index: int) -> str:
+        return os.path.join(self.directory, f"s{index}_%03d.ts")
+
+    def mark_finished(self, index: int):
+        self._finished.add(index)
+
+    # ----- merged playlist -----
+    def _read_scene(self, index: int) -> List[Tuple[float, str]]:
+        try:
+            with open(self.scene_playlist(index)) as f:
+                lines = [line.strip() for line in f]
+        except OSError:
+            return []
+        segments = []
+        for i, line in enumerate(lines):
+            if line.startswith("#EXTINF:") and i + 1 < len(lines):
+                segments.append((float(line[8:].rstrip(",")), lines[i + 1]))
+        return segments
+
+    def refresh(self, ended: bool = False) -> int:
+        """Rewrite index.m3u8 from the scene playlists; returns segment count"""
+        entries: List[str] = []
+        count = 0
+        for index in range(self.scene_count):
+            segments = self._read_scene(index)
+            if segments and index > 0:
+                entries.append("#EXT-X-DISCONTINUITY")
+            for seconds, name in segments:
+                entries += [f"#EXTINF:{seconds:.3f},", name]
+                count += 1
+            if index not in self._finished:
+                break
+
+        header = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{TARGET_DURATION}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+        ]
+        footer = ["#EXT-X-ENDLIST"] if ended else []
+        if count == 0 and not ended:
+            return 0
+
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(header + entries + footer) + "\n")
+        os.replace(tmp_path, self.index_path)
+        return count
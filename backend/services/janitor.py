@@ -0,0 +1,189 @@
+import asyncio
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Nothing younger than this is evicted, however full the disk is
+GRACE_SECONDS = int(os.getenv("JANITOR_GRACE_SECONDS", "600"))
+INTERVAL_SECONDS = int(os.getenv("JANITOR_INTERVAL_SECONDS", "300"))
+
+
+@dataclass
+class StorageArea:
+    """A directory the janitor owns, with its own TTL and size budget"""
+    name: str
+    path: str
+    ttl: float
+    max_bytes: int
+    # Top-level entries the janitor must never remove
+    keep: Tuple[str, ...] = ()
+
+
+@dataclass
+class Artifact:
+    """Top-level entries sharing a stem (video_x.mp4 + video_x/ are one artifact)"""
+    key: str
+    paths: List[str] = field(default_factory=list)
+    size: int = 0
+    last_access: float = 0
+
+
+def artifact_key(name: str) -> str:
+    return name.split(".", 1)[0]
+
+
+def entry_size(path: str) -> int:
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class StorageJanitor:
+    """Background TTL + LRU size-budget cleanup for output/ and temp/.
+
+    The index lives in memory, ordered by last access; the request path only
+    calls `touch()`. Directory scans and deletions happen in `run()`, off the
+    event loop, every `interval` seconds.
+    """
+
+    def __init__(
+        self,
+        areas: List[StorageArea],
+        interval: int = INTERVAL_SECONDS,
+        grace: int = GRACE_SECONDS,
+        is_busy: Optional[Callable[[str, str], bool]] = None,
+        on_evict: Optional[Callable[[str, str], None]] = None,
+    ):
+        self.areas = {area.name: area for area in areas}
+        self.interval = interval
+        self.grace = grace
+        self.is_busy = is_busy
+        self.on_evict = on_evict
+        self._index: Dict[str, "OrderedDict[str, Artifact]"] = {name: OrderedDict() for name in self.areas}
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.evicted_bytes = 0
+
+    # ----- request path (memory only) -----
+    def touch(self, area: str, key: str):
+        """Record an access so the artifact is evicted last"""
+        with self._lock:
+            artifact = self._index[area].get(key)
+            if artifact:
+                artifact.last_access = time.time()
+                self._index[area].move_to_end(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    "artifacts": len(index),
+                    "bytes": sum(a.size for a in index.values()),
+                    "max_bytes": self.areas[name].max_bytes,
+                }
+                for name, index in self._index.items()
+            }
+
+    # ----- background work (blocking; run in a thread) -----
+    def scan(self):
+        """Rebuild the index from disk, keeping access times we already know"""
+        for name, area in self.areas.items():
+            found: Dict[str, Artifact] = {}
+            try:
+                entries = list(os.scandir(area.path))
+            except FileNotFoundError:
+                entries = []
+            for entry in entries:
+                key = artifact_key(entry.name)
+                if key in area.keep:
+                    continue
+                try:
+                    size = entry_size(entry.path)
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue  # removed while we were looking
+                artifact = found.setdefault(key, Artifact(key))
+                artifact.paths.append(entry.path)
+                artifact.size += size
+                artifact.last_access = max(artifact.last_access, mtime)
+
+            with self._lock:
+                previous = self._index[name]
+                for key, artifact in found.items():
+                    if key in previous:
+                        artifact.last_access = max(artifact.last_access, previous[key].last_access)
+                ordered = sorted(found.values(), key=lambda a: a.last_access)
+                self._index[name] = OrderedDict((a.key, a) for a in ordered)
+
+    def _victims(self, name: str, now: float) -> List[Artifact]:
+        area = self.areas[name]
+        with self._lock:
+            index = self._index[name]
+            total = sum(a.size for a in index.values())
+            victims = []
+            # Oldest access first: expired ones, then whatever is needed to fit the budget
+            for artifact in index.values():
+                if artifact.last_access > now - self.grace:
+                    break
+                expired = artifact.last_access < now - area.ttl
+                if not expired and total <= area.max_bytes:
+                    break
+                if self.is_busy and self.is_busy(name, artifact.key):
+                    continue
+                victims.append(artifact)
+                total -= artifact.size
+            for artifact in victims:
+                del index[artifact.key]
+            return victims
+
+    def collect(self, now: Optional[float] = None) -> List[Tuple[str, Artifact]]:
+        """Delete expired and over-budget artifacts; returns what was removed"""
+        now = now or time.time()
+        removed = []
+        for name in self.areas:
+            for artifact in self._victims(name, now):
+                for path in artifact.paths:
+                    try:
+                        if os.path.isdir(path):
+                            shutil.rmtree(path)
+                        else:
+                            os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        print(f"⚠️  Janitor could not remove {path}: {e}")
+                self.evicted += 1
+                self.evicted_bytes += artifact.size
+                removed.append((name, artifact))
+        return removed
+
+    def run_once(self) -> List[Tuple[str, Artifact]]:
+        self.scan()
+        return self.collect()
+
+    async def run(self):
+        """Scan + collect forever; on_evict callbacks run on the event loop"""
+        while True:
+            try:
+                removed = await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                print(f"⚠️  Janitor pass failed: {e}")
+                removed = []
+            for name, artifact in removed:
+                if self.on_evict:
+                    self.on_evict(name, artifact.key)
+            if removed:
+                freed = sum(a.size for _, a in removed) / (1024 * 1024)
+                print(f"🧹 Janitor removed {len(removed)} artifact(s), {freed:.1f} MB")
+            await asyncio.sleep(self.interval)
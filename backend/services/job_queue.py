@@ -0,0 +1,348 @@
+import json
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from services.render_queue import PRIORITIES, QueueFullError
+from services.task_store import connect_sqlite
+
+# A worker that misses heartbeats for this long loses its jobs
+LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+# Jobs whose worker died this many times are failed instead of re-queued
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+
+@dataclass
+class Job:
+    task_id: str
+    payload: dict
+    priority: str
+    attempts: int
+
+
+class JobQueue:
+    """Render jobs shared between API processes and standalone workers.
+
+    Workers lease jobs for a limited time and keep the lease alive with
+    heartbeats; jobs whose lease runs out are handed to another worker.
+    """
+
+    def enqueue(self, task_id: str, payload: dict, priority: str = "normal", estimate: Optional[float] = None):
+        """Queue a job; `estimate` is its predicted render seconds (see services/render_cost.py)"""
+        raise NotImplementedError
+
+    def lease(self, worker_id: str, seconds: float = LEASE_SECONDS) -> Optional[Job]:
+        """Claim the most urgent queued job, or None if there is none"""
+        raise NotImplementedError
+
+    def heartbeat(self, task_id: str, worker_id: str, seconds: float = LEASE_SECONDS) -> str:
+        """Extend a lease: "ok", "cancelled" (stop the job) or "lost" (someone else has it)"""
+        raise NotImplementedError
+
+    def complete(self, task_id: str, worker_id: str):
+        raise NotImplementedError
+
+    def release(self, task_id: str, worker_id: str):
+        """Give a job back unfinished (worker shutting down); not counted as an attempt"""
+        raise NotImplementedError
+
+    def cancel(self, task_id: str) -> bool:
+        """Drop a queued job or ask its worker to stop; False if unknown"""
+        raise NotImplementedError
+
+    def requeue_expired(self) -> Tuple[List[str], List[str]]:
+        """Re-queue jobs of dead workers; returns (requeued, failed) task ids"""
+        raise NotImplementedError
+
+    def position(self, task_id: str) -> Optional[int]:
+        raise NotImplementedError
+
+    def counts(self) -> Tuple[int, int]:
+        """(queued, leased) job counts"""
+        raise NotImplementedError
+
+    def work_ahead(self, task_id: Optional[str] = None, default_seconds: float = 30) -> Optional[float]:
+        """Predicted seconds of work before a queued job can start: the estimates
+        queued ahead of it plus what is left of leased jobs. Without task_id,
+        all queued and leased work; None if task_id is not queued."""
+        raise NotImplementedError
+
+    def register_worker(self, worker_id: str, slots: int):
+        """Announce (or refresh) a live worker and how many jobs it runs at once"""
+        raise NotImplementedError
+
+    def unregister_worker(self, worker_id: str):
+        raise NotImplementedError
+
+    def live_slots(self, max_age: float = LEASE_SECONDS) -> int:
+        """Render slots of workers seen within max_age seconds"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteJobQueue(JobQueue):
+    """Embedded queue for workers on one host (or a shared filesystem with working locks)"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id            INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id       TEXT NOT NULL UNIQUE,
+            rank          INTEGER NOT NULL,
+            priority      TEXT NOT NULL,
+            payload       TEXT NOT NULL,
+            state         TEXT NOT NULL,
+            worker        TEXT,
+            lease_expires REAL,
+            attempts      INTEGER NOT NULL DEFAULT 0,
+            estimate      REAL,
+            leased_at     REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_next ON jobs (state, rank, id);
+        CREATE TABLE IF NOT EXISTS workers (
+            worker_id TEXT PRIMARY KEY,
+            slots     INTEGER NOT NULL,
+            last_seen REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = connect_sqlite(path, self.SCHEMA)
+        # Queues created before jobs carried their cost estimate
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column in ("estimate", "leased_at"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} REAL")
+
+    def _transaction(self, fn):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn()
+            self._conn.execute("COMMIT")
+            return result
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, task_id: str, payload: dict, priority: str = "normal", estimate: Optional[float] = None):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO jobs (task_id, rank, priority, payload, state, estimate) "
+            "VALUES (?, ?, ?, ?, 'queued', ?)",
+            (task_id, PRIORITIES.get(priority, PRIORITIES["normal"]), priority, json.dumps(payload), estimate),
+        )
+
+    def lease(self, worker_id: str, seconds: float = LEASE_SECONDS) -> Optional[Job]:
+        def claim():
+            row = self._conn.execute(
+                "SELECT task_id, payload, priority, attempts FROM jobs WHERE state = 'queued' "
+                "ORDER BY rank, id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET state = 'leased', worker = ?, lease_expires = ?, leased_at = ?, "
+                "attempts = attempts + 1 WHERE task_id = ?",
+                (worker_id, time.time() + seconds, time.time(), row[0]),
+            )
+            return Job(row[0], json.loads(row[1]), row[2], row[3] + 1)
+        return self._transaction(claim)
+
+    def heartbeat(self, task_id: str, worker_id: str, seconds: float = LEASE_SECONDS) -> str:
+        cursor = self._conn.execute(
+            "UPDATE jobs SET lease_expires = ? WHERE task_id = ? AND worker = ? AND state = 'leased'",
+            (time.time() + seconds, task_id, worker_id),
+        )
+        if cursor.rowcount:
+            return "ok"
+        row = self._conn.execute(
+            "SELECT state FROM jobs WHERE task_id = ? AND worker = ?", (task_id, worker_id)
+        ).fetchone()
+        return "cancelled" if row and row[0] == "cancelling" else "lost"
+
+    def complete(self, task_id: str, worker_id: str):
+        self._conn.execute("DELETE FROM jobs WHERE task_id = ? AND worker = ?", (task_id, worker_id))
+
+    def release(self, task_id: str, worker_id: str):
+        self._conn.execute(
+            "UPDATE jobs SET state = 'queued', worker = NULL, lease_expires = NULL, leased_at = NULL, "
+            "attempts = MAX(attempts - 1, 0) WHERE task_id = ? AND worker = ? AND state = 'leased'",
+            (task_id, worker_id),
+        )
+
+    def cancel(self, task_id: str) -> bool:
+        def mark():
+            row = self._conn.execute("SELECT state FROM jobs WHERE task_id = ?", (task_id,)).fetchone()
+            if row is None:
+                return False
+            if row[0] == "queued":
+                self._conn.execute("DELETE FROM jobs WHERE task_id = ?", (task_id,))
+            else:
+                self._conn.execute("UPDATE jobs SET state = 'cancelling' WHERE task_id = ?", (task_id,))
+            return True
+        return self._transaction(mark)
+
+    def requeue_expired(self) -> Tuple[List[str], List[str]]:
+        def sweep():
+            requeued, failed = [], []
+            rows = self._conn.execute(
+                "SELECT task_id, state, attempts FROM jobs WHERE state != 'queued' AND lease_expires < ?",
+                (time.time(),),
+            ).fetchall()
+            for task_id, state, attempts in rows:
+                if state == "cancelling" or attempts >= MAX_ATTEMPTS:
+                    self._conn.execute("DELETE FROM jobs WHERE task_id = ?", (task_id,))
+                    if state != "cancelling":
+                        failed.append(task_id)
+                else:
+                    self._conn.execute(
+                        "UPDATE jobs SET state = 'queued', worker = NULL, lease_expires = NULL, leased_at = NULL "
+                        "WHERE task_id = ?",
+                        (task_id,),
+                    )
+                    requeued.append(task_id)
+            # Forget workers that have been gone for a while
+            self._conn.execute("DELETE FROM workers WHERE last_seen < ?", (time.time() - 10 * LEASE_SECONDS,))
+            return requeued, failed
+        return self._transaction(sweep)
+
+    def position(self, task_id: str) -> Optional[int]:
+        row = self._conn.execute(
+            "SELECT rank, id FROM jobs WHERE task_id = ? AND state = 'queued'", (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        ahead = self._conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE state = 'queued' AND (rank < ? OR (rank = ? AND id < ?))",
+            (row[0], row[0], row[1]),
+        ).fetchone()[0]
+        return ahead + 1
+
+    def counts(self) -> Tuple[int, int]:
+        rows = dict(self._conn.execute(
+            "SELECT state = 'queued', COUNT(*) FROM jobs GROUP BY state = 'queued'"
+        ).fetchall())
+        return rows.get(1, 0), rows.get(0, 0)
+
+    def work_ahead(self, task_id: Optional[str] = None, default_seconds: float = 30) -> Optional[float]:
+        now = time.time()
+        if task_id is None:
+            ahead = "state = 'queued'", ()
+        else:
+            row = self._conn.execute(
+                "SELECT rank, id FROM jobs WHERE task_id = ? AND state = 'queued'", (task_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            ahead = "state = 'queued' AND (rank < ? OR (rank = ? AND id < ?))", (row[0], row[0], row[1])
+        queued = self._conn.execute(
+            f"SELECT COALESCE(SUM(COALESCE(estimate, ?)), 0) FROM jobs WHERE {ahead[0]}",
+            (default_seconds, *ahead[1]),
+        ).fetchone()[0]
+        running = self._conn.execute(
+            "SELECT COALESCE(SUM(MAX(0, COALESCE(estimate, ?) - (? - COALESCE(leased_at, ?)))), 0) "
+            "FROM jobs WHERE state != 'queued'",
+            (default_seconds, now, now),
+        ).fetchone()[0]
+        return queued + running
+
+    def register_worker(self, worker_id: str, slots: int):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO workers (worker_id, slots, last_seen) VALUES (?, ?, ?)",
+            (worker_id, slots, time.time()),
+        )
+
+    def unregister_worker(self, worker_id: str):
+        self._conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def live_slots(self, max_age: float = LEASE_SECONDS) -> int:
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(slots), 0) FROM workers WHERE last_seen >= ?", (time.time() - max_age,)
+        ).fetchone()
+        return row[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def create_job_queue() -> Optional[JobQueue]:
+    """JOB_QUEUE=local (default: render inside the API process) or sqlite"""
+    backend = os.getenv("JOB_QUEUE", "local")
+    if backend == "local":
+        return None
+    if backend == "sqlite":
+        return SQLiteJobQueue(os.getenv("JOB_DB_PATH", "data/jobs.db"))
+    raise ValueError(f"Unknown JOB_QUEUE backend: {backend}")
+
+
+class QueueDispatcher:
+    """Stands in for RenderScheduler in an API process whose renders run on
+    standalone workers (see worker.py): admission and queue introspection go
+    to the shared job queue instead of an in-process pool."""
+
+    def __init__(self, queue: JobQueue, max_queue: Optional[int] = None):
+        self.queue = queue
+        self._max_queue = max_queue or int(os.getenv("RENDER_QUEUE_LIMIT", "0") or 0)
+        self.avg_render_seconds = float(os.getenv("RENDER_AVG_SECONDS", "30"))
+
+    def start(self):
+        print(f"🎛️  Dispatching renders to workers via {type(self.queue).__name__}")
+
+    async def stop(self):
+        pass
+
+    @property
+    def workers(self) -> int:
+        return self.queue.live_slots()
+
+    @property
+    def max_queue(self) -> int:
+        return self._max_queue or max(1, self.workers) * 10
+
+    def submit(self, task_id: str, request, priority: str = "normal", cost=None):
+        """Queue a render job or raise QueueFullError.
+
+        The estimated seconds ride along on the job for queue waits; workers
+        re-estimate cores and memory against their own budget."""
+        if self.queue_depth >= self.max_queue:
+            raise QueueFullError(self.retry_after())
+        self.queue.enqueue(task_id, request.dict(), priority, estimate=cost.seconds if cost else None)
+
+    @property
+    def parallelism(self) -> int:
+        return max(1, self.workers)
+
+    def backlog_seconds(self) -> float:
+        return self.queue.work_ahead(default_seconds=self.avg_render_seconds)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue drains by one job at its predicted rate"""
+        drain = self.backlog_seconds() / self.parallelism
+        return max(1, math.ceil(drain / max(1, self.queue_depth)))
+
+    def position(self, task_id: str) -> Optional[int]:
+        return self.queue.position(task_id)
+
+    def estimated_wait(self, task_id: str) -> Optional[int]:
+        """Seconds until a queued job starts: the estimates ahead of it spread over live worker slots"""
+        work = self.queue.work_ahead(task_id, default_seconds=self.avg_render_seconds)
+        if work is None:
+            return None
+        return math.ceil(work / self.parallelism)
+
+    def remaining(self, task_id: str) -> Optional[int]:
+        return None  # only the worker knows; status_payload falls back to the task record
+
+    def cancel(self, task_id: str) -> bool:
+        return self.queue.cancel(task_id)
+
+    @property
+    def queue_depth(self) -> int:
+        return self.queue.counts()[0]
+
+    @property
+    def active_count(self) -> int:
+        return self.queue.counts()[1]
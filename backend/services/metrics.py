@@ -0,0 +1,227 @@
+import bisect
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Prometheus text exposition format, hand-rolled so the API has no extra
+# dependency. Metrics are per process; scrape each uvicorn worker.
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+BYTES_BUCKETS = tuple(2 ** n for n in range(16, 32, 2))  # 64 KiB .. 1 GiB
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(header + self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Metric):
+    """A value read from a callback at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation)
+        self.function = function
+
+    def set_function(self, function: Callable[[], float]):
+        self.function = function
+
+    def samples(self) -> List[str]:
+        if self.function is None:
+            return []
+        return [f"{self.name} {_format_value(self.function())}"]
+
+
+class CallbackCounter(Gauge):
+    """A monotonic total owned by someone else (e.g. the kernel), read at scrape time"""
+    kind = "counter"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = SECONDS_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: (bucket counts, sum, count)
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, inf)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+def _children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+# ========== RENDER METRICS ==========
+registry = MetricsRegistry()
+
+stage_seconds = registry.register(Histogram(
+    "render_stage_seconds", "Time spent in each pipeline stage", ("stage",)))
+task_seconds = registry.register(Histogram(
+    "render_task_seconds", "End-to-end render time per task", ("profile",)))
+stage_failures = registry.register(Counter(
+    "render_failures_total", "Failed renders by the stage that failed", ("stage",)))
+tasks_finished = registry.register(Counter(
+    "render_tasks_total", "Finished renders by outcome", ("status",)))
+cache_requests = registry.register(Counter(
+    "cache_requests_total", "Cache lookups by cache and result", ("cache", "result")))
+output_bytes = registry.register(Histogram(
+    "render_output_bytes", "Size of produced videos", ("kind",), buckets=BYTES_BUCKETS))
+ffmpeg_runs = registry.register(Counter(
+    "ffmpeg_runs_total", "ffmpeg invocations by result", ("result",)))
+ffmpeg_peak_rss = registry.register(Histogram(
+    "ffmpeg_peak_rss_bytes", "Peak resident memory of each ffmpeg process", buckets=BYTES_BUCKETS))
+ffmpeg_cpu = registry.register(CallbackCounter(
+    "ffmpeg_cpu_seconds_total", "CPU time (user+system) of reaped child processes",
+    _children_cpu_seconds))
+queue_depth = registry.register(Gauge("render_queue_depth", "Renders waiting for a worker"))
+active_tasks = registry.register(Gauge("render_active_tasks", "Renders in progress"))
+running_encoders = registry.register(Gauge("ffmpeg_running_processes", "Live ffmpeg processes"))
+budget_cores = registry.register(Gauge("render_budget_cores_in_use", "CPU cores reserved by admitted renders"))
+budget_memory = registry.register(Gauge("render_budget_memory_bytes_in_use", "Memory reserved by admitted renders"))
+
+
+def process_peak_rss(pid: int) -> Optional[int]:
+    """VmHWM of a live process in bytes (Linux only; None elsewhere)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class StageTimer:
+    """Per-task stage timings, also fed into the stage histogram.
+
+    Pipeline stages overlap, so the per-stage totals are busy time and can
+    add up to more than the wall-clock `total`.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.failed_stage: Optional[str] = None
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            # First failure wins; what follows is usually fallout from it
+            if self.failed_stage is None:
+                self.failed_stage = stage
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[stage] = self.stages.get(stage, 0) + elapsed
+            stage_seconds.observe(elapsed, stage=stage)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, float]:
+        timings = {stage: round(seconds, 3) for stage, seconds in self.stages.items()}
+        timings["total"] = round(self.elapsed(), 3)
+        return timings
+
@@ -0,0 +1,122 @@
+import asyncio
+from typing import AsyncIterator, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+try:
+    import cv2
+except ImportError:  # optional: PIL fallback is slower but equivalent
+    cv2 = None
+
+# Shared by both engines so they produce the same camera move. Zoom is a
+# function of time, so a 15 fps draft previews the same motion as a 30 fps final
+ZOOM_PER_SECOND = 0.024
+ZOOM_MAX = 1.3
+
+MOTION_ENGINES = {"zoompan", "crop"}
+
+Box = Tuple[float, float, float, float]
+
+
+def zoom_at(frame: int, fps: int) -> float:
+    return min(1 + ZOOM_PER_SECOND * frame / fps, ZOOM_MAX)
+
+
+def zoompan_filter(size: Tuple[int, int], fps: int) -> str:
+    """ffmpeg zoompan equivalent of ken_burns_windows (single-threaded, slow)"""
+    width, height = size
+    return (
+        f"zoompan=z='min(1+{ZOOM_PER_SECOND}*on/{fps},{ZOOM_MAX})':d=1"
+        f":x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)'"
+        f":s={width}x{height}:fps={fps}"
+    )
+
+
+def ken_burns_windows(
+    source_size: Tuple[int, int],
+    output_size: Tuple[int, int],
+    frames: int,
+    fps: int,
+) -> List[Box]:
+    """Centre-zoom crop boxes for every frame, computed up front.
+
+    Boxes keep the output aspect ratio and use fractional coordinates, so the
+    motion is smooth instead of snapping to whole source pixels.
+    """
+    src_w, src_h = source_size
+    out_w, out_h = output_size
+    # Largest output-shaped window that fits the source
+    base_w = min(src_w, src_h * out_w / out_h)
+    base_h = base_w * out_h / out_w
+    boxes = []
+    for frame in range(frames):
+        zoom = zoom_at(frame, fps)
+        w, h = base_w / zoom, base_h / zoom
+        x, y = (src_w - w) / 2, (src_h - h) / 2
+        boxes.append((x, y, x + w, y + h))
+    return boxes
+
+
+def _even_box(box: Box, source_size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """Snap a crop box to even pixels so the 4:2:0 chroma planes line up"""
+    src_w, src_h = source_size
+    x0, y0, x1, y1 = box
+    x0, y0 = int(x0) & ~1, int(y0) & ~1
+    x1 = min(src_w, (int(x1 + 1) + 1) & ~1)
+    y1 = min(src_h, (int(y1 + 1) + 1) & ~1)
+    return x0, y0, x1, y1
+
+
+def frame_pix_fmt() -> str:
+    """Raw pixel format crop_frames produces"""
+    return "yuv420p" if cv2 is not None else "rgb24"
+
+
+async def crop_frames(
+    image_path: str,
+    output_size: Tuple[int, int],
+    frames: int,
+    fps: int,
+) -> AsyncIterator[bytes]:
+    """Yield raw frames (see frame_pix_fmt) for ffmpeg's rawvideo input.
+
+    With OpenCV the source is converted to planar YUV 4:2:0 once, and every
+    frame is a crop+resize of each plane. That is half the bytes of RGB, and
+    the encoder gets frames it can use without a colour conversion. Without
+    OpenCV, PIL's subpixel crop+resize produces rgb24. Frames are rendered in
+    a worker thread, one frame ahead of the encoder.
+    """
+    source = Image.open(image_path).convert("RGB")
+    # 4:2:0 needs even dimensions
+    source = source.crop((0, 0, source.width & ~1, source.height & ~1))
+    boxes = ken_burns_windows(source.size, output_size, frames, fps)
+    out_w, out_h = output_size
+
+    if cv2 is not None:
+        src_w, src_h = source.size
+        yuv = cv2.cvtColor(np.asarray(source), cv2.COLOR_RGB2YUV_I420)
+        luma = yuv[:src_h]
+        chroma_rows = src_h // 4
+        cb = yuv[src_h:src_h + chroma_rows].reshape(src_h // 2, src_w // 2)
+        cr = yuv[src_h + chroma_rows:].reshape(src_h // 2, src_w // 2)
+
+        def render(box: Box) -> bytes:
+            x0, y0, x1, y1 = _even_box(box, source.size)
+            y = cv2.resize(luma[y0:y1, x0:x1], (out_w, out_h), interpolation=cv2.INTER_LINEAR)
+            u = cv2.resize(cb[y0 // 2:y1 // 2, x0 // 2:x1 // 2], (out_w // 2, out_h // 2),
+                           interpolation=cv2.INTER_LINEAR)
+            v = cv2.resize(cr[y0 // 2:y1 // 2, x0 // 2:x1 // 2], (out_w // 2, out_h // 2),
+                           interpolation=cv2.INTER_LINEAR)
+            return b"".join((y.tobytes(), u.tobytes(), v.tobytes()))
+    else:
+        def render(box: Box) -> bytes:
+            return source.resize(output_size, Image.BILINEAR, box=box).tobytes()
+
+    # Render frame N+1 while ffmpeg consumes frame N
+    pending = asyncio.ensure_future(asyncio.to_thread(render, boxes[0])) if boxes else None
+    for i in range(len(boxes)):
+        frame = await pending
+        if i + 1 < len(boxes):
+            pending = asyncio.ensure_future(asyncio.to_thread(render, boxes[i + 1]))
+        yield frame
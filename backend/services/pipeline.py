@@ -0,0 +1,291 @@
+import asyncio
+import contextlib
+import os
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from services.cpu_budget import cpu_budget
+from services.hls import ProgressivePlaylist
+from services.profiles import EncodingProfile, DEFAULT_PROFILE
+from services.metrics import StageTimer
+from services.scene_cache import SceneCache
+
+# Sentences shorter than this are merged into the next scene
+MIN_SCENE_CHARS = 25
+STAGE_QUEUE_SIZE = 2
+# Scenes encoded at once per render; above 1 each encoder gets its share of
+# the process-wide CPU budget instead of every ffmpeg using all cores
+SCENE_ENCODERS = max(1, int(os.getenv("SCENE_ENCODERS", "1")))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def split_scenes(script: str, min_chars: int = MIN_SCENE_CHARS) -> List[str]:
+    """Split a script into sentence-level scenes, merging very short ones"""
+    sentences = [s.strip() for s in _SENTENCE_END.split(script.strip()) if s.strip()]
+    scenes: List[str] = []
+    carry = ""
+    for sentence in sentences:
+        carry = f"{carry} {sentence}".strip()
+        if len(carry) >= min_chars:
+            scenes.append(carry)
+            carry = ""
+    if carry:
+        if scenes:
+            scenes[-1] = f"{scenes[-1]} {carry}"
+        else:
+            scenes.append(carry)
+    return scenes
+
+
+@dataclass
+class Scene:
+    index: int
+    text: str
+    audio_path: Optional[str] = None
+    image_path: Optional[str] = None
+    segment_path: Optional[str] = None
+    segment_key: Optional[str] = None
+    reused: bool = False  # segment came from the scene cache
+
+
+@dataclass
+class PipelineSettings:
+    voice: str = "male"
+    style: str = "cinematic"
+    motion: str = "crop"
+    size: tuple = (1080, 1920)
+    fps: int = 30
+    profile: EncodingProfile = DEFAULT_PROFILE
+    encoders: int = SCENE_ENCODERS
+
+
+class ScenePipeline:
+    """TTS → image → encode as overlapping stages joined by bounded queues.
+
+    While scene N-1 encodes, scene N's image is composed and scene N+1's
+    narration is synthesized, so a long script takes roughly as long as its
+    slowest stage rather than the sum of all of them.
+
+    With a scene cache, scenes whose inputs are unchanged since an earlier
+    render skip all three stages and reuse their encoded segment. With
+    settings.encoders > 1, that many scenes encode concurrently.
+    """
+
+    def __init__(
+        self,
+        video_service,
+        settings: PipelineSettings,
+        on_progress: Optional[Callable[[float, str], None]] = None,
+        playlist_dir: Optional[str] = None,
+        on_playlist: Optional[Callable[[str], None]] = None,
+        timer: Optional[StageTimer] = None,
+        scene_cache: Optional[SceneCache] = None,
+    ):
+        self.video_service = video_service
+        self.timer = timer or StageTimer()
+        self.settings = settings
+        self.on_progress = on_progress
+        # When set, scenes are also published as a growing HLS playlist there
+        self.playlist_dir = playlist_dir
+        self.on_playlist = on_playlist
+        self.scene_cache = scene_cache
+        self.reused = 0
+        self.playlist: Optional[ProgressivePlaylist] = None
+        self._playlist_announced = False
+
+    def _report(self, fraction: float, message: str):
+        if self.on_progress:
+            self.on_progress(fraction, message)
+
+    def _publish(self, ended: bool = False):
+        """Refresh the merged playlist and announce it once it is playable"""
+        if self.playlist is None:
+            return
+        if self.playlist.refresh(ended=ended) and not self._playlist_announced:
+            self._playlist_announced = True
+            if self.on_playlist:
+                self.on_playlist(self.playlist.index_path)
+
+    async def _voice(self, scene: Scene) -> str:
+        with self.timer.span("tts"):
+            return await self.video_service.generate_simple_voice(
+                text=scene.text,
+                voice_type=self.settings.voice
+            )
+
+    async def _voice_stage(self, scenes: List[Scene], out: asyncio.Queue):
+        # Start every scene's TTS at once (the provider limit in services/tts.py
+        # bounds real concurrency) and hand them downstream in order
+        pending = [None if scene.reused else asyncio.ensure_future(self._voice(scene)) for scene in scenes]
+        try:
+            for scene, audio in zip(scenes, pending):
+                if audio:
+                    scene.audio_path = await audio
+                await out.put(scene)
+        finally:
+            for audio in pending:
+                if audio:
+                    audio.cancel()
+        await out.put(None)
+
+    async def _image_stage(self, inbox: asyncio.Queue, out: asyncio.Queue):
+        while True:
+            scene = await inbox.get()
+            if scene is None:
+                break
+            if not scene.reused:
+                with self.timer.span("image"):
+                    scene.image_path = await self._image(scene)
+            await out.put(scene)
+        await out.put(None)
+
+    async def _image(self, scene: Scene) -> str:
+        if self.scene_cache:
+            key = self.scene_cache.image_key(scene.text, self.settings)
+            cached = self.scene_cache.fetch(key, f"{self.video_service.temp_dir}/scene_{scene.index}.jpg")
+            if cached:
+                return cached
+        image_path = await self.video_service.create_placeholder_image(
+            prompt=scene.text,
+            filename=f"scene_{scene.index}",
+            style=self.settings.style,
+            size=self.settings.size
+        )
+        if self.scene_cache:
+            self.scene_cache.store(key, image_path)
+        return image_path
+
+    async def _encode_stage(self, inbox: asyncio.Queue, total: int):
+        slots = asyncio.Semaphore(self.settings.encoders)
+        encoded = {}  # scene index -> fraction encoded, for overall progress
+        jobs = []
+        try:
+            while True:
+                # Take a scene only once an encoder is free, so the image
+                # stage is not pulled further ahead than before
+                await slots.acquire()
+                for job in jobs:
+                    if job.done() and not job.cancelled() and job.exception():
+                        slots.release()
+                        raise job.exception()
+                scene = await inbox.get()
+                if scene is None:
+                    slots.release()
+                    break
+                jobs.append(asyncio.ensure_future(self._encode_scene(scene, total, encoded, slots)))
+            await asyncio.gather(*jobs)
+        finally:
+            for job in jobs:
+                job.cancel()
+            await asyncio.gather(*jobs, return_exceptions=True)
+
+    async def _encode_scene(self, scene: Scene, total: int, encoded: dict, slots: asyncio.Semaphore):
+        try:
+            message = f"Rendering scene {scene.index + 1}/{total}..."
+
+            def segment_progress(fraction: float):
+                encoded[scene.index] = fraction
+                self._report(sum(encoded.values()) / total, message)
+                self._publish()
+
+            self._report(sum(encoded.values()) / total, message)
+            if scene.reused:
+                if self.playlist:
+                    # Cut the cached segment into HLS by stream copy
+                    with self.timer.span("encode"):
+                        await self.video_service.segment_hls(
+                            scene.segment_path,
+                            self.playlist.scene_playlist(scene.index),
+                            self.playlist.segment_pattern(scene.index)
+                        )
+                    self.playlist.mark_finished(scene.index)
+                    self._publish()
+                encoded[scene.index] = 1.0
+                return
+
+            hls_args = {}
+            if self.playlist:
+                hls_args = {
+                    "hls_playlist": self.playlist.scene_playlist(scene.index),
+                    "hls_segment_pattern": self.playlist.segment_pattern(scene.index),
+                }
+            scene.segment_path = f"{self.video_service.temp_dir}/segment_{scene.index}.mp4"
+            with self.timer.span("encode"):
+                async with self._encoder_threads() as threads:
+                    await self.video_service.create_ken_burns_video(
+                        image_path=scene.image_path,
+                        audio_path=scene.audio_path,
+                        output_id=f"segment_{scene.index}",
+                        output_path=scene.segment_path,
+                        on_progress=segment_progress,
+                        motion=self.settings.motion,
+                        size=self.settings.size,
+                        fps=self.settings.fps,
+                        profile=self.settings.profile,
+                        threads=threads,
+                        **hls_args
+                    )
+            encoded[scene.index] = 1.0
+            if self.scene_cache:
+                self.scene_cache.store(scene.segment_key, scene.segment_path)
+            if self.playlist:
+                self.playlist.mark_finished(scene.index)
+                self._publish()
+        finally:
+            slots.release()
+
+    @contextlib.asynccontextmanager
+    async def _encoder_threads(self):
+        """ffmpeg threads for one scene encode (None: ffmpeg decides)"""
+        if self.settings.encoders == 1:
+            yield None
+            return
+        threads = max(1, cpu_budget.slots // self.settings.encoders)
+        async with cpu_budget.reserve(threads):
+            yield threads
+
+    async def run(self, script: str, output_id: str) -> str:
+        scenes = [Scene(i, text) for i, text in enumerate(split_scenes(script))]
+        if not scenes:
+            raise ValueError("Script has no scenes")
+        if self.scene_cache:
+            for scene in scenes:
+                scene.segment_key = self.scene_cache.segment_key(scene.text, self.settings)
+                scene.segment_path = self.scene_cache.fetch(
+                    scene.segment_key, f"{self.video_service.temp_dir}/segment_{scene.index}.mp4")
+                scene.reused = scene.segment_path is not None
+            self.reused = sum(scene.reused for scene in scenes)
+        if self.playlist_dir:
+            self.playlist = ProgressivePlaylist(self.playlist_dir, len(scenes))
+
+        voiced: asyncio.Queue = asyncio.Queue(maxsize=STAGE_QUEUE_SIZE)
+        illustrated: asyncio.Queue = asyncio.Queue(maxsize=STAGE_QUEUE_SIZE)
+        await run_stages(
+            self._voice_stage(scenes, voiced),
+            self._image_stage(voiced, illustrated),
+            self._encode_stage(illustrated, len(scenes)),
+        )
+
+        self._publish(ended=True)
+        self._report(1.0, "Stitching scenes...")
+        with self.timer.span("mux"):
+            return await self.video_service.concat_segments(
+                [scene.segment_path for scene in scenes],
+                output_id
+            )
+
+
+async def run_stages(*stages):
+    """Run stage coroutines together; the first failure cancels the rest"""
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception():
+                raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
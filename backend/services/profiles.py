@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from typing import List, Tuple
+
+VERTICAL = (1080, 1920)
+LANDSCAPE = (1920, 1080)
+
+# Full-quality frame size per style; unknown styles render vertical
+STYLE_GEOMETRY = {
+    "reels": VERTICAL,
+    "dark": VERTICAL,
+    "animated": VERTICAL,
+    "cinematic": LANDSCAPE,
+    "documentary": LANDSCAPE,
+    "corporate": LANDSCAPE,
+}
+DEFAULT_STYLE = "cinematic"
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """How hard the encoder works and at what size/frame rate"""
+    name: str
+    scale: float  # fraction of the style's full geometry
+    fps: int
+    preset: str
+    crf: int
+    audio_bitrate: str
+    description: str = ""
+
+    def video_args(self) -> List[str]:
+        return [
+            '-c:v', 'libx264', '-preset', self.preset, '-crf', str(self.crf),
+            '-pix_fmt', 'yuv420p'
+        ]
+
+    def audio_args(self) -> List[str]:
+        return ['-c:a', 'aac', '-b:a', self.audio_bitrate]
+
+
+ENCODING_PROFILES = {
+    "draft": EncodingProfile(
+        "draft", scale=0.4, fps=15, preset="ultrafast", crf=30, audio_bitrate="64k",
+        description="Low-res quick preview"
+    ),
+    "final": EncodingProfile(
+        "final", scale=1.0, fps=30, preset="medium", crf=20, audio_bitrate="160k",
+        description="Full resolution, quality-tuned"
+    ),
+}
+DEFAULT_PROFILE = ENCODING_PROFILES["final"]
+
+
+def primary_style(styles) -> str:
+    """The style a render actually uses: the first one picked"""
+    return styles[0] if styles else DEFAULT_STYLE
+
+
+def output_size(style: str, profile: EncodingProfile) -> Tuple[int, int]:
+    """Frame size for a style at a profile's scale (even, as yuv420p needs)"""
+    width, height = STYLE_GEOMETRY.get(style, VERTICAL)
+    return (
+        int(width * profile.scale) // 2 * 2,
+        int(height * profile.scale) // 2 * 2,
+    )
@@ -0,0 +1,40 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, Set
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+
+class ProgressBus:
+    """In-process fan-out of task status snapshots to any number of listeners"""
+
+    def __init__(self, queue_size: int = 32):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[task_id].add(queue)
+        return queue
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue):
+        listeners = self._subscribers.get(task_id)
+        if listeners is None:
+            return
+        listeners.discard(queue)
+        if not listeners:
+            del self._subscribers[task_id]
+
+    def has_subscribers(self, task_id: str) -> bool:
+        return task_id in self._subscribers
+
+    def publish(self, task_id: str, snapshot: dict):
+        for queue in self._subscribers.get(task_id, ()):
+            if queue.full():
+                # A slow reader only needs the latest state; drop the oldest
+                queue.get_nowait()
+            queue.put_nowait(snapshot)
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(listeners) for listeners in self._subscribers.values())
@@ -0,0 +1,130 @@
+import fcntl
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from services.profiles import primary_style
+
+# Bump whenever the pipeline output changes so stale renders are not reused
+PIPELINE_VERSION = "12"
+
+# Request fields that affect the rendered video (priority etc. do not)
+CACHE_FIELDS = ("script", "style", "voice", "avatar", "motion", "profile", "renditions", "target_size_mb")
+
+
+def request_key(request: dict) -> str:
+    """Content hash of the render-relevant parts of a request"""
+    canonical = {field: request.get(field) for field in CACHE_FIELDS}
+    canonical["script"] = " ".join((canonical["script"] or "").split())
+    # Only the first style shapes the render (geometry, gradient), so order matters
+    canonical["style"] = primary_style(canonical["style"])
+    canonical["renditions"] = sorted(canonical["renditions"] or [])
+    if not canonical["renditions"]:
+        canonical["target_size_mb"] = None  # only matters for the mobile rung
+    canonical["pipeline"] = PIPELINE_VERSION
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """Maps request hashes to finished videos and to renders in flight.
+
+    The index file is shared with standalone workers, so it is re-read
+    whenever another process has rewritten it, and every change is a
+    read-modify-write under an exclusive flock so concurrent stores from
+    several processes don't drop each other's entries.
+    """
+
+    def __init__(self, output_dir: str = "output"):
+        self.output_dir = output_dir
+        self.index_path = os.path.join(output_dir, "render_cache.json")
+        self.lock_path = f"{self.index_path}.lock"
+        self._mtime = None
+        self._videos: Dict[str, dict] = self._load()
+        self._inflight: Dict[str, str] = {}
+
+    def _index_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh(self):
+        if self._index_mtime() != self._mtime:
+            self._videos = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        self._mtime = self._index_mtime()
+        try:
+            with open(self.index_path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Older indexes mapped keys straight to video ids
+        return {
+            key: entry if isinstance(entry, dict) else {"video_id": entry}
+            for key, entry in entries.items()
+        }
+
+    @contextmanager
+    def _locked(self):
+        """Hold the index lock, starting from the latest index on disk"""
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._videos = self._load()
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save(self):
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._videos, f)
+        os.replace(tmp_path, self.index_path)
+        self._mtime = self._index_mtime()
+
+    # ----- finished renders -----
+    def lookup(self, key: str) -> Optional[dict]:
+        """Entry (video_id plus extras such as renditions) of a finished
+        render for this key, if still on disk"""
+        self._refresh()
+        entry = self._videos.get(key)
+        if entry is None:
+            return None
+        if not os.path.exists(os.path.join(self.output_dir, f"{entry['video_id']}.mp4")):
+            self.forget(key)
+            return None
+        return dict(entry)
+
+    def store(self, key: str, video_id: str, **extras):
+        with self._locked():
+            self._videos[key] = dict(extras, video_id=video_id)
+            self._save()
+
+    def forget(self, key: str):
+        with self._locked():
+            if self._videos.pop(key, None) is not None:
+                self._save()
+
+    def forget_video(self, video_id: str):
+        """Drop every key pointing at a deleted video"""
+        with self._locked():
+            stale = [key for key, entry in self._videos.items() if entry["video_id"] == video_id]
+            for key in stale:
+                del self._videos[key]
+            if stale:
+                self._save()
+
+    # ----- in-flight deduplication -----
+    def inflight(self, key: str) -> Optional[str]:
+        return self._inflight.get(key)
+
+    def begin(self, key: str, task_id: str):
+        self._inflight[key] = task_id
+
+    def finish(self, key: str, task_id: str):
+        if self._inflight.get(key) == task_id:
+            del self._inflight[key]
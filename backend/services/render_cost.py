@@ -0,0 +1,169 @@
+import json
+import math
+import os
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+from services.profiles import EncodingProfile
+
+# Speaking rate used to guess narration length from script length
+NARRATION_SECONDS_PER_CHAR = float(os.getenv("NARRATION_SECONDS_PER_CHAR", "0.065"))
+# One core keeps up with roughly this many pixels per frame
+PIXELS_PER_CORE = 1280 * 720
+# ffmpeg + Python baseline, plus the frames an encoder buffers per preset
+BASE_MEMORY_BYTES = int(os.getenv("RENDER_BASE_MEMORY_MB", "150")) * 1024 * 1024
+BUFFERED_FRAMES = {"ultrafast": 4, "superfast": 12, "veryfast": 20, "faster": 30, "fast": 40, "medium": 48}
+BYTES_PER_PIXEL = 3  # rawvideo RGB frames in the crop engine's pipe
+RENDITION_PRESET = "veryfast"
+
+# Starting rates (seconds of one core per megapixel-frame, seconds per scene)
+# measured on a small dev box; every finished render refines them
+DEFAULT_RATES = {
+    "encode": {"draft": 0.004, "final": 0.024},
+    "renditions": 0.006,
+    "scene_overhead": 0.3,
+}
+CALIBRATION_WEIGHT = 0.2  # share of each new observation in the running rate
+
+
+@dataclass
+class RenderEstimate:
+    """What one render is expected to cost"""
+    scenes: int
+    duration_seconds: float
+    megapixel_frames: float  # scenes to encode: width * height * frames / 1e6
+    rendition_megapixel_frames: float
+    cores: int
+    memory_bytes: int
+    seconds: float  # predicted wall-clock render time once admitted
+
+    def as_dict(self) -> dict:
+        return {k: round(v, 3) if isinstance(v, float) else v for k, v in asdict(self).items()}
+
+
+def estimate_memory(size: Tuple[int, int], preset: str) -> int:
+    width, height = size
+    return BASE_MEMORY_BYTES + width * height * BYTES_PER_PIXEL * BUFFERED_FRAMES.get(preset, 48)
+
+
+class CostModel:
+    """Render time estimates, calibrated from recorded stage timings.
+
+    Rates persist in a small JSON file so standalone workers (which record
+    timings) and the API (which quotes estimates) share one calibration;
+    the file is re-read whenever another process has rewritten it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime = None
+        self.rates = self._load()
+
+    def _file_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self) -> dict:
+        self._mtime = self._file_mtime()
+        rates = json.loads(json.dumps(DEFAULT_RATES))
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return rates
+        rates["encode"].update(saved.get("encode", {}))
+        for name in ("renditions", "scene_overhead"):
+            rates[name] = saved.get(name, rates[name])
+        return rates
+
+    def _refresh(self):
+        if self._file_mtime() != self._mtime:
+            self.rates = self._load()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.rates, f)
+        os.replace(tmp_path, self.path)
+        self._mtime = self._file_mtime()
+
+    # ----- estimates -----
+    def estimate(
+        self,
+        scenes: List[str],
+        size: Tuple[int, int],
+        profile: EncodingProfile,
+        rendition_sizes: List[Tuple[int, int]] = (),
+        reused_scenes: int = 0,
+        budget_cores: int = 1,
+    ) -> RenderEstimate:
+        """Cost of rendering `scenes`, of which `reused_scenes` come from the scene cache"""
+        self._refresh()
+        chars = sum(len(scene) for scene in scenes)
+        duration = chars * NARRATION_SECONDS_PER_CHAR
+        fresh = (len(scenes) - reused_scenes) / len(scenes) if scenes else 0
+        frames = duration * profile.fps
+        width, height = size
+        mpf = width * height * frames * fresh / 1e6
+        rendition_mpf = sum(w * h for w, h in rendition_sizes) * frames / 1e6
+
+        cores = min(max(1, budget_cores), max(1, math.ceil(width * height / PIXELS_PER_CORE)))
+        memory = estimate_memory(size, profile.preset)
+        if rendition_sizes:
+            # All rungs encode at once from one decode (see create_renditions)
+            rendition_memory = BASE_MEMORY_BYTES + sum(
+                estimate_memory(s, RENDITION_PRESET) - BASE_MEMORY_BYTES for s in rendition_sizes)
+            memory = max(memory, rendition_memory)
+
+        encode_rate = self.rates["encode"].get(profile.name, DEFAULT_RATES["encode"]["final"])
+        seconds = (
+            encode_rate * mpf / cores
+            + self.rates["renditions"] * rendition_mpf / cores
+            + self.rates["scene_overhead"] * len(scenes)
+        )
+        return RenderEstimate(
+            scenes=len(scenes),
+            duration_seconds=duration,
+            megapixel_frames=mpf,
+            rendition_megapixel_frames=rendition_mpf,
+            cores=cores,
+            memory_bytes=memory,
+            seconds=seconds,
+        )
+
+    # ----- calibration -----
+    @staticmethod
+    def _blend(old: float, new: float) -> float:
+        return (1 - CALIBRATION_WEIGHT) * old + CALIBRATION_WEIGHT * new
+
+    def observe(self, estimate: RenderEstimate, profile: str, timings: Dict[str, float]):
+        """Fold a finished render's stage timings (StageTimer.as_dict()) into the rates"""
+        self._refresh()
+        encode = timings.get("encode", 0)
+        if estimate.megapixel_frames > 0 and encode > 0:
+            rate = encode * estimate.cores / estimate.megapixel_frames
+            current = self.rates["encode"].get(profile, DEFAULT_RATES["encode"]["final"])
+            self.rates["encode"][profile] = self._blend(current, rate)
+        renditions = timings.get("renditions", 0)
+        if estimate.rendition_megapixel_frames > 0 and renditions > 0:
+            rate = renditions * estimate.cores / estimate.rendition_megapixel_frames
+            self.rates["renditions"] = self._blend(self.rates["renditions"], rate)
+        if estimate.scenes:
+            # Whatever the overlapped TTS / image / mux stages add on top of encoding
+            overhead = max(0.0, timings.get("total", 0) - encode - renditions) / estimate.scenes
+            self.rates["scene_overhead"] = self._blend(self.rates["scene_overhead"], overhead)
+        self._save()
+
+
+_cost_model = None
+
+
+def get_cost_model() -> CostModel:
+    """Process-wide cost model stored at COST_MODEL_PATH"""
+    global _cost_model
+    if _cost_model is None:
+        _cost_model = CostModel(os.getenv("COST_MODEL_PATH", "data/cost_model.json"))
+    return _cost_model
@@ -0,0 +1,206 @@
+import asyncio
+import contextlib
+import itertools
+import math
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+# Lower number = served first
+PRIORITIES = {
+    "high": 0,     # paid / final renders
+    "normal": 1,
+    "low": 2,      # free-tier / previews that can wait
+}
+
+
+def default_worker_count() -> int:
+    """Workers sized to the machine; each ffmpeg already uses several threads"""
+    configured = int(os.getenv("RENDER_WORKERS", "0") or 0)
+    if configured > 0:
+        return configured
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+class QueueFullError(Exception):
+    """Raised when the render queue refuses new work"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Render queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class RenderScheduler:
+    """Bounded pool of render workers fed from a priority queue.
+
+    With a resource budget, a worker that picks up a job also waits until
+    the job's estimated cores and memory (its `cost`, see
+    services/render_cost.py) fit, so several large renders never run at once.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[..., Awaitable[None]],
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        budget=None,
+    ):
+        self.handler = handler
+        self.budget = budget
+        self.workers = workers or default_worker_count()
+        self.max_queue = max_queue or int(os.getenv("RENDER_QUEUE_LIMIT", "0") or 0) or self.workers * 10
+        self.avg_render_seconds = float(os.getenv("RENDER_AVG_SECONDS", "30"))
+
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._pending: Dict[str, Tuple[int, int]] = {}
+        self._active: Dict[str, asyncio.Task] = {}
+        # Predicted render seconds per job, and when active jobs started
+        self._estimates: Dict[str, float] = {}
+        self._started: Dict[str, float] = {}
+        self._cancelled = set()
+        self._seq = itertools.count()
+        self._worker_tasks = []
+
+    # ----- lifecycle -----
+    def start(self):
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        print(f"🎛️  Render scheduler started with {self.workers} workers (queue limit {self.max_queue})")
+
+    async def stop(self):
+        for worker in self._worker_tasks:
+            worker.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    # ----- admission -----
+    def submit(self, task_id: str, *args, priority: str = "normal", cost=None):
+        """Queue a render job or raise QueueFullError"""
+        if self._queue is None:
+            raise RuntimeError("Render scheduler is not running")
+        if len(self._pending) >= self.max_queue:
+            raise QueueFullError(self.retry_after())
+
+        key = (PRIORITIES.get(priority, PRIORITIES["normal"]), next(self._seq))
+        self._pending[task_id] = key
+        self._estimates[task_id] = cost.seconds if cost else self.avg_render_seconds
+        self._queue.put_nowait((key, task_id, args, cost))
+
+    @property
+    def parallelism(self) -> int:
+        """Renders that can actually run at once (the CPU budget may allow fewer than the workers)"""
+        if self.budget is None:
+            return self.workers
+        return max(1, min(self.workers, self.budget.cores))
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot frees up, i.e. until the head of the queue
+        starts: the running work spread over the renders that run at once"""
+        return max(1, math.ceil(self._running_seconds() / self.parallelism))
+
+    # ----- introspection -----
+    def position(self, task_id: str) -> Optional[int]:
+        """1-based position in the queue, None if not waiting"""
+        key = self._pending.get(task_id)
+        if key is None:
+            return None
+        return 1 + sum(1 for other in self._pending.values() if other < key)
+
+    def estimated_wait(self, task_id: str) -> Optional[int]:
+        """Seconds until a queued job starts: the work ahead of it spread over the workers"""
+        key = self._pending.get(task_id)
+        if key is None:
+            return None
+        ahead = sum(self._estimates.get(other, self.avg_render_seconds)
+                    for other, other_key in self._pending.items() if other_key < key)
+        return math.ceil((ahead + self._running_seconds()) / self.parallelism)
+
+    def backlog_seconds(self) -> float:
+        """Predicted seconds of work queued and still running, before spreading it over workers"""
+        queued = sum(self._estimates.get(other, self.avg_render_seconds) for other in self._pending)
+        return queued + self._running_seconds()
+
+    def _running_seconds(self) -> float:
+        now = time.monotonic()
+        return sum(max(0.0, self._estimates.get(active, self.avg_render_seconds) - (now - started))
+                   for active, started in self._started.items())
+
+    def remaining(self, task_id: str) -> Optional[int]:
+        """Predicted seconds left for a running job"""
+        started = self._started.get(task_id)
+        if started is None:
+            return None
+        estimate = self._estimates.get(task_id, self.avg_render_seconds)
+        return max(0, math.ceil(estimate - (time.monotonic() - started)))
+
+    def cancel(self, task_id: str) -> bool:
+        """Drop a queued job or cancel a running one (kills its encoders)"""
+        if task_id in self._pending:
+            del self._pending[task_id]
+            self._estimates.pop(task_id, None)
+            self._cancelled.add(task_id)
+            return True
+        job = self._active.get(task_id)
+        if job is not None:
+            self._cancelled.add(task_id)
+            job.cancel()
+            return True
+        return False
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active)
+
+    # ----- workers -----
+    def _admit(self, cost):
+        if self.budget is None or cost is None:
+            return contextlib.nullcontext()
+        return self.budget.reserve(cost.cores, cost.memory_bytes)
+
+    async def _worker(self, worker_id: int):
+        while True:
+            _, task_id, args, cost = await self._queue.get()
+            try:
+                if task_id in self._cancelled:
+                    # Cancelled while it was still waiting
+                    self._cancelled.discard(task_id)
+                    continue
+                # Stays in the queue (and cancellable) until the budget admits it
+                async with self._admit(cost):
+                    if task_id in self._cancelled:
+                        self._cancelled.discard(task_id)
+                        continue
+                    self._pending.pop(task_id, None)
+                    await self._run(worker_id, task_id, args)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, worker_id: int, task_id: str, args: tuple):
+        started = time.monotonic()
+        self._started[task_id] = started
+        job = asyncio.create_task(self.handler(task_id, *args))
+        self._active[task_id] = job
+        try:
+            await job
+        except asyncio.CancelledError:
+            # Only swallow cancellations aimed at this job, not at the worker
+            if task_id not in self._cancelled:
+                raise
+        except Exception as e:
+            print(f"❌ Worker {worker_id} crashed on {task_id}: {e}")
+        finally:
+            self._active.pop(task_id, None)
+            self._started.pop(task_id, None)
+            self._estimates.pop(task_id, None)
+            self._cancelled.discard(task_id)
+            # Exponential moving average keeps the Retry-After estimate honest
+            elapsed = time.monotonic() - started
+            self.avg_render_seconds = 0.8 * self.avg_render_seconds + 0.2 * elapsed
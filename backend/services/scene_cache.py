@@ -0,0 +1,78 @@
+import dataclasses
+import hashlib
+import json
+import os
+from typing import Optional
+
+from services.disk_cache import DiskLRUCache, link_or_copy
+from services.hls import SEGMENT_SECONDS
+from services.tts import default_backend
+
+# Bump when image composition or segment encoding changes output for the
+# same inputs, so stale artifacts are not reused
+SCENE_CACHE_VERSION = "2"
+
+_scene_cache = None
+
+
+class SceneCache:
+    """Per-scene images and encoded segments, keyed by a hash of their inputs.
+
+    Narration is already cached by services/tts.py. Editing one sentence of
+    a script changes only that scene's keys, so a re-render reuses every
+    other scene's segment and just re-encodes the edited one.
+    """
+
+    def __init__(self, cache: DiskLRUCache):
+        self.cache = cache
+        self.voice_engine = default_backend().version
+
+    @staticmethod
+    def _key(kind: str, **inputs) -> str:
+        payload = json.dumps({"kind": kind, "version": SCENE_CACHE_VERSION, **inputs},
+                             sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def image_key(self, text: str, settings) -> str:
+        return self._key("image", text=text, style=settings.style, size=list(settings.size))
+
+    def segment_key(self, text: str, settings) -> str:
+        return self._key(
+            "segment",
+            text=text,
+            voice=settings.voice,
+            voice_engine=self.voice_engine,
+            style=settings.style,
+            motion=settings.motion,
+            size=list(settings.size),
+            fps=settings.fps,
+            profile=dataclasses.asdict(settings.profile),
+            keyframe_seconds=SEGMENT_SECONDS,
+        )
+
+    def has(self, key: str) -> bool:
+        return key in self.cache
+
+    def fetch(self, key: str, dest: str) -> Optional[str]:
+        """Place the cached artifact at dest; None on a miss"""
+        path = self.cache.get(key)
+        if path is None:
+            return None
+        link_or_copy(path, dest)
+        return dest
+
+    def store(self, key: str, path: str):
+        """Keep a copy of a finished artifact; the original stays where it is"""
+        root, ext = os.path.splitext(path)
+        staged = f"{root}.cached{ext}"
+        link_or_copy(path, staged)
+        self.cache.put(key, staged)
+
+
+def get_scene_cache() -> SceneCache:
+    """Process-wide scene cache, bounded by SCENE_CACHE_MB"""
+    global _scene_cache
+    if _scene_cache is None:
+        max_mb = int(os.getenv("SCENE_CACHE_MB", "2048"))
+        _scene_cache = SceneCache(DiskLRUCache("temp/scene_cache", max_mb * 1024 * 1024, name="scene"))
+    return _scene_cache
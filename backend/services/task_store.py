@@ -0,0 +1,297 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Tasks are forgotten this long after their last update
+DEFAULT_TTL = int(os.getenv("TASK_TTL_SECONDS", "3600"))
+# How often buffered SQLite updates are written out
+FLUSH_SECONDS = float(os.getenv("TASK_FLUSH_SECONDS", "0.25"))
+
+
+def connect_sqlite(path: str, schema: str) -> sqlite3.Connection:
+    """Autocommit WAL connection shared by several processes, with `schema` applied.
+
+    Callers use explicit BEGIN IMMEDIATE where they read-modify-write.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(schema)
+    return conn
+
+
+class TaskStore:
+    """Where task records live. Records are plain JSON-serialisable dicts."""
+
+    def create(self, task_id: str, record: dict):
+        raise NotImplementedError
+
+    def get(self, task_id: str) -> Optional[dict]:
+        """The record, or None if unknown or expired"""
+        raise NotImplementedError
+
+    def update(self, task_id: str, **fields) -> bool:
+        """Merge fields into an existing record; False if it is gone"""
+        raise NotImplementedError
+
+    def claim(self, task_id: str, expected_owner: Optional[str], **fields) -> bool:
+        """Merge fields only if the record's owner is still expected_owner.
+
+        Compare-and-set, so when several processes find the same orphaned
+        task exactly one of them takes it over.
+        """
+        raise NotImplementedError
+
+    def delete(self, task_id: str):
+        raise NotImplementedError
+
+    def unfinished(self) -> List[dict]:
+        """Records still queued or processing (used to recover after restarts)"""
+        raise NotImplementedError
+
+    def sweep_expired(self) -> int:
+        """Drop expired records, returning how many were removed"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryTaskStore(TaskStore):
+    """Single-process store; everything is lost on restart"""
+
+    def __init__(self, ttl: int = DEFAULT_TTL):
+        self.ttl = ttl
+        self._records: Dict[str, dict] = {}
+        self._expires: Dict[str, float] = {}
+
+    def create(self, task_id: str, record: dict):
+        self._records[task_id] = dict(record, task_id=task_id)
+        self._expires[task_id] = time.time() + self.ttl
+
+    def get(self, task_id: str) -> Optional[dict]:
+        if self._expires.get(task_id, 0) < time.time():
+            return None
+        return dict(self._records[task_id])
+
+    def update(self, task_id: str, **fields) -> bool:
+        if task_id not in self._records:
+            return False
+        self._records[task_id].update(fields)
+        self._expires[task_id] = time.time() + self.ttl
+        return True
+
+    def claim(self, task_id: str, expected_owner: Optional[str], **fields) -> bool:
+        record = self._records.get(task_id)
+        if record is None or record.get("owner") != expected_owner:
+            return False
+        return self.update(task_id, **fields)
+
+    def delete(self, task_id: str):
+        self._records.pop(task_id, None)
+        self._expires.pop(task_id, None)
+
+    def unfinished(self) -> List[dict]:
+        return [
+            dict(r) for r in self._records.values()
+            if r.get("status") in ("queued", "processing")
+        ]
+
+    def sweep_expired(self) -> int:
+        now = time.time()
+        expired = [task_id for task_id, expires in self._expires.items() if expires < now]
+        for task_id in expired:
+            self.delete(task_id)
+        return len(expired)
+
+
+class SQLiteTaskStore(TaskStore):
+    """Embedded SQLite store in WAL mode, shareable by several uvicorn workers.
+
+    update() is called on the event loop for every progress tick, so it only
+    buffers: a writer thread merges buffered fields into the database every
+    flush_seconds, and a contended write lock never stalls the loop. Reads in
+    this process see buffered fields at once; other processes see them after
+    the next flush.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            task_id    TEXT PRIMARY KEY,
+            status     TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            data       TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_expires ON tasks (expires_at);
+        CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks (created_at);
+        CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status);
+    """
+
+    def __init__(self, path: str, ttl: int = DEFAULT_TTL, flush_seconds: float = FLUSH_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.flush_seconds = flush_seconds
+        self._conn = connect_sqlite(path, self.SCHEMA)
+        # The writer thread gets its own connection: transactions can't share one
+        self._writer_conn = connect_sqlite(path, self.SCHEMA)
+        self._pending: Dict[str, dict] = {}
+        self._flushing: Dict[str, dict] = {}  # taken from _pending, not committed yet
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # keeps batches in order
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._write_behind, name="task-store-writer", daemon=True)
+        self._writer.start()
+
+    def _overlay(self, record: dict) -> dict:
+        """A stored record with this process's unwritten updates applied"""
+        with self._pending_lock:
+            for buffered in (self._flushing, self._pending):
+                record.update(buffered.get(record["task_id"], {}))
+        return record
+
+    def create(self, task_id: str, record: dict):
+        now = time.time()
+        record = dict(record, task_id=task_id)
+        with self._pending_lock:
+            self._pending.pop(task_id, None)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tasks (task_id, status, created_at, expires_at, data) VALUES (?, ?, ?, ?, ?)",
+            (task_id, record.get("status", "queued"), now, now + self.ttl, json.dumps(record)),
+        )
+
+    def get(self, task_id: str) -> Optional[dict]:
+        row = self._conn.execute(
+            "SELECT data FROM tasks WHERE task_id = ? AND expires_at >= ?",
+            (task_id, time.time()),
+        ).fetchone()
+        return self._overlay(json.loads(row[0])) if row else None
+
+    def update(self, task_id: str, **fields) -> bool:
+        with self._pending_lock:
+            buffered = task_id in self._pending or task_id in self._flushing
+        # A WAL read: never waits for another process's write lock
+        if not buffered and self._conn.execute(
+            "SELECT 1 FROM tasks WHERE task_id = ?", (task_id,)
+        ).fetchone() is None:
+            return False
+        with self._pending_lock:
+            self._pending.setdefault(task_id, {}).update(fields)
+        return True
+
+    def claim(self, task_id: str, expected_owner: Optional[str], **fields) -> bool:
+        # Compare against what is really stored, including our own buffered owner
+        self.flush()
+        return self._merge(task_id, fields, lambda record: record.get("owner") == expected_owner)
+
+    def flush(self):
+        """Write buffered updates out now"""
+        with self._flush_lock:
+            with self._pending_lock:
+                self._flushing, self._pending = self._pending, {}
+            if not self._flushing:
+                return
+            try:
+                self._write(self._flushing)
+            except sqlite3.Error as e:
+                print(f"⚠️  Task store flush failed ({e}), retrying")
+                with self._pending_lock:
+                    # Keep them, under any newer updates to the same tasks
+                    for task_id, fields in self._flushing.items():
+                        self._pending[task_id] = {**fields, **self._pending.get(task_id, {})}
+            finally:
+                with self._pending_lock:
+                    self._flushing = {}
+
+    def _write_behind(self):
+        while not self._stop.wait(self.flush_seconds):
+            self.flush()
+
+    def _write(self, updates: Dict[str, dict]):
+        """Merge buffered fields into their records in one transaction"""
+        conn = self._writer_conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for task_id, fields in updates.items():
+                row = conn.execute("SELECT data FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+                if row is None:
+                    continue  # deleted in the meantime
+                record = json.loads(row[0])
+                record.update(fields)
+                conn.execute(
+                    "UPDATE tasks SET status = ?, expires_at = ?, data = ? WHERE task_id = ?",
+                    (record.get("status", "queued"), time.time() + self.ttl, json.dumps(record), task_id),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _merge(self, task_id: str, fields: dict, check=None) -> bool:
+        """Read-modify-write under the write lock; check(record) can veto the update"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute("SELECT data FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            if row is None:
+                self._conn.execute("ROLLBACK")
+                return False
+            record = json.loads(row[0])
+            if check is not None and not check(record):
+                self._conn.execute("ROLLBACK")
+                return False
+            record.update(fields)
+            self._conn.execute(
+                "UPDATE tasks SET status = ?, expires_at = ?, data = ? WHERE task_id = ?",
+                (record.get("status", "queued"), time.time() + self.ttl, json.dumps(record), task_id),
+            )
+            self._conn.execute("COMMIT")
+            return True
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, task_id: str):
+        with self._pending_lock:
+            self._pending.pop(task_id, None)
+        self._conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+
+    def unfinished(self) -> List[dict]:
+        self.flush()  # the status filter runs on what is stored
+        rows = self._conn.execute(
+            "SELECT data FROM tasks WHERE status IN ('queued', 'processing') ORDER BY created_at"
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def sweep_expired(self, batch_size: int = 500) -> int:
+        """Delete expired rows in small batches so writers are never blocked long"""
+        removed = 0
+        while True:
+            cursor = self._conn.execute(
+                "DELETE FROM tasks WHERE task_id IN ("
+                "SELECT task_id FROM tasks WHERE expires_at < ? LIMIT ?)",
+                (time.time(), batch_size),
+            )
+            removed += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                return removed
+
+    def close(self):
+        self._stop.set()
+        self._writer.join()
+        self.flush()
+        self._writer_conn.close()
+        self._conn.close()
+
+
+def create_task_store() -> TaskStore:
+    """Pick the backend from TASK_STORE (sqlite by default)"""
+    backend = os.getenv("TASK_STORE", "sqlite")
+    if backend == "memory":
+        return MemoryTaskStore()
+    if backend == "sqlite":
+        return SQLiteTaskStore(os.getenv("TASK_DB_PATH", "data/tasks.db"))
+    raise ValueError(f"Unknown TASK_STORE backend: {backend}")
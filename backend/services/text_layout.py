@@ -0,0 +1,92 @@
+import os
+from functools import lru_cache
+from typing import List, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Word widths are measured once at this size and scaled for other sizes
+REFERENCE_SIZE = 60
+REFERENCE_WIDTH = 1080  # canvas width the reference size was designed for
+
+FONT_CANDIDATES = [os.getenv("CAPTION_FONT", ""), "arial.ttf", "DejaVuSans.ttf"]
+
+
+@lru_cache(maxsize=16)
+def get_font(size: int) -> ImageFont.ImageFont:
+    """Resolve the caption font once per size for the whole process"""
+    for candidate in FONT_CANDIDATES:
+        if not candidate:
+            continue
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        # Pillow < 10.1 only has the fixed-size bitmap font
+        return ImageFont.load_default()
+
+
+def is_scalable(font: ImageFont.ImageFont) -> bool:
+    return isinstance(font, ImageFont.FreeTypeFont)
+
+
+@lru_cache(maxsize=16384)
+def word_width(word: str, size: int = REFERENCE_SIZE) -> float:
+    """Advance width of a word, memoized across requests"""
+    return get_font(size).getlength(word)
+
+
+class CaptionLayout:
+    """Caption measured once, wrappable and drawable at any resolution"""
+
+    def __init__(self, text: str):
+        self.words = text.split()
+        self.widths = [word_width(word) for word in self.words]
+        self.space = word_width(" ")
+
+    def wrap(self, max_width: float, font_size: int = REFERENCE_SIZE) -> List[Tuple[str, float]]:
+        """Greedy line breaking in one pass. Returns (line, pixel width) pairs"""
+        scale = font_size / REFERENCE_SIZE if is_scalable(get_font(font_size)) else 1.0
+        space = self.space * scale
+        lines = []
+        current: List[str] = []
+        current_width = 0.0
+        for word, width in zip(self.words, self.widths):
+            width *= scale
+            candidate = current_width + space + width if current else width
+            if current and candidate >= max_width:
+                lines.append((" ".join(current), current_width))
+                current, current_width = [word], width
+            else:
+                current.append(word)
+                current_width = candidate
+        if current:
+            lines.append((" ".join(current), current_width))
+        return lines
+
+    def draw(self, img: Image.Image, margin: int = 50):
+        """Centre the caption on `img` with a drop shadow, scaled to its width"""
+        width, height = img.size
+        font_size = max(12, round(REFERENCE_SIZE * width / REFERENCE_WIDTH))
+        font = get_font(font_size)
+        line_height = round(font_size * 7 / 6)
+        shadow = max(1, round(2 * font_size / REFERENCE_SIZE))
+
+        lines = self.wrap(width - 2 * margin, font_size)
+        draw = ImageDraw.Draw(img)
+        y_text = height // 2 - (len(lines) * line_height) // 2
+        for line, line_width in lines:
+            x_text = int((width - line_width) // 2)
+            # Shadow
+            draw.text((x_text + shadow, y_text + shadow), line, font=font, fill=(0, 0, 0))
+            # Main text
+            draw.text((x_text, y_text), line, font=font, fill=(255, 255, 255))
+            y_text += line_height
+
+
+@lru_cache(maxsize=256)
+def caption_layout(text: str) -> CaptionLayout:
+    """Shared layout per caption so repeated renders skip measuring entirely"""
+    return CaptionLayout(text)
@@ -0,0 +1,305 @@
+import asyncio
+import hashlib
+import os
+import random
+import re
+import uuid
+import wave
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from services.disk_cache import DiskLRUCache, link_or_copy
+from services.ffmpeg_runner import run_ffmpeg
+
+# Everything is stitched and cached at one rate/layout so chunks join cleanly
+SAMPLE_RATE = 24000
+CHUNK_CHARS = int(os.getenv("TTS_CHUNK_CHARS", "200"))
+MAX_RETRIES = int(os.getenv("TTS_RETRIES", "3"))
+
+VOICE_MAP = {
+    "male": "en-US-ChristopherNeural",
+    "female": "en-US-JennyNeural",
+    "narrator": "en-GB-RyanNeural"
+}
+
+
+class TTSError(Exception):
+    """Synthesis failed after all retries"""
+
+
+# ========== BACKENDS ==========
+class TTSBackend:
+    name = "base"
+    extension = "wav"
+    # Concurrent requests allowed against this provider (per process)
+    concurrency = 4
+
+    @property
+    def version(self) -> str:
+        return self.name
+
+    async def synthesize(self, text: str, voice: str, output_path: str):
+        raise NotImplementedError
+
+
+class EdgeTTSBackend(TTSBackend):
+    name = "edge"
+    extension = "mp3"
+    concurrency = int(os.getenv("EDGE_TTS_CONCURRENCY", "4"))
+
+    @property
+    def version(self) -> str:
+        try:
+            from importlib.metadata import version
+            return f"edge-tts-{version('edge-tts')}"
+        except Exception:
+            return "edge-tts-unknown"
+
+    async def synthesize(self, text: str, voice: str, output_path: str):
+        import edge_tts
+        communicate = edge_tts.Communicate(text, VOICE_MAP.get(voice, VOICE_MAP["male"]))
+        await communicate.save(output_path)
+
+
+class ToneTTSBackend(TTSBackend):
+    """Offline stand-in: deterministic audio whose length tracks the text.
+
+    mode="tone" writes a soft sine per chunk (pitch derived from the text and
+    voice), mode="silence" writes silence. No network, no ffmpeg, so the full
+    pipeline can be load-tested anywhere.
+    """
+
+    extension = "wav"
+    concurrency = 64
+    SECONDS_PER_CHAR = 0.06
+
+    def __init__(self, mode: str = "tone"):
+        self.mode = mode
+        self.name = f"local-{mode}"
+
+    @property
+    def version(self) -> str:
+        return f"{self.name}-1"
+
+    def _render(self, text: str, voice: str, output_path: str):
+        seconds = max(0.5, len(text) * self.SECONDS_PER_CHAR)
+        frames = int(seconds * SAMPLE_RATE)
+        if self.mode == "silence":
+            samples = bytes(frames * 2)
+        else:
+            seed = int(hashlib.sha256(f"{voice}\x00{text}".encode("utf-8")).hexdigest()[:8], 16)
+            freq = 180 + seed % 240
+            t = np.arange(frames)
+            # 20 ms fade in/out so chunk joins don't click
+            envelope = np.minimum(1.0, np.minimum(t, frames - t) / (SAMPLE_RATE / 50))
+            wave_form = 6000 * envelope * np.sin(2 * np.pi * freq * t / SAMPLE_RATE)
+            samples = wave_form.astype("<i2").tobytes()
+        with wave.open(output_path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(SAMPLE_RATE)
+            wav.writeframes(samples)
+
+    async def synthesize(self, text: str, voice: str, output_path: str):
+        await asyncio.to_thread(self._render, text, voice, output_path)
+
+
+def default_backend() -> TTSBackend:
+    """TTS_BACKEND=edge|tone|silence; without edge-tts installed, fall back to silence"""
+    name = os.getenv("TTS_BACKEND", "edge")
+    if name == "edge":
+        try:
+            import edge_tts  # noqa: F401
+            return EdgeTTSBackend()
+        except ImportError:
+            return ToneTTSBackend("silence")
+    if name in ("tone", "silence"):
+        return ToneTTSBackend(name)
+    raise ValueError(f"Unknown TTS_BACKEND: {name}")
+
+
+# ========== CACHE & LIMITS ==========
+_tts_cache = None
+_provider_limits: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_tts_cache() -> DiskLRUCache:
+    """Process-wide cache of synthesized narration, bounded by TTS_CACHE_MB"""
+    global _tts_cache
+    if _tts_cache is None:
+        max_mb = int(os.getenv("TTS_CACHE_MB", "512"))
+        _tts_cache = DiskLRUCache("temp/tts_cache", max_mb * 1024 * 1024, name="tts")
+    return _tts_cache
+
+
+def tts_cache_key(text: str, voice: str, engine_version: str) -> str:
+    payload = "\x00".join([engine_version, voice, text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def coalesce(key: str, work: Callable[[], Awaitable[str]]) -> Awaitable[str]:
+    """Share one synthesis between concurrent callers asking for the same audio.
+
+    A batch often repeats narration across items; without this every item
+    misses the cache at once and synthesizes its own copy. The shared task
+    outlives any single caller being cancelled.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(work())
+        _inflight[key] = task
+
+        def finished(done: asyncio.Task):
+            _inflight.pop(key, None)
+            if not done.cancelled():
+                done.exception()  # retrieved here so an unawaited failure isn't logged
+        task.add_done_callback(finished)
+    return asyncio.shield(task)
+
+
+def provider_limit(backend: TTSBackend) -> asyncio.Semaphore:
+    if backend.name not in _provider_limits:
+        _provider_limits[backend.name] = asyncio.Semaphore(backend.concurrency)
+    return _provider_limits[backend.name]
+
+
+# ========== CHUNKING ==========
+_SENTENCE_END = re.compile(r"(?<=[.!?…;:])\s+")
+
+
+def split_chunks(text: str, max_chars: int = CHUNK_CHARS) -> List[str]:
+    """Sentence-aligned chunks of at most max_chars (long sentences split on words)"""
+    chunks: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        pieces = [sentence]
+        if len(sentence) > max_chars:
+            pieces, piece = [], ""
+            for word in sentence.split():
+                if piece and len(piece) + 1 + len(word) > max_chars:
+                    pieces.append(piece)
+                    piece = word
+                else:
+                    piece = f"{piece} {word}".strip()
+            if piece:
+                pieces.append(piece)
+        for piece in pieces:
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# ========== SERVICE ==========
+class TTSService:
+    """Chunked, cached, concurrency-limited narration with retry/backoff.
+
+    Returned paths are hard links in the workspace, never the cache files
+    themselves: another task's put() may evict those before ffmpeg opens them.
+    Synthesis shared through coalesce() works in the cache's staging
+    directory, so cancelling the task that started it (and deleting its
+    workspace) does not fail the other tasks waiting on the same audio.
+    """
+
+    def __init__(self, workdir: str, backend: Optional[TTSBackend] = None,
+                 cache: Optional[DiskLRUCache] = None):
+        self.workdir = workdir
+        self.backend = backend or default_backend()
+        self.cache = cache if cache is not None else get_tts_cache()
+
+    @staticmethod
+    def _checkout(cache_path: str, directory: str) -> str:
+        """Link a cache file into `directory`"""
+        ext = os.path.splitext(cache_path)[1]
+        local_path = os.path.join(directory, f"tts_{uuid.uuid4().hex[:8]}{ext}")
+        link_or_copy(cache_path, local_path)
+        return local_path
+
+    async def _cached(self, key: str, work: Callable[[], Awaitable[str]], directory: str) -> str:
+        """Copy of a cache entry in `directory`, producing it first (once) on a miss"""
+        cached_path = self.cache.get(key)
+        if cached_path:
+            try:
+                return self._checkout(cached_path, directory)
+            except FileNotFoundError:
+                pass  # evicted by another process in between
+        return self._checkout(await coalesce(key, work), directory)
+
+    async def _synthesize_chunk(self, text: str, voice: str, directory: str) -> str:
+        key = tts_cache_key(text, voice, self.backend.version)
+        return await self._cached(key, lambda: self._render_chunk(key, text, voice), directory)
+
+    async def _render_chunk(self, key: str, text: str, voice: str) -> str:
+        output_path = self.cache.staging_path(self.backend.extension)
+        try:
+            for attempt in range(MAX_RETRIES + 1):
+                try:
+                    async with provider_limit(self.backend):
+                        await self.backend.synthesize(text, voice, output_path)
+                    return self.cache.put(key, output_path)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if attempt == MAX_RETRIES:
+                        raise TTSError(f"{self.backend.name} failed after {attempt + 1} attempts: {e}")
+                    # Exponential backoff with jitter so retries don't stampede
+                    delay = 0.5 * (2 ** attempt) * (0.5 + random.random())
+                    print(f"⚠️  TTS chunk failed ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+        finally:
+            remove_quietly(output_path)
+
+    async def synthesize(self, text: str, voice: str = "male") -> str:
+        """Narration for `text` as a single audio file in the workspace"""
+        chunks = split_chunks(text)
+        if not chunks:
+            raise TTSError("Nothing to synthesize")
+        if len(chunks) == 1:
+            return await self._synthesize_chunk(chunks[0], voice, self.workdir)
+        key = tts_cache_key(text, voice, f"{self.backend.version}/joined")
+        return await self._cached(key, lambda: self._join(key, chunks, voice), self.workdir)
+
+    async def _join(self, key: str, chunks: List[str], voice: str) -> str:
+        staging = self.cache.staging_dir
+        parts = await asyncio.gather(*(self._synthesize_chunk(chunk, voice, staging) for chunk in chunks))
+        joined_path = self.cache.staging_path("wav")
+        try:
+            await stitch_audio(list(parts), joined_path)
+            return self.cache.put(key, joined_path)
+        finally:
+            for path in [*parts, joined_path]:
+                remove_quietly(path)
+
+
+def remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def stitch_audio(parts: List[str], output_path: str):
+    """Decode, resample to SAMPLE_RATE mono and concatenate with no gaps"""
+    cmd = ["-y"]
+    for part in parts:
+        cmd += ["-i", part]
+    normalise = "".join(
+        f"[{i}:a]aresample={SAMPLE_RATE},aformat=sample_fmts=s16:channel_layouts=mono[a{i}];"
+        for i in range(len(parts))
+    )
+    joined = "".join(f"[a{i}]" for i in range(len(parts)))
+    cmd += [
+        "-filter_complex", f"{normalise}{joined}concat=n={len(parts)}:v=0:a=1[out]",
+        "-map", "[out]",
+        "-c:a", "pcm_s16le",
+        output_path
+    ]
+    await run_ffmpeg(cmd)
@@ -1,128 +1,267 @@
 import os
-import subprocess
 import asyncio
-import uuid
-from PIL import Image, ImageDraw, ImageFont
-import numpy as np
-from services.ffmpeg_service import animate_single_image
+import shutil
+from typing import Optional
+from services.ffmpeg_runner import run_ffmpeg, ProgressCallback
+from services.ffmpeg_service import FFmpegService, animate_single_image
+from services.tts import TTSService
+from services.filtergraph import build_slideshow_graph, slideshow_duration
+from services.cpu_budget import cpu_budget
+from services.backgrounds import gradient_background
+from services.text_layout import caption_layout
+from services.motion import MOTION_ENGINES, zoompan_filter, crop_frames, frame_pix_fmt
+from services.hls import SEGMENT_SECONDS
+from services.profiles import EncodingProfile, DEFAULT_PROFILE
+
+# Put the moov atom first so players can seek before the whole file arrives
+FASTSTART = ['-movflags', '+faststart']
 
 class VideoService:
-    def __init__(self):
+    def __init__(self, temp_dir: str = "temp"):
         self.output_dir = "output"
-        self.temp_dir = "temp"
+        self.temp_dir = temp_dir
         os.makedirs(self.output_dir, exist_ok=True)
         os.makedirs(self.temp_dir, exist_ok=True)
     
-    async def create_placeholder_image(self, prompt: str, filename: str) -> str:
+    async def create_placeholder_image(
+        self,
+        prompt: str,
+        filename: str,
+        style: str = "cinematic",
+        size: tuple = (1080, 1920)
+    ) -> str:
         """Create simple image with text"""
-        width, height = 1080, 1920
+        image_path = f"{self.temp_dir}/{filename}.jpg"
+        # Pure CPU work: keep it off the event loop
+        await asyncio.to_thread(self._render_placeholder, prompt, image_path, style, size)
+        return image_path
+    
+    def _render_placeholder(self, prompt: str, image_path: str, style: str, size: tuple):
+        width, height = size
         
-        # Create gradient background
-        img = Image.new('RGB', (width, height), color='black')
-        draw = ImageDraw.Draw(img)
+        # Gradient background is rendered once per (style, size) and reused
+        img = gradient_background(style, width, height).copy()
+        caption_layout(prompt).draw(img)
         
-        # Add gradient
-        for i in range(height):
-            r = int(20 + (i / height) * 50)
-            g = int(40 + (i / height) * 60)
-            b = int(100 + (i / height) * 100)
-            draw.line([(0, i), (width, i)], fill=(r, g, b))
+        # Save
+        img.save(image_path)
+    
+    async def generate_simple_voice(self, text: str, voice_type: str = "male") -> str:
+        """Narration for `text` (see services/tts.py for backends and caching)"""
+        return await TTSService(self.temp_dir).synthesize(text, voice_type)
+    
+    async def create_ken_burns_video(
+        self,
+        image_path: str,
+        audio_path: str,
+        output_id: str,
+        on_progress: Optional[ProgressCallback] = None,
+        motion: str = "crop",
+        size: tuple = (1080, 1920),
+        fps: int = 30,
+        output_path: Optional[str] = None,
+        hls_playlist: Optional[str] = None,
+        hls_segment_pattern: Optional[str] = None,
+        profile: EncodingProfile = DEFAULT_PROFILE,
+        threads: Optional[int] = None
+    ) -> str:
+        """Slow zoom over a single image, lasting as long as the narration.
+
+        motion="crop" computes the crop windows up front and pipes frames to
+        the encoder as rawvideo; motion="zoompan" uses ffmpeg's zoompan filter.
+        With hls_playlist set, the same encode is also teed into HLS segments
+        so the scene can be watched while it renders. threads caps the
+        encoder's threads when several scenes encode at once.
+        """
+        if motion not in MOTION_ENGINES:
+            raise ValueError(f"Unknown motion engine: {motion}")
         
-        # Add text
-        try:
-            font = ImageFont.truetype("arial.ttf", 60)
-        except:
-            font = ImageFont.load_default()
+        duration = await FFmpegService.get_video_duration(audio_path) or 10
+        frames = int(duration * fps)
+        width, height = size
+        final_path = output_path or f"{self.output_dir}/{output_id}.mp4"
         
-        # Wrap text
-        lines = []
-        words = prompt.split()
-        current_line = ""
+        if motion == "zoompan":
+            video_input = [
+                '-loop', '1', '-framerate', str(fps), '-t', f"{duration:.3f}",
+                '-i', image_path
+            ]
+            video_filter = ['-vf', zoompan_filter(size, fps)]
+            stdin_chunks = None
+        else:
+            video_input = [
+                '-f', 'rawvideo', '-pix_fmt', frame_pix_fmt(),
+                '-s', f"{width}x{height}", '-framerate', str(fps),
+                '-i', 'pipe:0'
+            ]
+            video_filter = []
+            stdin_chunks = crop_frames(image_path, size, frames, fps)
         
-        for word in words:
-            test_line = f"{current_line} {word}".strip()
-            bbox = draw.textbbox((0, 0), test_line, font=font)
-            if bbox[2] < width - 100:
-                current_line = test_line
-            else:
-                lines.append(current_line)
-                current_line = word
-        if current_line:
-            lines.append(current_line)
+        # Keyframe every SEGMENT_SECONDS so HLS can cut segments there, either
+        # now (tee below) or later from a cached segment (segment_hls)
+        gop_args = ['-g', str(fps * SEGMENT_SECONDS), '-keyint_min', str(fps * SEGMENT_SECONDS),
+                    '-sc_threshold', '0']
+        if hls_playlist:
+            output_args = ['-f', 'tee', (
+                f"[f=mp4:movflags=+faststart]{final_path}|"
+                f"[f=hls:hls_time={SEGMENT_SECONDS}:hls_list_size=0:hls_playlist_type=event"
+                f":hls_segment_filename={hls_segment_pattern}]{hls_playlist}"
+            )]
+        else:
+            output_args = [*FASTSTART, final_path]
         
-        # Draw text
-        y_text = height // 2 - (len(lines) * 70) // 2
-        for line in lines:
-            bbox = draw.textbbox((0, 0), line, font=font)
-            text_width = bbox[2] - bbox[0]
-            x_text = (width - text_width) // 2
-            
-            # Shadow
-            draw.text((x_text+2, y_text+2), line, font=font, fill=(0, 0, 0))
-            # Main text
-            draw.text((x_text, y_text), line, font=font, fill=(255, 255, 255))
-            y_text += 70
+        await run_ffmpeg([
+            '-y',
+            *video_input,
+            '-i', audio_path,
+            *video_filter,
+            '-map', '0:v', '-map', '1:a',
+            '-frames:v', str(frames),
+            *profile.video_args(), *gop_args,
+            *(['-threads', str(threads)] if threads else []),
+            *profile.audio_args(),
+            '-shortest',
+            *output_args
+        ], duration=duration, on_progress=on_progress, stdin_chunks=stdin_chunks)
         
-        # Save
-        image_path = f"{self.temp_dir}/{filename}.jpg"
-        img.save(image_path)
-        return image_path
+        return final_path
     
-    async def generate_simple_voice(self, text: str, voice_type: str = "male") -> str:
-        """Generate voice using edge-tts or fallback"""
-        try:
-            import edge_tts
-            voice_map = {
-                "male": "en-US-ChristopherNeural",
-                "female": "en-US-JennyNeural",
-                "narrator": "en-GB-RyanNeural"
-            }
-            
-            voice = voice_map.get(voice_type, "en-US-ChristopherNeural")
-            output_path = f"{self.temp_dir}/voice_{uuid.uuid4().hex[:8]}.mp3"
-            
-            communicate = edge_tts.Communicate(text, voice)
-            await communicate.save(output_path)
-            
-            # Convert to WAV for FFmpeg
-            wav_path = output_path.replace('.mp3', '.wav')
-            self._convert_audio(output_path, wav_path)
-            return wav_path
-            
-        except ImportError:
-            # Fallback: create silent audio
-            return await self._create_silent_audio()
+    async def create_animated_video_from_images(
+        self,
+        images: list,
+        audio_path: str,
+        output_id: str,
+        seconds_per_image: float = 3,
+        transition: str = "fade",
+        on_progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """Motion, transitions, concat and audio mux in a single ffmpeg pass"""
+        fps = 30
+        graph, video_label = build_slideshow_graph(
+            len(images),
+            seconds_per_image=seconds_per_image,
+            fps=fps,
+            transition=transition
+        )
+        duration = slideshow_duration(len(images), seconds_per_image, transition, 0.5)
+        
+        cmd = ["-y"]
+        for img in images:
+            cmd += ["-i", img]
+        cmd += ["-i", audio_path]
+        cmd += [
+            "-filter_complex", graph,
+            "-map", f"[{video_label}]",
+            "-map", f"{len(images)}:a",
+            "-c:v", "libx264", "-preset", "veryfast",
+            "-c:a", "aac", "-b:a", "128k",
+            "-shortest",
+            *FASTSTART,
+            f"{self.output_dir}/{output_id}.mp4"
+        ]
+        await run_ffmpeg(cmd, duration=duration, on_progress=on_progress)
+        return f"{self.output_dir}/{output_id}.mp4"
     
-    def _convert_audio(self, input_path: str, output_path: str):
-        """Convert audio format"""
-        subprocess.run([
-            'ffmpeg', '-y', '-i', input_path,
-            '-acodec', 'pcm_s16le', '-ac', '1', '-ar', '16000',
-            output_path
-        ], capture_output=True)
+    async def create_animated_video_parallel(
+        self,
+        images: list,
+        audio_path: str,
+        output_id: str,
+        seconds_per_image: float = 3,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> str:
+        """Render scene clips concurrently, then stitch them with stream copy.
+
+        Each clip encoder runs single-threaded and holds one slot of the
+        process-wide CPU budget, so concurrent tasks share the cores instead
+        of oversubscribing them.
+        """
+        done = 0
+        
+        async def render_clip(i: int, img: str) -> str:
+            nonlocal done
+            clip_path = f"{self.temp_dir}/clip_{i}.mp4"
+            async with cpu_budget.reserve(1):
+                await animate_single_image(img, clip_path, duration=seconds_per_image, threads=1)
+            done += 1
+            if on_progress:
+                on_progress(done / len(images))
+            return clip_path
+        
+        clips = await asyncio.gather(*(render_clip(i, img) for i, img in enumerate(images)))
+        return await self._stitch_clips(list(clips), audio_path, output_id)
+    
+    async def segment_hls(self, segment_path: str, playlist: str, segment_pattern: str):
+        """HLS segments from an already-encoded scene, without re-encoding"""
+        await run_ffmpeg([
+            '-y', '-i', segment_path,
+            '-c', 'copy',
+            '-f', 'hls', '-hls_time', str(SEGMENT_SECONDS), '-hls_list_size', '0',
+            '-hls_playlist_type', 'event',
+            '-hls_segment_filename', segment_pattern,
+            playlist
+        ])
     
-    async def _create_silent_audio(self) -> str:
-        """Create silent audio as fallback"""
-        output_path = f"{self.temp_dir}/silent.wav"
-        # Create 10 seconds of silence
-        subprocess.run([
-            'ffmpeg', '-y', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=stereo',
-            '-t', '10', output_path
-        ], capture_output=True)
-        return output_path
+    async def concat_segments(self, segments: list, output_id: str) -> str:
+        """Join finished audio+video segments losslessly.
+
+        The output never shares an inode with a scene segment: those may be
+        hard links into the scene cache, whose hits touch the file's mtime
+        and would change the delivered video's ETag and Last-Modified.
+        """
+        final_path = f"{self.output_dir}/{output_id}.mp4"
+        if len(segments) == 1:
+            await asyncio.to_thread(shutil.copyfile, segments[0], final_path)
+            return final_path
+        
+        concat_path = f"{self.temp_dir}/segments.txt"
+        with open(concat_path, "w") as f:
+            for segment in segments:
+                f.write(f"file '{os.path.abspath(segment)}'\n")
+        
+        await run_ffmpeg([
+            "-y",
+            "-f", "concat", "-safe", "0", "-i", concat_path,
+            "-c", "copy",
+            *FASTSTART,
+            final_path
+        ])
+        return final_path
+    
+    async def _stitch_clips(self, clips: list, audio_path: str, output_id: str) -> str:
+        """Concat identically-encoded clips and add audio without re-encoding video"""
+        concat_path = f"{self.temp_dir}/clips.txt"
+        with open(concat_path, "w") as f:
+            for c in clips:
+                f.write(f"file '{os.path.abspath(c)}'\n")
+        
+        final_path = f"{self.output_dir}/{output_id}.mp4"
+        await run_ffmpeg([
+            "-y",
+            "-f", "concat", "-safe", "0", "-i", concat_path,
+            "-i", audio_path,
+            "-map", "0:v", "-map", "1:a",
+            "-c:v", "copy",
+            "-c:a", "aac", "-b:a", "128k",
+            "-shortest",
+            *FASTSTART,
+            final_path
+        ])
+        return final_path
     
-    def create_animated_video_from_images(
+    async def create_animated_video_multipass(
         self,
         images: list,
         audio_path: str,
         output_id: str
     ) -> str:
+        """Original clip-per-image renderer, kept for benchmarking"""
         clips = []
 
         # 1. Animate each image into a clip
         for i, img in enumerate(images):
             clip_path = f"{self.temp_dir}/clip_{i}.mp4"
-            animate_single_image(img, clip_path)
+            await animate_single_image(img, clip_path)
             clips.append(clip_path)
 
         # 2. Create concat file
@@ -133,31 +272,31 @@ class VideoService:
 
         # 3. Concatenate clips (no audio yet)
         silent_video = f"{self.temp_dir}/video_no_audio.mp4"
-        subprocess.run([
-            "ffmpeg", "-y",
+        await run_ffmpeg([
+            "-y",
             "-f", "concat",
             "-safe", "0",
             "-i", concat_path,
             "-c", "copy",
             silent_video
-        ], check=True)
+        ])
 
         # 4. Merge audio
         final_path = f"{self.output_dir}/{output_id}.mp4"
-        subprocess.run([
-            "ffmpeg", "-y",
+        await run_ffmpeg([
+            "-y",
             "-i", silent_video,
             "-i", audio_path,
             "-shortest",
             final_path
-        ], check=True)
+        ])
 
         return final_path
     
-    def _create_fallback_video(self, image_path: str, audio_path: str, output_path: str):
+    async def _create_fallback_video(self, image_path: str, audio_path: str, output_path: str):
         """Simple fallback video"""
         cmd = [
-            'ffmpeg', '-y',
+            '-y',
             '-loop', '1',
             '-i', image_path,
             '-i', audio_path,
@@ -165,6 +304,7 @@ class VideoService:
             '-c:v', 'libx264',
             '-c:a', 'aac',
             '-shortest',
+            *FASTSTART,
             output_path
         ]
-        subprocess.run(cmd, capture_output=True)
+        await run_ffmpeg(cmd, duration=10)
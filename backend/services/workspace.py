@@ -0,0 +1,24 @@
+import os
+import shutil
+
+
+class TaskWorkspace:
+    """Private scratch directory for one task, removed when the task ends.
+
+    Set KEEP_TEMP=1 to leave workspaces behind for debugging.
+    """
+
+    def __init__(self, task_id: str, root: str = "temp"):
+        self.path = os.path.join(root, f"task_{task_id}")
+
+    def file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def __enter__(self) -> "TaskWorkspace":
+        os.makedirs(self.path, exist_ok=True)
+        return self
+
+    def __exit__(self, *exc):
+        if os.getenv("KEEP_TEMP") != "1":
+            shutil.rmtree(self.path, ignore_errors=True)
+        return False
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import os
+
+import pytest
+from starlette.testclient import TestClient
+
+import bulk_render
+from benchmarks.loadtest import StubCosts, StubVideoService
+from services.progress_bus import ProgressBus
+
+@pytest.fixture(scope="module")
+def main(tmp_path_factory):
+    """The app in a scratch working directory, rendering with StubVideoService"""
+    patch = pytest.MonkeyPatch()
+    patch.chdir(tmp_path_factory.mktemp("app"))
+    patch.setenv("TASK_STORE", "memory")
+    patch.setenv("TTS_BACKEND", "silence")
+    patch.delenv("JOB_QUEUE", raising=False)
+    import main
+    costs = StubCosts(tts_ms=10, image_ms=1, encode_ms=40, cpu_ms=0, video_bytes=1024)
+    patch.setattr(main, "video_service_factory", lambda temp_dir: StubVideoService(temp_dir, costs))
+    yield main
+    patch.undo()
+
+@pytest.fixture
+def client(main):
+    with TestClient(main.app) as client:
+        yield client
+
+def orphan(main, task_id: str, owner: str):
+    request = main.VideoRequest(script=f"Recovered render {task_id}.", progressive=False)
+    main.tasks.create(task_id, {
+        "status": "processing",
+        "progress": 40,
+        "message": "Rendering...",
+        "request": request.dict(),
+        "cache_key": main.request_key(request.dict()),
+        "owner": owner,
+        "error": None
+    })
+
+# ========== RECOVERY ==========
+def test_owner_alive(main):
+    host = os.uname().nodename
+    assert main.owner_alive(main.WORKER_ID)
+    # Same host and PID as us but another boot: a crashed predecessor
+    assert not main.owner_alive(f"{host}:{os.getpid()}:0badc0de")
+    assert not main.owner_alive(f"{host}:{os.getpid()}")
+    assert main.owner_alive(f"{host}:{os.getppid()}:0badc0de")
+    assert main.owner_alive(f"elsewhere:{os.getpid()}:0badc0de")
+    assert not main.owner_alive(None)
+
+def test_restart_recovers_tasks_of_a_predecessor_with_our_pid(main, client):
+    orphan(main, "orphaned", f"{os.uname().nodename}:{os.getpid()}:0badc0de")
+    orphan(main, "alive", main.WORKER_ID)
+    client.portal.call(main.recover_orphaned_tasks)
+    assert main.tasks.get("orphaned")["owner"] == main.WORKER_ID
+    assert main.tasks.get("orphaned")["status"] in ("queued", "processing", "completed")
+    assert main.tasks.get("alive")["status"] == "processing"
+    main.tasks.delete("alive")
+
+# ========== EVENTS ==========
+def sse_events(text: str):
+    """(event, data) pairs of a text/event-stream body; comments are skipped"""
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+def test_progress_bus_keeps_the_latest_snapshots_for_slow_readers():
+    async def run():
+        bus = ProgressBus(queue_size=2)
+        queue = bus.subscribe("t1")
+        for progress in range(5):
+            bus.publish("t1", {"progress": progress})
+        received = [queue.get_nowait()["progress"] for _ in range(queue.qsize())]
+        bus.unsubscribe("t1", queue)
+        bus.unsubscribe("t1", queue)  # a second unsubscribe is harmless
+        return received, bus.has_subscribers("t1")
+    assert asyncio.run(run()) == ([3, 4], False)
+
+def test_events_stream_until_the_task_ends(main, client):
+    task_id = client.post("/api/generate", json={"script": "Streaming test. Two scenes here.",
+                                                  "progressive": False}).json()["task_id"]
+    response = client.get(f"/api/status/{task_id}/events")
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = sse_events(response.text)
+    assert {name for name, _ in events} == {"status"}
+    statuses = [data["status"] for _, data in events]
+    assert statuses[-1] == "completed"
+    assert statuses.count("completed") == 1
+    progress = [data["progress"] for _, data in events]
+    assert progress == sorted(progress) and progress[-1] == 100
+    assert events[-1][1]["video_url"].startswith("/output/video_")
+    assert main.progress_bus.subscriber_count == 0
+
+def test_events_of_unknown_task_are_404(client):
+    assert client.get("/api/status/missing/events").status_code == 404
+
+def test_subscriber_is_removed_when_the_client_disconnects(main):
+    main.tasks.create("listening", {"status": "processing", "progress": 10, "message": "Rendering..."})
+
+    async def run():
+        response = await main.stream_status("listening")
+        first = await response.body_iterator.__anext__()
+        subscribed = main.progress_bus.subscriber_count
+        main.update_task("listening", progress=20)
+        second = await response.body_iterator.__anext__()
+        await response.body_iterator.aclose()  # what Starlette does on disconnect
+        return first, second, subscribed
+
+    first, second, subscribed = asyncio.run(run())
+    assert sse_events(first)[0][1]["progress"] == 10
+    assert sse_events(second)[0][1]["progress"] == 20
+    assert subscribed == 1
+    assert main.progress_bus.subscriber_count == 0
+    assert not main.progress_bus.has_subscribers("listening")
+    main.tasks.delete("listening")
+
+# ========== BATCHES ==========
+def ndjson(text: str):
+    return [json.loads(line) for line in text.splitlines() if line]
+
+def test_batch_dedups_items_and_streams_results(main, client, monkeypatch):
+    monkeypatch.setattr(main, "BATCH_POLL_SECONDS", 0.02)
+    item = {"script": "Batch item one. It repeats.", "progressive": False}
+    other = {"script": "Batch item two. It does not.", "progressive": False}
+    response = client.post("/api/generate/batch", json={"items": [item, other, item]})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    header, *results, summary = ndjson(response.text)
+
+    assert header["type"] == "batch"
+    assert (header["count"], header["renders"]) == (3, 2)
+    first, second, duplicate = header["items"]
+    assert duplicate["task_id"] == first["task_id"] != second["task_id"]
+    assert duplicate["message"] == "Attached to an identical render in progress"
+
+    assert sorted(result["index"] for result in results) == [0, 1, 2]
+    assert all(result["type"] == "result" and result["status"] == "completed" for result in results)
+    assert summary["type"] == "summary"
+    assert (summary["count"], summary["completed"], summary["rendered"]) == (3, 3, 2)
+    assert summary["videos_per_minute"] > 0
+
+    # Asked again, everything comes from the render cache: nothing rendered
+    header, *results, summary = ndjson(client.post("/api/generate/batch", json={"items": [item]}).text)
+    assert header["renders"] == 0
+    assert (summary["cached"], summary["rendered"], summary["videos_per_minute"]) == (1, 0, 0)
+
+def test_batch_items_waiting_for_the_feeder_have_positions_and_can_be_cancelled(main, client, monkeypatch):
+    monkeypatch.setattr(main, "BATCH_POLL_SECONDS", 0.02)
+    items = [main.VideoRequest(script=f"Waiting item {i}. Still waiting.", progressive=False) for i in range(3)]
+
+    async def run():
+        header, results = await main.start_batch(main.BatchRequest(items=items))
+        task_ids = [item["task_id"] for item in header["items"]]
+        # The feeder has not run yet: every item is still waiting on it
+        depth = main.scheduler.queue_depth
+        positions = [main.queue_position(task_id) for task_id in task_ids]
+        waits = [main.queue_wait(task_id) for task_id in task_ids]
+        cancelled = await main.cancel_task(task_ids[1])
+        shifted = main.queue_position(task_ids[2])
+        records = [record async for record in results]
+        return depth, positions, waits, cancelled, shifted, records
+
+    depth, positions, waits, cancelled, shifted, records = client.portal.call(run)
+    assert positions == [depth + 1, depth + 2, depth + 3]
+    assert waits[0] < waits[1] < waits[2]  # each waits for the estimates ahead of it
+    assert cancelled["status"] == "cancelled"
+    assert shifted == depth + 2
+    statuses = {record["index"]: record["status"] for record in records if record["type"] == "result"}
+    assert statuses == {0: "completed", 1: "cancelled", 2: "completed"}
+    summary = records[-1]
+    assert (summary["rendered"], summary["cancelled"]) == (2, 1)
+    assert not main.batch_waiting
+
+# ========== BULK RENDER ==========
+def write_jsonl(path, records):
+    path.write_text("\n".join(json.dumps(record) for record in records) + "\n")
+    return str(path)
+
+def test_bulk_records_use_script_then_body(main, tmp_path):
+    path = write_jsonl(tmp_path / "items.jsonl", [
+        {"id": "a", "script": "From the script.", "body": "Ignored.", "style": ["reels"], "title": "extra"},
+        {"request_id": "b", "body": "From the body."},
+        {"title": "nothing to say"},
+    ])
+    items, labels = bulk_render.load_records(path, "draft")
+    assert labels == ["a", "b"]
+    assert items == [
+        {"script": "From the script.", "style": ["reels"], "profile": "draft"},
+        {"script": "From the body.", "profile": "draft"},
+    ]
+
+def test_bulk_long_scripts_are_skipped_or_truncated(main, tmp_path, capsys):
+    long_body = "word " * 300  # 1500 chars
+    path = write_jsonl(tmp_path / "items.jsonl", [{"id": "long", "body": long_body}, {"id": "ok", "body": "Short."}])
+
+    items, labels = bulk_render.load_records(path, None)
+    assert labels == ["ok"]
+    assert "Line 1 (long): body is 1499 chars (max 1000), skipped" in capsys.readouterr().err
+
+    items, labels = bulk_render.load_records(path, None, truncate=True)
+    assert labels == ["long", "ok"]
+    assert len(items[0]["script"]) <= bulk_render.MAX_SCRIPT_CHARS
+    assert items[0]["script"].split() == ["word"] * len(items[0]["script"].split())
+    assert "Line 1 (long): body cut from 1499 to" in capsys.readouterr().err
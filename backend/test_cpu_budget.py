@@ -0,0 +1,72 @@
+import asyncio
+
+from services.cpu_budget import ResourceBudget
+
+GB = 1024 ** 3
+
+async def hold(budget: ResourceBudget, name: str, cores: int, memory: int, log: list, seconds=0.02):
+    async with budget.reserve(cores, memory):
+        log.append(("start", name))
+        await asyncio.sleep(seconds)
+        log.append(("end", name))
+
+def starts_before_end(log: list, first: str, second: str) -> bool:
+    """Did `second` start while `first` was still running?"""
+    return log.index(("start", second)) < log.index(("end", first))
+
+def test_renders_that_fit_run_together():
+    async def run():
+        budget, log = ResourceBudget(4, 4 * GB), []
+        await asyncio.gather(hold(budget, "a", 2, GB, log), hold(budget, "b", 2, GB, log))
+        return log
+    assert starts_before_end(asyncio.run(run()), "a", "b")
+
+def test_cores_limit_admission():
+    async def run():
+        budget, log = ResourceBudget(4, 4 * GB), []
+        await asyncio.gather(hold(budget, "a", 3, GB, log), hold(budget, "b", 2, GB, log))
+        return log
+    assert not starts_before_end(asyncio.run(run()), "a", "b")
+
+def test_memory_limits_admission():
+    async def run():
+        budget, log = ResourceBudget(8, 4 * GB), []
+        await asyncio.gather(hold(budget, "a", 1, 3 * GB, log), hold(budget, "b", 1, 2 * GB, log))
+        return log
+    assert not starts_before_end(asyncio.run(run()), "a", "b")
+
+def test_waiters_are_served_in_arrival_order():
+    async def run():
+        budget, log = ResourceBudget(4, 4 * GB), []
+        running = asyncio.create_task(hold(budget, "running", 2, GB, log, seconds=0.05))
+        await asyncio.sleep(0)
+        big = asyncio.create_task(hold(budget, "big", 4, GB, log))
+        await asyncio.sleep(0)
+        # Would fit next to "running", but must not overtake "big"
+        small = asyncio.create_task(hold(budget, "small", 1, GB, log))
+        await asyncio.gather(running, big, small)
+        return log
+    log = asyncio.run(run())
+    assert log.index(("start", "big")) < log.index(("start", "small"))
+    assert not starts_before_end(log, "running", "big")
+
+def test_oversized_request_is_clamped_and_runs_alone():
+    async def run():
+        budget, log = ResourceBudget(2, GB), []
+        await asyncio.gather(hold(budget, "huge", 16, 8 * GB, log), hold(budget, "next", 1, GB // 2, log))
+        return budget, log
+    budget, log = asyncio.run(run())
+    assert not starts_before_end(log, "huge", "next")
+    assert budget.cores_in_use == 0 and budget.memory_in_use == 0
+
+def test_reservation_is_released_on_error():
+    async def run():
+        budget = ResourceBudget(2, GB)
+        try:
+            async with budget.reserve(2, GB):
+                raise RuntimeError("render failed")
+        except RuntimeError:
+            pass
+        return budget
+    budget = asyncio.run(run())
+    assert budget.cores_in_use == 0 and budget.memory_in_use == 0
@@ -0,0 +1,92 @@
+import os
+
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from services.delivery import MediaResponse, parse_range, resolve_media_path
+
+# ========== parse_range ==========
+def test_parse_range_closed_and_open_ended():
+    assert parse_range("bytes=0-99", 1000) == [(0, 99)]
+    assert parse_range("bytes=500-", 1000) == [(500, 999)]
+    # A last byte past the end is clamped to the file
+    assert parse_range("bytes=900-5000", 1000) == [(900, 999)]
+
+def test_parse_range_suffix():
+    assert parse_range("bytes=-100", 1000) == [(900, 999)]
+    # Asking for more than the file gives the whole file
+    assert parse_range("bytes=-5000", 1000) == [(0, 999)]
+    assert parse_range("bytes=-0", 1000) == []
+
+def test_parse_range_unsatisfiable():
+    assert parse_range("bytes=1000-", 1000) == []
+    assert parse_range("bytes=2000-3000", 1000) == []
+
+def test_parse_range_ignored_headers():
+    for header in ("items=0-10", "bytes=", "bytes=abc-10", "bytes=10", "bytes=50-10"):
+        assert parse_range(header, 1000) is None, header
+
+def test_parse_range_multiple():
+    assert parse_range("bytes=0-9, 20-29", 1000) == [(0, 9), (20, 29)]
+
+def test_resolve_media_path_stays_under_root(tmp_path):
+    root = str(tmp_path)
+    assert resolve_media_path(root, "video_1.mp4") == os.path.join(root, "video_1.mp4")
+    assert resolve_media_path(root, "../secret.mp4") is None
+    assert resolve_media_path(root, "notes.txt") is None
+
+# ========== MediaResponse ==========
+BODY = bytes(range(256)) * 4  # 1024 bytes
+
+def media_client(tmp_path) -> TestClient:
+    path = tmp_path / "video.mp4"
+    path.write_bytes(BODY)
+
+    async def serve(request):
+        return MediaResponse(str(path), os.stat(path))
+
+    return TestClient(Starlette(routes=[Route("/video.mp4", serve, methods=["GET", "HEAD"])]))
+
+def test_full_response(tmp_path):
+    response = media_client(tmp_path).get("/video.mp4")
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-type"] == "video/mp4"
+
+def test_range_response(tmp_path):
+    response = media_client(tmp_path).get("/video.mp4", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == BODY[10:20]
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+
+def test_suffix_range_response(tmp_path):
+    response = media_client(tmp_path).get("/video.mp4", headers={"Range": "bytes=-24"})
+    assert response.status_code == 206
+    assert response.content == BODY[-24:]
+
+def test_unsatisfiable_range_is_416(tmp_path):
+    response = media_client(tmp_path).get("/video.mp4", headers={"Range": "bytes=4096-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+    assert response.content == b""
+
+def test_malformed_range_sends_whole_file(tmp_path):
+    response = media_client(tmp_path).get("/video.mp4", headers={"Range": "bytes=oops"})
+    assert response.status_code == 200
+    assert response.content == BODY
+
+def test_conditional_get(tmp_path):
+    client = media_client(tmp_path)
+    etag = client.get("/video.mp4").headers["etag"]
+    assert client.get("/video.mp4", headers={"If-None-Match": etag}).status_code == 304
+    # A stale If-Range validator means the whole (changed) file, not the range
+    response = client.get("/video.mp4", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert response.status_code == 200
+
+def test_head_has_length_but_no_body(tmp_path):
+    response = media_client(tmp_path).head("/video.mp4")
+    assert response.status_code == 200
+    assert response.headers["content-length"] == "1024"
+    assert response.content == b""
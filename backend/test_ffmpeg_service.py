@@ -0,0 +1,15 @@
+from services.ffmpeg_service import RENDITION_LADDER, fit_ladder
+
+def rungs(names, source):
+    return [(r.name, r.frame_size(source)) for r in fit_ladder([RENDITION_LADDER[n] for n in names], source)]
+
+def test_fit_ladder_drops_rungs_larger_than_the_source():
+    assert rungs(["1080p", "720p", "480p"], (1280, 720)) == [("720p", (1280, 720)), ("480p", (852, 480))]
+
+def test_fit_ladder_never_upscales_a_small_source():
+    # A draft render (432x768) is smaller than every rung: keep the smallest at source size
+    assert rungs(["1080p", "mobile", "720p"], (432, 768)) == [("mobile", (432, 768))]
+    assert fit_ladder([RENDITION_LADDER["mobile"]], (432, 768))[0].size_targeted
+
+def test_fit_ladder_empty():
+    assert fit_ladder([], (1920, 1080)) == []
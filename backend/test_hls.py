@@ -0,0 +1,76 @@
+from services.hls import TARGET_DURATION, ProgressivePlaylist
+
+def write_scene(playlist: ProgressivePlaylist, index: int, durations, ended: bool = False):
+    """What the scene encoder's HLS muxer leaves on disk"""
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:2", "#EXT-X-MEDIA-SEQUENCE:0",
+             "#EXT-X-PLAYLIST-TYPE:EVENT"]
+    for i, seconds in enumerate(durations):
+        lines += [f"#EXTINF:{seconds},", f"s{index}_{i:03d}.ts"]
+    if ended:
+        lines.append("#EXT-X-ENDLIST")
+    with open(playlist.scene_playlist(index), "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+def index_lines(playlist: ProgressivePlaylist):
+    with open(playlist.index_path) as f:
+        return f.read().splitlines()
+
+def media_lines(playlist: ProgressivePlaylist):
+    """Everything between the header and the optional ENDLIST"""
+    return [line for line in index_lines(playlist)[5:] if line != "#EXT-X-ENDLIST"]
+
+def test_nothing_is_written_before_the_first_segment(tmp_path):
+    playlist = ProgressivePlaylist(str(tmp_path), scene_count=2)
+    assert playlist.refresh() == 0
+    assert not (tmp_path / "index.m3u8").exists()
+
+def test_first_scene_is_published_while_it_encodes(tmp_path):
+    playlist = ProgressivePlaylist(str(tmp_path), scene_count=2)
+    write_scene(playlist, 0, [2.0])
+    assert playlist.refresh() == 1
+    lines = index_lines(playlist)
+    assert lines[:5] == ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{TARGET_DURATION}",
+                         "#EXT-X-MEDIA-SEQUENCE:0", "#EXT-X-PLAYLIST-TYPE:EVENT"]
+    assert media_lines(playlist) == ["#EXTINF:2.000,", "s0_000.ts"]
+    assert "#EXT-X-ENDLIST" not in lines
+
+def test_later_scene_waits_for_earlier_ones(tmp_path):
+    playlist = ProgressivePlaylist(str(tmp_path), scene_count=2)
+    write_scene(playlist, 0, [2.0])
+    write_scene(playlist, 1, [2.0, 1.5], ended=True)  # scene 1 finished first
+    playlist.mark_finished(1)
+    assert playlist.refresh() == 1
+    assert "s1_000.ts" not in media_lines(playlist)
+
+def test_scenes_are_joined_with_discontinuities(tmp_path):
+    playlist = ProgressivePlaylist(str(tmp_path), scene_count=3)
+    write_scene(playlist, 0, [2.0, 0.8], ended=True)
+    write_scene(playlist, 1, [2.0], ended=True)
+    write_scene(playlist, 2, [1.25], ended=True)
+    for index in range(3):
+        playlist.mark_finished(index)
+    assert playlist.refresh() == 4
+    assert media_lines(playlist) == [
+        "#EXTINF:2.000,", "s0_000.ts",
+        "#EXTINF:0.800,", "s0_001.ts",
+        "#EXT-X-DISCONTINUITY",
+        "#EXTINF:2.000,", "s1_000.ts",
+        "#EXT-X-DISCONTINUITY",
+        "#EXTINF:1.250,", "s2_000.ts",
+    ]
+
+def test_endlist_only_when_ended(tmp_path):
+    playlist = ProgressivePlaylist(str(tmp_path), scene_count=1)
+    write_scene(playlist, 0, [2.0], ended=True)
+    playlist.mark_finished(0)
+    playlist.refresh()
+    assert index_lines(playlist)[-1] != "#EXT-X-ENDLIST"
+    assert playlist.refresh(ended=True) == 1
+    assert index_lines(playlist)[-1] == "#EXT-X-ENDLIST"
+    # The scene's own ENDLIST never leaks into the merged playlist
+    assert index_lines(playlist).count("#EXT-X-ENDLIST") == 1
+
+def test_ended_without_segments_still_closes_the_playlist(tmp_path):
+    playlist = ProgressivePlaylist(str(tmp_path), scene_count=1)
+    assert playlist.refresh(ended=True) == 0
+    assert index_lines(playlist)[-1] == "#EXT-X-ENDLIST"
@@ -0,0 +1,66 @@
+import os
+import time
+
+from services.janitor import StorageArea, StorageJanitor
+
+NOW = time.time()
+HOUR = 3600
+
+def make(path, name: str, size: int, age: float) -> str:
+    full = os.path.join(path, name)
+    with open(full, "wb") as f:
+        f.write(b"x" * size)
+    os.utime(full, (NOW - age, NOW - age))
+    return full
+
+def janitor(tmp_path, ttl=24 * HOUR, max_bytes=10_000, grace=600, **kwargs) -> StorageJanitor:
+    area = StorageArea("output", str(tmp_path), ttl=ttl, max_bytes=max_bytes, keep=("render_cache",))
+    j = StorageJanitor([area], grace=grace, **kwargs)
+    j.scan()
+    return j
+
+def victims(j: StorageJanitor) -> list:
+    return sorted(a.key for a in j._victims("output", NOW))
+
+def test_expired_artifacts_are_removed(tmp_path):
+    make(tmp_path, "video_old.mp4", 10, age=48 * HOUR)
+    make(tmp_path, "video_new.mp4", 10, age=HOUR)
+    assert victims(janitor(tmp_path)) == ["video_old"]
+
+def test_over_budget_evicts_least_recently_used_first(tmp_path):
+    make(tmp_path, "video_a.mp4", 4000, age=5 * HOUR)
+    make(tmp_path, "video_b.mp4", 4000, age=4 * HOUR)
+    make(tmp_path, "video_c.mp4", 4000, age=3 * HOUR)
+    # 12000 bytes against 10000: dropping the oldest is enough
+    assert victims(janitor(tmp_path)) == ["video_a"]
+
+def test_grace_period_protects_fresh_artifacts(tmp_path):
+    make(tmp_path, "video_a.mp4", 8000, age=60)
+    make(tmp_path, "video_b.mp4", 8000, age=120)
+    assert victims(janitor(tmp_path)) == []
+
+def test_touch_counts_as_access(tmp_path):
+    make(tmp_path, "video_a.mp4", 6000, age=5 * HOUR)
+    make(tmp_path, "video_b.mp4", 6000, age=4 * HOUR)
+    assert victims(janitor(tmp_path)) == ["video_a"]
+    j = janitor(tmp_path)
+    j.touch("output", "video_a")
+    # video_a was just watched, so the older video_b makes room instead
+    assert victims(j) == ["video_b"]
+
+def test_busy_and_kept_artifacts_survive(tmp_path):
+    make(tmp_path, "video_busy.mp4", 10, age=48 * HOUR)
+    make(tmp_path, "video_idle.mp4", 10, age=48 * HOUR)
+    make(tmp_path, "render_cache.json", 10, age=48 * HOUR)
+    j = janitor(tmp_path, is_busy=lambda area, key: key == "video_busy")
+    assert victims(j) == ["video_idle"]
+
+def test_files_sharing_a_stem_are_one_artifact(tmp_path):
+    make(tmp_path, "video_x.mp4", 100, age=48 * HOUR)
+    os.mkdir(tmp_path / "video_x")
+    make(tmp_path / "video_x", "seg_0.ts", 50, age=48 * HOUR)
+    os.utime(tmp_path / "video_x", (NOW - 48 * HOUR, NOW - 48 * HOUR))
+    j = janitor(tmp_path)
+    removed = j.collect(NOW)
+    assert [(area, artifact.key, artifact.size) for area, artifact in removed] == [("output", "video_x", 150)]
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,110 @@
+import sqlite3
+
+import pytest
+
+from services.job_queue import MAX_ATTEMPTS, SQLiteJobQueue
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    yield queue
+    queue.close()
+
+def test_lease_takes_most_urgent_first(queue):
+    queue.enqueue("low", {"script": "a"}, "low")
+    queue.enqueue("normal-1", {"script": "b"})
+    queue.enqueue("high", {"script": "c"}, "high")
+    queue.enqueue("normal-2", {"script": "d"})
+    leased = [queue.lease("w1").task_id for _ in range(4)]
+    assert leased == ["high", "normal-1", "normal-2", "low"]
+    assert queue.lease("w1") is None
+
+def test_lease_returns_payload_and_counts_attempts(queue):
+    queue.enqueue("t1", {"script": "hello"})
+    job = queue.lease("w1")
+    assert job.payload == {"script": "hello"}
+    assert job.attempts == 1
+    assert queue.counts() == (0, 1)
+
+def test_heartbeat_keeps_lease(queue):
+    queue.enqueue("t1", {})
+    queue.lease("w1", seconds=60)
+    assert queue.heartbeat("t1", "w1") == "ok"
+    assert queue.requeue_expired() == ([], [])
+
+def test_expired_lease_is_reclaimed_by_another_worker(queue):
+    queue.enqueue("t1", {})
+    queue.lease("w1", seconds=-1)  # already past its lease
+    assert queue.requeue_expired() == (["t1"], [])
+
+    job = queue.lease("w2")
+    assert job.task_id == "t1"
+    assert job.attempts == 2
+    # The stalled worker finds out it no longer owns the job
+    assert queue.heartbeat("t1", "w1") == "lost"
+    queue.complete("t1", "w1")  # no effect: not w1's job any more
+    assert queue.counts() == (0, 1)
+    queue.complete("t1", "w2")
+    assert queue.counts() == (0, 0)
+
+def test_job_fails_after_max_attempts(queue):
+    queue.enqueue("t1", {})
+    for attempt in range(MAX_ATTEMPTS - 1):
+        queue.lease(f"w{attempt}", seconds=-1)
+        assert queue.requeue_expired() == (["t1"], [])
+    queue.lease("last", seconds=-1)
+    assert queue.requeue_expired() == ([], ["t1"])
+    assert queue.counts() == (0, 0)
+
+def test_release_does_not_count_as_attempt(queue):
+    queue.enqueue("t1", {})
+    queue.lease("w1")
+    queue.release("t1", "w1")
+    assert queue.counts() == (1, 0)
+    assert queue.lease("w2").attempts == 1
+
+def test_cancel_queued_and_leased(queue):
+    queue.enqueue("queued", {})
+    queue.enqueue("running", {}, "high")
+    queue.lease("w1")
+    assert queue.cancel("queued") is True
+    assert queue.cancel("running") is True
+    assert queue.cancel("unknown") is False
+    assert queue.heartbeat("running", "w1") == "cancelled"
+    assert queue.lease("w1") is None
+
+def test_position_and_work_ahead(queue):
+    queue.enqueue("a", {}, estimate=10)
+    queue.enqueue("b", {}, estimate=5)
+    queue.enqueue("c", {})  # no estimate: the default is used
+    assert [queue.position(t) for t in ("a", "b", "c")] == [1, 2, 3]
+    assert queue.work_ahead("a") == 0
+    assert queue.work_ahead("c", default_seconds=30) == 15
+    assert queue.work_ahead(default_seconds=30) == 45
+
+    queue.lease("w1")  # "a" starts; its remaining estimate still counts
+    assert queue.position("a") is None
+    assert queue.work_ahead("a") is None
+    assert 9 < queue.work_ahead("b") <= 10
+
+def test_live_slots(queue):
+    queue.register_worker("w1", 2)
+    queue.register_worker("w2", 3)
+    assert queue.live_slots() == 5
+    queue.unregister_worker("w1")
+    assert queue.live_slots() == 3
+    assert queue.live_slots(max_age=-1) == 0
+
+def test_opens_queues_created_before_estimates(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, task_id TEXT NOT NULL UNIQUE, "
+        "rank INTEGER NOT NULL, priority TEXT NOT NULL, payload TEXT NOT NULL, state TEXT NOT NULL, "
+        "worker TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0)"
+    )
+    conn.close()
+    queue = SQLiteJobQueue(path)
+    queue.enqueue("t1", {}, estimate=3)
+    assert queue.work_ahead() == 3
+    queue.close()
@@ -0,0 +1,114 @@
+import asyncio
+import os
+
+import pytest
+
+from benchmarks.loadtest import StubCosts, StubVideoService
+from services import pipeline as pipeline_module
+from services.cpu_budget import CPUBudget
+from services.pipeline import MIN_SCENE_CHARS, PipelineSettings, ScenePipeline, split_scenes
+from services.video_service import VideoService
+
+def test_split_scenes_one_scene_per_sentence():
+    script = ("The ocean covers most of our planet. It holds countless species we have never seen! "
+              "Why do we know so little about it?")
+    assert split_scenes(script) == [
+        "The ocean covers most of our planet.",
+        "It holds countless species we have never seen!",
+        "Why do we know so little about it?",
+    ]
+
+def test_split_scenes_merges_short_sentences_forward():
+    scenes = split_scenes("Wow. Really. The ocean covers most of our planet and more.", min_chars=20)
+    assert scenes == ["Wow. Really. The ocean covers most of our planet and more."]
+
+def test_split_scenes_folds_short_tail_into_last_scene():
+    scenes = split_scenes("The ocean covers most of our planet. Truly.", min_chars=20)
+    assert scenes == ["The ocean covers most of our planet. Truly."]
+
+def test_split_scenes_short_script_is_one_scene():
+    assert split_scenes("Hi.") == ["Hi."]
+    assert len("Hi.") < MIN_SCENE_CHARS
+
+def test_split_scenes_ignores_whitespace():
+    assert split_scenes("   ") == []
+    assert split_scenes("  First sentence here, long enough.\n\n  Second one, also long enough.  ") == [
+        "First sentence here, long enough.",
+        "Second one, also long enough.",
+    ]
+
+def test_single_segment_output_does_not_share_the_cached_inode(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cached = tmp_path / "cached.mp4"
+    cached.write_bytes(b"segment")
+    segment = tmp_path / "scene_0.mp4"
+    os.link(cached, segment)  # what SceneCache.fetch hands the pipeline
+
+    final_path = asyncio.run(VideoService(str(tmp_path / "work")).concat_segments([str(segment)], "video_1"))
+    before = os.stat(final_path)
+    os.utime(cached, ns=(0, 0))  # a later cache hit touching the entry
+    after = os.stat(final_path)
+    assert after.st_ino != os.stat(cached).st_ino
+    assert after.st_mtime_ns == before.st_mtime_ns
+    assert open(final_path, "rb").read() == b"segment"
+
+# ========== scene encoders ==========
+class CountingVideoService(StubVideoService):
+    """Stub renderer that records how many scene encodes overlap"""
+
+    def __init__(self, temp_dir: str, fail_scene=None):
+        super().__init__(temp_dir, StubCosts(tts_ms=1, image_ms=0, encode_ms=20, cpu_ms=0))
+        self.fail_scene = fail_scene
+        self.running = self.peak = 0
+        self.threads = []
+
+    async def create_ken_burns_video(self, *args, output_id: str, threads=None, **kwargs) -> str:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.threads.append(threads)
+        try:
+            if output_id == self.fail_scene:
+                raise RuntimeError("encoder crashed")
+            return await super().create_ken_burns_video(*args, output_id=output_id, **kwargs)
+        finally:
+            self.running -= 1
+
+SCRIPT = " ".join(f"Scene number {i} has enough words in it." for i in range(6))
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "output").mkdir()
+    # The process-wide budget's lock belongs to one event loop; each test runs its own
+    monkeypatch.setattr(pipeline_module, "cpu_budget", CPUBudget(4))
+    return tmp_path
+
+def render(service, encoders: int, progress=None):
+    def on_progress(fraction: float, message: str):
+        if progress is not None:
+            progress.append(fraction)
+    pipeline = ScenePipeline(service, PipelineSettings(encoders=encoders), on_progress=on_progress)
+    return asyncio.run(pipeline.run(SCRIPT, "video_1"))
+
+def test_scenes_encode_one_at_a_time_by_default(workdir):
+    service = CountingVideoService(str(workdir))
+    progress = []
+    render(service, encoders=1, progress=progress)
+    assert service.peak == 1
+    assert service.threads == [None] * 6  # ffmpeg picks its own thread count
+    assert progress == sorted(progress) and progress[-1] == 1.0
+
+def test_scenes_encode_concurrently_with_several_encoders(workdir):
+    service = CountingVideoService(str(workdir))
+    progress = []
+    render(service, encoders=3, progress=progress)
+    assert 1 < service.peak <= 3
+    # Each encoder gets its share of the 4-slot budget
+    assert service.threads == [1] * 6
+    assert progress == sorted(progress) and progress[-1] == 1.0
+
+def test_failed_scene_encode_fails_the_render(workdir):
+    service = CountingVideoService(str(workdir), fail_scene="segment_1")
+    with pytest.raises(RuntimeError, match="encoder crashed"):
+        render(service, encoders=3)
+    assert service.running == 0  # the other encodes were cancelled
@@ -0,0 +1,74 @@
+import json
+import multiprocessing
+
+from services.render_cache import RenderCache, request_key
+
+BASE = {"script": "The ocean is deep.", "style": ["cinematic"], "voice": "male", "avatar": "male",
+        "motion": "crop", "profile": "final", "renditions": [], "target_size_mb": None}
+
+def key(**changes) -> str:
+    return request_key(dict(BASE, **changes))
+
+# ========== request_key ==========
+def test_key_ignores_whitespace_and_non_render_fields():
+    assert key(script="  The ocean\n is   deep. ") == key()
+    assert key(priority="high") == key()
+
+def test_key_follows_the_primary_style_only():
+    # The first style picks geometry and gradient; later ones don't change the render
+    assert key(style=["reels", "cinematic"]) != key(style=["cinematic", "reels"])
+    assert key(style=["reels", "cinematic"]) == key(style=["reels"])
+    assert key(style=[]) == key(style=["cinematic"])
+
+def test_key_sorts_renditions():
+    assert key(renditions=["720p", "480p"]) == key(renditions=["480p", "720p"])
+    assert key(renditions=["720p"]) != key()
+
+def test_target_size_only_matters_with_renditions():
+    assert key(target_size_mb=5) == key()
+    assert key(renditions=["480p"], target_size_mb=5) != key(renditions=["480p"])
+
+def test_key_changes_with_render_settings():
+    for changes in ({"voice": "female"}, {"profile": "draft"}, {"motion": "zoompan"}, {"script": "Other."}):
+        assert key(**changes) != key(), changes
+
+# ========== RenderCache ==========
+def test_lookup_drops_entries_whose_video_is_gone(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    (tmp_path / "video_1.mp4").write_bytes(b"x")
+    cache.store("k1", "video_1", renditions=[])
+    cache.store("k2", "video_2")
+    assert cache.lookup("k1") == {"video_id": "video_1", "renditions": []}
+    assert cache.lookup("k2") is None
+
+def test_index_is_shared_between_processes(tmp_path):
+    (tmp_path / "video_1.mp4").write_bytes(b"x")
+    api, worker = RenderCache(str(tmp_path)), RenderCache(str(tmp_path))
+    assert api.lookup("k1") is None
+    worker.store("k1", "video_1")
+    assert api.lookup("k1")["video_id"] == "video_1"
+    worker.forget_video("video_1")
+    assert api.lookup("k1") is None
+
+def store_many(output_dir: str, worker: int, count: int):
+    cache = RenderCache(output_dir)
+    for i in range(count):
+        cache.store(f"w{worker}-{i}", f"video_{worker}_{i}")
+
+def test_concurrent_stores_from_several_processes_are_all_kept(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=store_many, args=(str(tmp_path), w, 25)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    index = json.loads((tmp_path / "render_cache.json").read_text())
+    assert len(index) == 4 * 25
+
+def test_inflight_is_cleared_only_by_its_task(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    cache.begin("k1", "task-a")
+    cache.finish("k1", "task-b")
+    assert cache.inflight("k1") == "task-a"
+    cache.finish("k1", "task-a")
+    assert cache.inflight("k1") is None
@@ -0,0 +1,122 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services.render_queue import QueueFullError, RenderScheduler
+
+def cost(seconds: float):
+    return SimpleNamespace(seconds=seconds, cores=1, memory_bytes=0)
+
+class Recorder:
+    """Handler that logs job starts and holds each job until released"""
+
+    def __init__(self):
+        self.started = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, task_id: str):
+        self.started.append(task_id)
+        await self.release.wait()
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+# ========== ordering ==========
+def test_higher_priority_runs_first_then_fifo():
+    async def run():
+        handler = Recorder()
+        scheduler = RenderScheduler(handler, workers=1, max_queue=10)
+        scheduler.start()
+        scheduler.submit("running")
+        await settle()  # the only worker is now busy
+        for task_id, priority in [("low", "low"), ("normal-1", "normal"), ("high", "high"), ("normal-2", "normal")]:
+            scheduler.submit(task_id, priority=priority)
+        assert [scheduler.position(t) for t in ("high", "normal-1", "normal-2", "low")] == [1, 2, 3, 4]
+        handler.release.set()
+        while len(handler.started) < 5:
+            await asyncio.sleep(0.001)
+        await scheduler.stop()
+        return handler.started
+    assert asyncio.run(run()) == ["running", "high", "normal-1", "normal-2", "low"]
+
+def test_cancelled_queued_job_never_runs():
+    async def run():
+        handler = Recorder()
+        scheduler = RenderScheduler(handler, workers=1, max_queue=10)
+        scheduler.start()
+        scheduler.submit("running")
+        await settle()
+        scheduler.submit("dropped")
+        scheduler.submit("kept")
+        assert scheduler.cancel("dropped")
+        assert scheduler.position("dropped") is None
+        assert scheduler.position("kept") == 1
+        assert not scheduler.cancel("unknown")
+        handler.release.set()
+        while len(handler.started) < 2:
+            await asyncio.sleep(0.001)
+        await settle()
+        await scheduler.stop()
+        return handler.started
+    assert asyncio.run(run()) == ["running", "kept"]
+
+def test_cancel_running_job():
+    async def run():
+        handler = Recorder()
+        scheduler = RenderScheduler(handler, workers=1, max_queue=10)
+        scheduler.start()
+        scheduler.submit("running")
+        await settle()
+        assert scheduler.cancel("running")
+        await settle()
+        assert scheduler.active_count == 0
+        # The worker survives the cancellation and takes the next job
+        scheduler.submit("next")
+        await settle()
+        await scheduler.stop()
+        return handler.started
+    assert asyncio.run(run()) == ["running", "next"]
+
+# ========== estimates ==========
+def test_estimated_wait_spreads_work_over_workers():
+    async def run():
+        handler = Recorder()
+        scheduler = RenderScheduler(handler, workers=2, max_queue=10)
+        scheduler.start()
+        scheduler.submit("a", cost=cost(40))
+        scheduler.submit("b", cost=cost(40))
+        await settle()  # both workers busy, ~40 s left each
+        scheduler.submit("c", cost=cost(10))
+        scheduler.submit("d", cost=cost(30))
+        waits = scheduler.estimated_wait("c"), scheduler.estimated_wait("d")
+        running = scheduler.estimated_wait("a")
+        await scheduler.stop()
+        return waits, running
+    (wait_c, wait_d), running = asyncio.run(run())
+    assert 39 <= wait_c <= 40  # 80 s running over 2 workers
+    assert 44 <= wait_d <= 45  # plus c's 10 s
+    assert running is None
+
+def test_retry_after_is_the_wait_for_the_head_of_the_queue():
+    async def run(workers: int):
+        scheduler = RenderScheduler(Recorder(), workers=workers, max_queue=workers * 2)
+        scheduler.start()
+        for i in range(workers):
+            scheduler.submit(f"running-{i}", cost=cost(20))
+        await settle()
+        for i in range(workers * 2):
+            scheduler.submit(f"queued-{i}", cost=cost(20))
+        with pytest.raises(QueueFullError) as full:
+            scheduler.submit("rejected", cost=cost(20))
+        await scheduler.stop()
+        return full.value.retry_after
+    # Every worker frees up after its 20 s job however long the queue is,
+    # not after the whole queue has drained
+    assert 19 <= asyncio.run(run(1)) <= 20
+    assert 19 <= asyncio.run(run(4)) <= 20
+
+def test_submit_before_start_is_an_error():
+    with pytest.raises(RuntimeError):
+        RenderScheduler(Recorder(), workers=1).submit("t1")
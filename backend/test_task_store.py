@@ -0,0 +1,84 @@
+import sqlite3
+import time
+
+import pytest
+
+from services.task_store import MemoryTaskStore, SQLiteTaskStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteTaskStore(str(tmp_path / "tasks.db"), flush_seconds=60)
+    yield store
+    store.close()
+
+def test_update_is_visible_before_it_is_flushed(store, tmp_path):
+    store.create("t1", {"status": "queued", "progress": 0})
+    assert store.update("t1", status="processing", progress=40)
+    assert store.get("t1")["progress"] == 40
+
+    other = SQLiteTaskStore(str(tmp_path / "tasks.db"), flush_seconds=60)
+    assert other.get("t1")["progress"] == 0  # another process: not written yet
+    store.flush()
+    assert other.get("t1")["progress"] == 40
+    assert [task["task_id"] for task in other.unfinished()] == ["t1"]
+    other.close()
+
+def test_update_of_unknown_or_deleted_task(store):
+    assert not store.update("missing", progress=10)
+    store.create("t1", {"status": "queued"})
+    store.update("t1", progress=10)
+    store.delete("t1")
+    store.flush()
+    assert store.get("t1") is None
+
+def test_update_does_not_wait_for_a_held_write_lock(store, tmp_path):
+    store.create("t1", {"status": "processing", "progress": 0})
+    blocker = sqlite3.connect(str(tmp_path / "tasks.db"), isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")  # another process mid-write
+    started = time.perf_counter()
+    for progress in range(1, 51):
+        store.update("t1", progress=progress)
+    assert time.perf_counter() - started < 0.5
+    assert store.get("t1")["progress"] == 50
+    blocker.execute("ROLLBACK")
+    blocker.close()
+    store.flush()
+    assert store.get("t1")["progress"] == 50
+
+def test_claim_sees_buffered_owner(store):
+    store.create("t1", {"status": "processing", "owner": "dead"})
+    store.update("t1", owner="alive")
+    assert not store.claim("t1", "dead", owner="me")
+    assert store.claim("t1", "alive", owner="me")
+    assert store.get("t1")["owner"] == "me"
+
+def test_close_writes_pending_updates(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    store = SQLiteTaskStore(path, flush_seconds=60)
+    store.create("t1", {"status": "processing"})
+    store.update("t1", status="completed")
+    store.close()
+    reopened = SQLiteTaskStore(path)
+    assert reopened.get("t1")["status"] == "completed"
+    assert reopened.unfinished() == []
+    reopened.close()
+
+def test_memory_store_claim():
+    store = MemoryTaskStore()
+    store.create("t1", {"status": "processing", "owner": "dead"})
+    assert not store.claim("t1", "other", owner="me")
+    assert store.claim("t1", "dead", owner="me")
+    assert store.get("t1")["owner"] == "me"
+
+def test_writer_thread_flushes_in_the_background(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    store = SQLiteTaskStore(path, flush_seconds=0.02)
+    store.create("t1", {"status": "processing"})
+    store.update("t1", progress=70)
+    other = SQLiteTaskStore(path)
+    deadline = time.time() + 5
+    while other.get("t1").get("progress") != 70 and time.time() < deadline:
+        time.sleep(0.02)
+    assert other.get("t1")["progress"] == 70
+    other.close()
+    store.close()
@@ -0,0 +1,90 @@
+import asyncio
+import os
+
+from services.disk_cache import DiskLRUCache
+from services.tts import TTSService, ToneTTSBackend, coalesce, split_chunks
+
+# ========== split_chunks ==========
+def test_split_chunks_packs_whole_sentences():
+    text = "One two three. Four five six. Seven eight nine."
+    assert split_chunks(text, max_chars=30) == ["One two three. Four five six.", "Seven eight nine."]
+    assert split_chunks(text, max_chars=200) == [text]
+
+def test_split_chunks_splits_long_sentences_on_words():
+    sentence = " ".join(["word"] * 30)  # 149 characters, no sentence break
+    chunks = split_chunks(sentence, max_chars=40)
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert " ".join(chunks) == sentence
+
+def test_split_chunks_never_exceeds_limit():
+    text = "Short. " + "A much longer sentence that keeps going and going. " * 5 + "End."
+    chunks = split_chunks(text, max_chars=60)
+    assert all(len(chunk) <= 60 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+def test_split_chunks_blank():
+    assert split_chunks("   ") == []
+
+# ========== coalescing & cache ==========
+def test_coalesce_runs_identical_work_once():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(coalesce("same-key", work) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert len(calls) == 1
+
+def tts_service(tmp_path, name: str, cache: DiskLRUCache = None) -> TTSService:
+    workdir = tmp_path / name
+    workdir.mkdir()
+    # An explicit cache, so the tests never create temp/tts_cache in the repo
+    cache = cache if cache is not None else DiskLRUCache(str(tmp_path / "cache"), 100 * 1024 * 1024)
+    return TTSService(str(workdir), ToneTTSBackend("silence"), cache)
+
+def cache_files(cache: DiskLRUCache):
+    return [os.path.join(cache.directory, name) for name in os.listdir(cache.directory)
+            if os.path.isfile(os.path.join(cache.directory, name))]
+
+def test_narration_is_linked_into_the_workspace(tmp_path):
+    first = tts_service(tmp_path, "task_a")
+    second = tts_service(tmp_path, "task_b", first.cache)
+
+    async def run():
+        return await asyncio.gather(first.synthesize("Hello there."), second.synthesize("Hello there."))
+
+    path_a, path_b = asyncio.run(run())
+    assert os.path.dirname(path_a) == first.workdir
+    assert os.path.dirname(path_b) == second.workdir
+    assert len(first.cache) == 1
+
+    # Evicting the cache entry must not pull the file from under a render
+    for path in cache_files(first.cache):
+        os.remove(path)
+    assert os.path.getsize(path_a) > 0 and os.path.getsize(path_b) > 0
+
+def test_shared_synthesis_survives_the_first_caller_being_cancelled(tmp_path):
+    first = tts_service(tmp_path, "task_a")
+    second = tts_service(tmp_path, "task_b", first.cache)
+
+    async def run():
+        started = asyncio.ensure_future(first.synthesize("Hello again."))
+        await asyncio.sleep(0)  # first caller starts the shared synthesis
+        waiter = asyncio.ensure_future(second.synthesize("Hello again."))
+        await asyncio.sleep(0)
+        started.cancel()
+        # What TaskWorkspace does when the cancelled task cleans up
+        for name in os.listdir(first.workdir):
+            os.remove(os.path.join(first.workdir, name))
+        os.rmdir(first.workdir)
+        return await waiter
+
+    path = asyncio.run(run())
+    assert os.path.dirname(path) == second.workdir
+    assert os.path.getsize(path) > 0
+    assert os.listdir(first.cache.staging_dir) == []
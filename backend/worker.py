@@ -0,0 +1,147 @@
+"""Standalone render worker: pulls render jobs from the shared job queue.
+
+Start the API with a job queue and add as many workers as needed:
+    JOB_QUEUE=sqlite uvicorn main:app
+    JOB_QUEUE=sqlite python worker.py [--slots 2]
+
+Workers report progress through the task store the API reads, so the API
+and every worker must share TASK_STORE/TASK_DB_PATH, JOB_DB_PATH and the
+output/ and temp/ directories. Each job is leased for JOB_LEASE_SECONDS and
+the lease is renewed while it renders; if a worker dies, its jobs are
+re-queued once the lease runs out (failed after JOB_MAX_ATTEMPTS). On
+SIGTERM/SIGINT running jobs are handed back to the queue immediately.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+from typing import Dict
+
+# Workers always talk to a shared queue
+os.environ.setdefault("JOB_QUEUE", "sqlite")
+
+import main  # noqa: E402
+from services import ffmpeg_runner  # noqa: E402
+from services.job_queue import LEASE_SECONDS, Job, JobQueue  # noqa: E402
+from services.render_queue import default_worker_count  # noqa: E402
+
+POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "1"))
+
+
+class RenderWorker:
+    def __init__(self, queue: JobQueue, slots: int, lease_seconds: float = LEASE_SECONDS):
+        self.queue = queue
+        self.slots = slots
+        self.lease_seconds = lease_seconds
+        self.worker_id = main.WORKER_ID
+        self.stopping = asyncio.Event()
+        self._running: Dict[str, asyncio.Task] = {}
+
+    async def run(self):
+        self.queue.register_worker(self.worker_id, self.slots)
+        print(f"🛠️  Worker {self.worker_id} started with {self.slots} slot(s)")
+        loops = [asyncio.create_task(self._slot()) for _ in range(self.slots)]
+        reaper = asyncio.create_task(self._reap())
+        await self.stopping.wait()
+
+        # Hand running jobs back instead of letting them wait out their lease
+        for task_id, job in list(self._running.items()):
+            main.handed_off.add(task_id)
+            job.cancel()
+        await asyncio.gather(*loops, return_exceptions=True)
+        reaper.cancel()
+        await ffmpeg_runner.kill_all()
+        self.queue.unregister_worker(self.worker_id)
+        print(f"👋 Worker {self.worker_id} stopped")
+
+    async def _slot(self):
+        while not self.stopping.is_set():
+            job = self.queue.lease(self.worker_id, self.lease_seconds)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run_job(job)
+
+    async def _run_job(self, job: Job):
+        task = main.tasks.get(job.task_id)
+        if task is None or task["status"] in main.TERMINAL_STATUSES:
+            # Expired or cancelled while it waited
+            self.queue.complete(job.task_id, self.worker_id)
+            return
+
+        request = main.VideoRequest(**job.payload)
+        main.render_cache.begin(task["cache_key"], job.task_id)
+        render = asyncio.create_task(self._admitted(job.task_id, request))
+        self._running[job.task_id] = render
+        lease = "ok"
+        try:
+            while not render.done():
+                await asyncio.wait({render}, timeout=self.lease_seconds / 3)
+                if render.done():
+                    break
+                lease = self.queue.heartbeat(job.task_id, self.worker_id, self.lease_seconds)
+                if lease == "lost":
+                    # Our lease ran out (e.g. we were stalled) and another worker has the job
+                    print(f"⚠️  Lost the lease on {job.task_id}, abandoning it")
+                    main.handed_off.add(job.task_id)
+                    render.cancel()
+                elif lease == "cancelled":
+                    render.cancel()
+            await asyncio.gather(render, return_exceptions=True)
+        finally:
+            self._running.pop(job.task_id, None)
+            main.handed_off.discard(job.task_id)  # if cancelled before the render began
+
+        if self.stopping.is_set() and lease == "ok" and render.cancelled():
+            self.queue.release(job.task_id, self.worker_id)
+            main.update_task(job.task_id, status="queued", progress=0,
+                             message="Re-queued: render worker shut down")
+        elif lease != "lost":
+            self.queue.complete(job.task_id, self.worker_id)
+
+    async def _admitted(self, task_id: str, request):
+        """Render once this machine's CPU/memory budget has room for it"""
+        estimate = main.estimate_render(request)
+        async with main.render_budget.reserve(estimate.cores, estimate.memory_bytes):
+            await main.process_video_task(task_id, request)
+
+    async def _reap(self):
+        """Keep this worker registered and recover jobs of workers that died"""
+        while True:
+            self.queue.register_worker(self.worker_id, self.slots)
+            requeued, failed = self.queue.requeue_expired()
+            for task_id in requeued:
+                main.update_task(task_id, status="queued", progress=0,
+                                 message="Re-queued: its render worker stopped responding")
+                print(f"♻️  Re-queued task {task_id} from a dead worker")
+            for task_id in failed:
+                main.update_task(task_id, status="failed", error="render worker lost",
+                                 message="Error: render workers kept dying on this job")
+            await asyncio.sleep(self.lease_seconds / 3)
+
+
+async def run(args):
+    if main.job_queue is None:
+        sys.exit("JOB_QUEUE=local has no queue to pull from; use JOB_QUEUE=sqlite")
+    if os.getenv("TASK_STORE") == "memory":
+        sys.exit("TASK_STORE=memory is private to one process; workers need the shared sqlite store")
+
+    worker = RenderWorker(main.job_queue, args.slots or default_worker_count())
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stopping.set)
+    try:
+        await worker.run()
+    finally:
+        main.job_queue.close()
+        main.tasks.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slots", type=int, help="jobs rendered at once (default: RENDER_WORKERS or cores/2)")
+    asyncio.run(run(parser.parse_args()))
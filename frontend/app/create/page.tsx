@@ -13,6 +13,7 @@ export default function CreatePage() {
   const [style, setStyle] = useState(['cinematic'])
   const [avatar, setAvatar] = useState('male')
   const [voice, setVoice] = useState('male')
+  const [profile, setProfile] = useState<'draft' | 'final'>('final')
   const [isLoading, setIsLoading] = useState(false)
   const [backendConnected, setBackendConnected] = useState(true)
 
@@ -47,7 +48,7 @@ export default function CreatePage() {
       const response = await fetch('http://localhost:8000/api/generate', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ script, style, avatar, voice })
+        body: JSON.stringify({ script, style, avatar, voice, profile })
       })
 
       const data = await response.json()
@@ -229,6 +230,26 @@ export default function CreatePage() {
 
             {/* Generate Button */}
             <div className="glass-effect rounded-2xl p-6">
+              <div className="grid grid-cols-2 gap-3 mb-4">
+                {[
+                  { id: 'draft' as const, label: 'Quick Preview', desc: 'Low-res, ready in seconds' },
+                  { id: 'final' as const, label: 'Final Quality', desc: 'Full resolution' },
+                ].map((p) => (
+                  <button
+                    key={p.id}
+                    onClick={() => setProfile(p.id)}
+                    className={`p-3 rounded-xl border-2 text-left transition-all ${
+                      profile === p.id
+                        ? 'border-blue-500 bg-blue-500/20'
+                        : 'border-white/10 bg-white/5 hover:bg-white/10'
+                    }`}
+                  >
+                    <div className="text-sm font-semibold">{p.label}</div>
+                    <div className="text-xs text-gray-400">{p.desc}</div>
+                  </button>
+                ))}
+              </div>
+
               <button
                 onClick={handleGenerate}
                 disabled={isLoading || !script.trim()}
@@ -12,6 +12,8 @@ export default function DownloadPage() {
   const [copied, setCopied] = useState(false)
   const [videoUrl, setVideoUrl] = useState('')
   const [downloadUrl, setDownloadUrl] = useState('')
+  // Vertical styles render 1080x1920, cinematic/documentary/corporate 1920x1080
+  const [size, setSize] = useState<{ width: number; height: number } | null>(null)
 
   useEffect(() => {
     if (videoId) {
@@ -63,12 +65,19 @@ export default function DownloadPage() {
         <div className="grid md:grid-cols-2 gap-8">
           {/* Video Preview */}
           <div className="glass-effect rounded-2xl p-6">
-            <div className="aspect-[9/16] bg-black rounded-xl overflow-hidden mb-4">
+            <div
+              className="bg-black rounded-xl overflow-hidden mb-4"
+              style={{ aspectRatio: size ? `${size.width} / ${size.height}` : '16 / 9' }}
+            >
               {videoUrl ? (
                 <video
                   src={videoUrl}
                   controls
-                  className="w-full h-full object-cover"
+                  onLoadedMetadata={(e) => {
+                    const { videoWidth, videoHeight } = e.currentTarget
+                    if (videoWidth && videoHeight) setSize({ width: videoWidth, height: videoHeight })
+                  }}
+                  className="w-full h-full object-contain"
                   poster="/video-poster.jpg"
                 />
               ) : (
@@ -81,7 +90,7 @@ export default function DownloadPage() {
             <div className="space-y-2 text-sm">
               <div className="flex items-center">
                 <CheckCircle className="h-4 w-4 text-green-500 mr-2" />
-                <span>1080x1920 MP4</span>
+                <span>{size ? `${size.width}x${size.height}` : 'HD'} MP4</span>
               </div>
               <div className="flex items-center">
                 <CheckCircle className="h-4 w-4 text-green-500 mr-2" />
@@ -139,7 +148,7 @@ export default function DownloadPage() {
                 </div>
                 <div className="flex justify-between">
                   <span className="text-gray-400">Resolution:</span>
-                  <span>1080x1920</span>
+                  <span>{size ? `${size.width}x${size.height}` : '—'}</span>
                 </div>
                 <div className="flex justify-between">
                   <span className="text-gray-400">Duration:</span>
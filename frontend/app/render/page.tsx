@@ -2,7 +2,9 @@
 
 import { useEffect, useState } from 'react'
 import { useRouter, useSearchParams } from 'next/navigation'
-import { Loader2, CheckCircle, Image, Volume2, Film, Download } from 'lucide-react'
+import { Loader2, CheckCircle, Image, Volume2, Film, Download, XCircle } from 'lucide-react'
+import { subscribeTaskStatus, getMediaUrl, TaskStatus } from '@/lib/api'
+import VideoPreview from '@/components/VideoPreview'
 
 export default function RenderPage() {
   const router = useRouter()
@@ -13,6 +15,9 @@ export default function RenderPage() {
   const [status, setStatus] = useState('Starting video generation...')
   const [step, setStep] = useState(0)
   const [videoId, setVideoId] = useState('')
+  const [playlistUrl, setPlaylistUrl] = useState('')
+  // Set when the task ends without a video (cancelled or expired)
+  const [stopped, setStopped] = useState('')
 
   const steps = [
     { icon: <Image />, label: 'Processing script', desc: 'Analyzing your text' },
@@ -28,43 +33,51 @@ export default function RenderPage() {
       return
     }
 
-    const interval = setInterval(async () => {
-      try {
-        const response = await fetch(`http://localhost:8000/api/status/${taskId}`)
-        const data = await response.json()
-        
-        setProgress(data.progress || 0)
-        setStatus(data.message || 'Processing...')
-        
-        if (data.video_id) {
-          setVideoId(data.video_id)
-        }
-        
-        // Update step based on progress
-        if (data.progress < 20) setStep(0)
-        else if (data.progress < 40) setStep(1)
-        else if (data.progress < 60) setStep(2)
-        else if (data.progress < 80) setStep(3)
-        else setStep(4)
-        
-        if (data.status === 'completed' || data.progress === 100) {
-          clearInterval(interval)
-          setTimeout(() => {
-            router.push(`/download?videoId=${data.video_id}`)
-          }, 1500)
-        }
-        
-        if (data.status === 'failed') {
-          clearInterval(interval)
-          alert('Video generation failed. Please try again.')
-          router.push('/create')
-        }
-      } catch (error) {
-        console.error('Error checking status:', error)
+    const unsubscribe = subscribeTaskStatus(taskId, (data: TaskStatus) => {
+      setProgress(data.progress || 0)
+      setStatus(data.message || 'Processing...')
+      
+      if (data.video_id) {
+        setVideoId(data.video_id)
       }
-    }, 2000)
+      
+      // Finished scenes can be watched while the rest render
+      if (data.playlist_url) {
+        setPlaylistUrl(getMediaUrl(data.playlist_url))
+      }
+      
+      // Update step based on progress
+      if (data.progress < 20) setStep(0)
+      else if (data.progress < 40) setStep(1)
+      else if (data.progress < 60) setStep(2)
+      else if (data.progress < 80) setStep(3)
+      else setStep(4)
+      
+      if (data.status === 'completed' || data.progress === 100) {
+        unsubscribe()
+        setTimeout(() => {
+          router.push(`/download?videoId=${data.video_id}`)
+        }, 1500)
+      }
+      
+      if (data.status === 'failed') {
+        unsubscribe()
+        alert('Video generation failed. Please try again.')
+        router.push('/create')
+      }
+      
+      if (data.status === 'cancelled') {
+        unsubscribe()
+        setStopped('This video was cancelled.')
+      }
+      
+      if (data.status === 'expired') {
+        unsubscribe()
+        setStopped('This task has expired. Videos and their progress are kept for a limited time.')
+      }
+    })
 
-    return () => clearInterval(interval)
+    return unsubscribe
   }, [taskId, router])
 
   return (
@@ -89,6 +102,13 @@ export default function RenderPage() {
           </div>
         </div>
 
+        {/* Live preview */}
+        {playlistUrl && (
+          <div className="mb-8 max-w-xs mx-auto">
+            <VideoPreview src={playlistUrl} />
+          </div>
+        )}
+
         {/* Steps */}
         <div className="space-y-4 mb-8">
           {steps.map((s, idx) => (
@@ -117,13 +137,28 @@ export default function RenderPage() {
               </div>
               {idx < step ? (
                 <CheckCircle className="h-5 w-5 text-green-500" />
-              ) : idx === step ? (
+              ) : idx === step && !stopped ? (
                 <Loader2 className="h-5 w-5 animate-spin" />
               ) : null}
             </div>
           ))}
         </div>
 
+        {stopped && (
+          <div className="mb-8 p-4 rounded-xl bg-red-500/10 border border-red-500/30 text-center">
+            <div className="flex items-center justify-center mb-3">
+              <XCircle className="h-5 w-5 text-red-400 mr-2" />
+              <span>{stopped}</span>
+            </div>
+            <button
+              onClick={() => router.push('/create')}
+              className="px-6 py-2 glass-effect rounded-xl font-semibold hover:bg-white/10 transition"
+            >
+              Create a new video
+            </button>
+          </div>
+        )}
+
         {/* Info */}
         <div className="text-center text-sm text-gray-400">
           <p className="mb-2">Don't close this page. Your video is being generated.</p>
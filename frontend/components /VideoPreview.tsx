@@ -1,26 +1,66 @@
 'use client'
 
+import { useEffect, useState } from 'react'
+
 interface VideoPreviewProps {
   src?: string
   isLoading?: boolean
+  // Until the video reports its own size; styles render 9:16 or 16:9
+  aspectRatio?: string
+}
+
+// HLS playlists (.m3u8) play natively in Safari; elsewhere hls.js is loaded on demand
+function useHls(video: HTMLVideoElement | null, src?: string) {
+  useEffect(() => {
+    if (!video || !src || !src.endsWith('.m3u8')) return
+    if (video.canPlayType('application/vnd.apple.mpegurl')) {
+      video.src = src
+      return
+    }
+
+    let hls: { destroy: () => void } | null = null
+    let cancelled = false
+    import('hls.js').then(({ default: Hls }) => {
+      if (cancelled || !Hls.isSupported()) return
+      const player = new Hls()
+      player.loadSource(src)
+      player.attachMedia(video)
+      hls = player
+    })
+
+    return () => {
+      cancelled = true
+      hls?.destroy()
+    }
+  }, [video, src])
 }
 
-export default function VideoPreview({ src, isLoading = false }: VideoPreviewProps) {
+export default function VideoPreview({ src, isLoading = false, aspectRatio = '16 / 9' }: VideoPreviewProps) {
+  const [video, setVideo] = useState<HTMLVideoElement | null>(null)
+  const [frame, setFrame] = useState(aspectRatio)
+  const isPlaylist = !!src && src.endsWith('.m3u8')
+  useHls(video, src)
+
   if (isLoading) {
     return (
-      <div className="aspect-[9/16] bg-gray-900 rounded-xl flex items-center justify-center">
+      <div className="bg-gray-900 rounded-xl flex items-center justify-center" style={{ aspectRatio }}>
         <div className="animate-spin rounded-full h-12 w-12 border-t-2 border-b-2 border-blue-500"></div>
       </div>
     )
   }
 
   return (
-    <div className="aspect-[9/16] bg-black rounded-xl overflow-hidden">
+    <div className="bg-black rounded-xl overflow-hidden" style={{ aspectRatio: frame }}>
       {src ? (
         <video
-          src={src}
+          ref={setVideo}
+          src={isPlaylist ? undefined : src}
           controls
-          className="w-full h-full object-cover"
+          onLoadedMetadata={(e) => {
+            const { videoWidth, videoHeight } = e.currentTarget
+            if (videoWidth && videoHeight) setFrame(`${videoWidth} / ${videoHeight}`)
+          }}
+          className="w-full h-full object-contain"
         />
       ) : (
         <div className="w-full h-full flex items-center justify-center text-gray-500">
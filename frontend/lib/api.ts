@@ -19,12 +19,17 @@ export interface VideoRequest {
   style: string[]
   avatar: string
   voice: string
+  profile?: 'draft' | 'final'
+  renditions?: string[]
+  target_size_mb?: number
 }
 
 export interface TaskResponse {
   task_id: string
   status: string
   message: string
+  estimated_seconds?: number
+  eta_seconds?: number
 }
 
 export async function generateVideo(request: VideoRequest): Promise<TaskResponse> {
@@ -46,6 +51,10 @@ export async function generateVideo(request: VideoRequest): Promise<TaskResponse
 export async function getTaskStatus(taskId: string) {
   const response = await fetch(`${API_BASE}/api/status/${taskId}`)
   
+  // Unknown or swept after TASK_TTL_SECONDS: report it like the event stream does
+  if (response.status === 404) {
+    return { task_id: taskId, status: 'expired', progress: 0, message: 'This task has expired' }
+  }
   if (!response.ok) {
     throw new Error('Failed to get task status')
   }
@@ -53,6 +62,92 @@ export async function getTaskStatus(taskId: string) {
   return response.json()
 }
 
+export interface Rendition {
+  name: string
+  url: string
+  width: number
+  height: number
+  size_bytes: number
+  bitrate_kbps: number
+}
+
+export interface TaskStatus {
+  task_id: string
+  status: string
+  progress: number
+  message: string
+  video_id?: string | null
+  video_url?: string
+  playlist_url?: string
+  renditions?: Rendition[]
+  queue_position?: number
+  estimated_wait_seconds?: number
+  eta_seconds?: number
+}
+
+// 'expired' is never stored: it stands for a task the server no longer knows
+const TERMINAL_STATUSES = ['completed', 'failed', 'cancelled', 'expired']
+
+// Push-based status updates via server-sent events.
+// Falls back to polling if EventSource is unavailable or the stream breaks.
+// Returns a function that stops listening.
+export function subscribeTaskStatus(
+  taskId: string,
+  onUpdate: (status: TaskStatus) => void,
+  pollIntervalMs = 2000
+): () => void {
+  let stopped = false
+  let pollTimer: ReturnType<typeof setTimeout> | null = null
+  let source: EventSource | null = null
+
+  const handle = (status: TaskStatus) => {
+    if (stopped) return
+    onUpdate(status)
+    if (TERMINAL_STATUSES.includes(status.status)) stop()
+  }
+
+  const poll = async () => {
+    if (stopped) return
+    try {
+      handle(await getTaskStatus(taskId))
+    } catch (error) {
+      console.error('Error checking status:', error)
+    }
+    if (!stopped) pollTimer = setTimeout(poll, pollIntervalMs)
+  }
+
+  const stop = () => {
+    stopped = true
+    source?.close()
+    if (pollTimer) clearTimeout(pollTimer)
+  }
+
+  if (typeof EventSource === 'undefined') {
+    poll()
+    return stop
+  }
+
+  source = new EventSource(`${API_BASE}/api/status/${taskId}/events`)
+  source.addEventListener('status', (event) => {
+    handle(JSON.parse((event as MessageEvent).data))
+  })
+  source.addEventListener('expired', () => {
+    handle({ task_id: taskId, status: 'expired', progress: 0, message: 'This task has expired' })
+  })
+  source.onerror = () => {
+    // Stream closed or blocked by a proxy: switch to polling
+    source?.close()
+    if (!stopped) poll()
+  }
+
+  return stop
+}
+
 export function getVideoUrl(videoId: string): string {
   return `${API_BASE}/api/videos/${videoId}`
 }
+
+// Absolute URL for a server-relative path such as a task's playlist_url
+export function getMediaUrl(path: string): string {
+  return `${API_BASE}${path}`
+}